@@ -3,6 +3,16 @@ ASGI config for MainProject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. ``uvicorn MainProject.asgi:application``)
+to enable the server-sent event streams (/api/.../events/), which hold one
+connection per subscriber. Status change events are published in-process, so
+run a single worker process unless a shared broker is added. The application
+is wrapped in TravelRequest.events.DisconnectMiddleware so that the streams
+end (and unsubscribe) when their client disconnects.
+
+The hot read endpoints are served by the async views in TravelRequest.async_views
+(set TRAVELREQUEST_ASYNC_READ_VIEWS=0 to use the DRF views instead).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +22,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MainProject.settings')
+os.environ.setdefault('TRAVELREQUEST_ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
+
+from TravelRequest.events import DisconnectMiddleware  # noqa: E402 (needs the apps loaded)
+
+application = DisconnectMiddleware(application)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'TravelRequest.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -53,9 +54,11 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'TravelRequest.instrumentation.RequestStatsMiddleware',
+    'TravelRequest.routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'corsheaders.middleware.CorsMiddleware'
+    'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -94,6 +97,72 @@ DATABASES = {
     }
 }
 
+# PRAGMAs applied to every new SQLite connection (see TravelRequest/sqlite).
+SQLITE_PRAGMAS = {}
+
+# 'production' tunes SQLite for concurrent use: WAL, persistent connections and
+# a backend that serializes writers (see TravelRequest/sqlite).
+DATABASE_PROFILE = os.environ.get('TRAVELREQUEST_DATABASE_PROFILE', 'development')
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'TravelRequest.sqlite',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    }
+
+# Read replicas of 'default', as comma-separated SQLite files; local copies are
+# refreshed with `manage.py refresh_read_replicas`. GET requests read from them
+# through TravelRequest.routing, except for users who wrote within the last
+# REPLICA_STICKY_SECONDS. In tests they mirror 'default'.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('TRAVELREQUEST_READ_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = dict(DATABASES['default'], NAME=path.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['TravelRequest.routing.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache used by TravelRequest.authentication.CachedTokenAuthentication. Logout and
+# deactivation only evict tokens from the local process's cache, so keep the TTL
+# short unless the alias names a cache shared by every worker process.
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TTL = 30
+
+# Cache shared by the manager and admin list endpoints for their rendered responses
+# (TravelRequest.response_cache); bodies larger than RESPONSE_CACHE_MAX_BYTES are not kept
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_MAX_BYTES = 1024 * 1024
+
+# Serve the hot read endpoints with TravelRequest.async_views (set by MainProject/asgi.py)
+ASYNC_READ_VIEWS = os.environ.get('TRAVELREQUEST_ASYNC_READ_VIEWS', '0') == '1'
+
+# Password hashing processes of the admin profile import endpoints; 0 hashes in the
+# request's process. The import_profiles command uses IMPORT_HASH_WORKERS (default:
+# one per CPU).
+IMPORT_HTTP_HASH_WORKERS = 0
+
+# Requests running more SQL queries than this are logged as warnings by
+# TravelRequest.instrumentation (None disables the check).
+QUERY_BUDGET = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,136 @@
+"""
+Archival of finished travel requests.
+
+Closed and rejected requests that have not changed for a number of days are
+moved from TravelRequests to ArchivedTravelRequests by the
+archive_travel_requests management command, so the hot list queries no longer
+scan them. Rows are moved in batches, each in its own transaction: a batch is
+copied to the archive, deleted from TravelRequests and recorded in the audit
+trail together, and an interrupted run simply resumes with the rows left.
+Archived requests keep their id and stay in the dashboard counters; only the
+list versions of their scopes are bumped.
+
+The admin list and export read the archive too when their date filters reach
+back into it (see reaches_archive()); other endpoints only see live requests.
+"""
+
+import datetime
+
+from django.db import connections, router
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from . import audit, counters
+from .models import ArchivedTravelRequests, TravelRequests
+
+ARCHIVED_STATUSES = ('closed', 'rejected')
+DEFAULT_BATCH_SIZE = 500
+
+# Columns copied from TravelRequests to ArchivedTravelRequests.
+ARCHIVED_COLUMNS = tuple(field.attname for field in TravelRequests._meta.concrete_fields)
+
+
+def archivable(cutoff):
+    """Return the live requests that are finished and unchanged since cutoff."""
+    return TravelRequests.objects.filter(Q(is_closed=True) | Q(status__in=ARCHIVED_STATUSES), updated_at__lt=cutoff)
+
+
+def archive_batch(ids, cutoff):
+    """
+    Move the requests among ids that are still archivable to the archive, in one transaction.
+
+    Returns:
+        int: Number of requests archived.
+    """
+    with audit.recording():
+        rows = list(archivable(cutoff).filter(id__in=ids).select_for_update().values(*ARCHIVED_COLUMNS))
+        if not rows:
+            return 0
+        archived_at = timezone.now()
+        ArchivedTravelRequests.objects.bulk_create(ArchivedTravelRequests(**row, archived_at=archived_at)
+                                                   for row in rows)
+        _delete_rows([row['id'] for row in rows])
+        counters.touch(tuple(row[field] for field in counters.SNAPSHOT_FIELDS) for row in rows)
+        for row in rows:
+            audit.record(row['id'], 'archived', row['status'], row['status'])
+    return len(rows)
+
+
+def _delete_rows(ids):
+    """
+    Delete live requests with a plain DELETE statement.
+
+    QuerySet.delete() would send post_delete signals, which take the requests out
+    of the counters and record them as deleted; archived requests are neither.
+    """
+    connection = connections[router.db_for_write(TravelRequests)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {quote(TravelRequests._meta.db_table)} '
+                       f'WHERE {quote(TravelRequests._meta.pk.column)} IN ({", ".join(["%s"] * len(ids))})', ids)
+
+
+def archive(days, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Archive the finished requests that have not changed for the given number of days.
+
+    Candidates are walked in id order; a request that changes between being
+    listed and being moved is left for the next run.
+
+    Args:
+        days (int): Minimum age, in days since the last change.
+        batch_size (int): Requests moved per transaction.
+
+    Yields:
+        int: Number of requests archived by each batch.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    last_id = 0
+    while True:
+        ids = list(archivable(cutoff).filter(id__gt=last_id).order_by('id')
+                   .values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield archive_batch(ids, cutoff)
+
+
+def reaches_archive(query):
+    """
+    Return whether the list date filters may match archived requests.
+
+    Without 'from_date' / 'to_date' only live requests are listed. Otherwise the
+    archive is read when some archived request could satisfy every date filter,
+    which is checked with one MIN / MAX index lookup per filter.
+
+    Args:
+        query (ListQuery): The validated list filters (see list_query.py).
+    """
+    if not (query.from_date or query.to_date):
+        return False
+    archived = ArchivedTravelRequests.objects
+    if query.from_date:
+        latest = archived.aggregate(bound=Max('from_date'))['bound']
+        if latest is None or latest < query.from_date:
+            return False
+    if query.to_date:
+        earliest = archived.aggregate(bound=Min('to_date'))['bound']
+        if earliest is None or earliest > query.to_date:
+            return False
+    return True
+
+
+async def areaches_archive(query):
+    """Async version of reaches_archive()."""
+    if not (query.from_date or query.to_date):
+        return False
+    archived = ArchivedTravelRequests.objects
+    if query.from_date:
+        latest = (await archived.aaggregate(bound=Max('from_date')))['bound']
+        if latest is None or latest < query.from_date:
+            return False
+    if query.to_date:
+        earliest = (await archived.aaggregate(bound=Min('to_date')))['bound']
+        if earliest is None or earliest > query.to_date:
+            return False
+    return True
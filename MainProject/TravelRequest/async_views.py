@@ -0,0 +1,200 @@
+"""
+ASGI-native versions of the hot read endpoints.
+
+Under ASGI every DRF view in views.py runs in the sync_to_async thread pool for
+the whole request. The views below serve the same URLs with Django's async ORM
+(afirst, async for) and async token authentication, so slow clients and
+database waits do not hold a thread:
+    - GET /employee/requests/<pk>/ (PUT and DELETE are handed to the DRF view)
+    - GET /manager/requests/ and /manager/requests/<pk>/
+    - GET /myadmin/requests/ and /myadmin/requests/<pk>/
+
+urls.py routes these URLs here when the ASYNC_READ_VIEWS setting is on, which
+MainProject/asgi.py does by default. Bodies, status codes, filters, pagination
+and ETag / Last-Modified headers are the same as the DRF views'.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+
+from .models import ArchivedTravelRequests, TravelRequests
+from .pagination import CursorError, apaginate_many, asorted_rows, is_paginated
+from .profiles import aresolve_profile
+from .authentication import authenticate_request_async
+from .list_query import ListQueryError, compile_list_query
+from .expansion import ExpandError, expanded_reader, expanded_variant, parse_expand
+from .conditional import list_etag, not_modified, row_etag, set_validators
+from .response_cache import acached_response, astore_response
+from . import archive, audit, counters
+from . import views
+from .views import event_reader, travel_request_reader
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """Render data the way DRF's JSONRenderer does."""
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def async_read_view(fallback=None):
+    """
+    Turn an async view into a token-authenticated, read-only endpoint.
+
+    Args:
+        fallback: DRF view handling every method other than GET and HEAD on the
+            same URL, if any; otherwise those methods are answered with 405.
+    """
+    def decorator(view):
+        sync_fallback = sync_to_async(fallback) if fallback else None
+
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                if sync_fallback:
+                    return await sync_fallback(request, *args, **kwargs)
+                return json_response({'detail': f'Method "{request.method}" not allowed.'},
+                                     status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                request.user, request.auth = await authenticate_request_async(request)
+            except APIException as exc:
+                response = json_response({'detail': exc.detail}, exc.status_code)
+                response['WWW-Authenticate'] = 'Token'
+                return response
+            return await view(request, *args, **kwargs)
+        # csrf_exempt() would wrap the coroutine function in a sync function on Django 4.2.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def detail_response(request, qs):
+    """
+    Async version of views.detail_response().
+
+    Without '?expand=' the row's updated_at is looked up first and the row is
+    only read and serialized when the client's ETag / Last-Modified is out of
+    date. With it, the row and the expanded summaries are read with a single
+    query. The timeline is only read when the response is not a 304.
+    """
+    variant = 'timeline' if audit.timeline_requested(request.GET) else None
+    try:
+        expand = parse_expand(request.GET)
+    except ExpandError as exc:
+        return json_response({'error': str(exc)}, status.HTTP_400_BAD_REQUEST)
+    if not expand:
+        row = await qs.values_list('pk', 'updated_at').afirst()
+        if row is None:
+            return json_response({'error': 'Not found'}, status.HTTP_404_NOT_FOUND)
+        response = not_modified(request, row_etag(*row, variant), row[1])
+        if response is not None:
+            return response
+    reader = expanded_reader(travel_request_reader, expand)
+    row = await reader.prepare(qs).values_list(*reader.columns, 'pk', 'updated_at').afirst()
+    if row is None:
+        return json_response({'error': 'Not found'}, status.HTTP_404_NOT_FOUND)
+    pk, updated_at = row[-2:]
+    data = reader.bind()(row)
+    last_modified = updated_at
+    if expand:
+        variant = expanded_variant(variant, data, expand)
+        last_modified = None
+        response = not_modified(request, row_etag(pk, updated_at, variant))
+        if response is not None:
+            return response
+    etag = row_etag(pk, updated_at, variant)
+    if audit.timeline_requested(request.GET):
+        data['timeline'] = await event_reader.aserialize(audit.timeline(pk))
+    response = json_response(data)
+    return set_validators(response, etag, last_modified)
+
+
+async def list_response(request, qs, scope, archived=None):
+    """Async version of views.list_response()."""
+    try:
+        query = compile_list_query(request.GET)
+        expand = parse_expand(request.GET)
+    except (ListQueryError, ExpandError) as exc:
+        return json_response({'error': str(exc)}, status.HTTP_400_BAD_REQUEST)
+    reader = expanded_reader(travel_request_reader, expand)
+    etag = list_etag(scope, await counters.alist_version(scope, bool(expand)), request.GET)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    response = await acached_response(etag)
+    if response is not None:
+        return set_validators(response, etag)
+    querysets = [reader.prepare(query.filter(qs))]
+    if archived is not None and await archive.areaches_archive(query):
+        querysets.append(reader.prepare(query.filter(archived)))
+    if is_paginated(request.GET):
+        try:
+            rows, next_cursor = await apaginate_many(querysets, reader, query.sort_by,
+                                                     request.GET.get('cursor'), request.GET.get('page_size'))
+        except CursorError as exc:
+            return json_response({'error': str(exc)}, status.HTTP_400_BAD_REQUEST)
+        response = json_response({'results': rows, 'next_cursor': next_cursor})
+    elif len(querysets) > 1:
+        rows = await asorted_rows(querysets, reader.columns, query.sort_by)
+        to_representation = reader.bind()
+        response = json_response([to_representation(row) for row in rows])
+    else:
+        response = json_response(await reader.aserialize(query.order(querysets[0])))
+    response = await astore_response(etag, response)
+    return set_validators(response, etag)
+
+
+# ------------------------------------------------------------------------------
+# Employee Views
+# ------------------------------------------------------------------------------
+
+@async_read_view(fallback=views.employee_requests_detail)
+async def employee_requests_detail(request, pk):
+    """Async GET of views.employee_requests_detail()."""
+    employee_id = await aresolve_profile(request.user, 'employee')
+    if not employee_id:
+        return json_response({'error': 'Employee profile not found'}, status.HTTP_404_NOT_FOUND)
+    return await detail_response(request, TravelRequests.objects.filter(pk=pk, employee_id=employee_id))
+
+
+# ------------------------------------------------------------------------------
+# Manager Views
+# ------------------------------------------------------------------------------
+
+@async_read_view()
+async def manager_requests_list(request):
+    """Async version of views.manager_requests_list()."""
+    manager_id = await aresolve_profile(request.user, 'manager')
+    if not manager_id:
+        return json_response({'error': 'Manager profile not found'}, status.HTTP_404_NOT_FOUND)
+    return await list_response(request, TravelRequests.objects.filter(manager_id=manager_id),
+                               counters.manager_scope(manager_id))
+
+
+@async_read_view()
+async def manager_requests_detail(request, pk):
+    """Async version of views.manager_requests_detail()."""
+    manager_id = await aresolve_profile(request.user, 'manager')
+    if not manager_id:
+        return json_response({'error': 'Manager profile not found'}, status.HTTP_404_NOT_FOUND)
+    return await detail_response(request, TravelRequests.objects.filter(pk=pk, manager_id=manager_id))
+
+
+# ------------------------------------------------------------------------------
+# Admin Views
+# ------------------------------------------------------------------------------
+
+@async_read_view()
+async def admin_requests_list(request):
+    """Async version of views.admin_requests_list()."""
+    return await list_response(request, TravelRequests.objects.all(), counters.GLOBAL_SCOPE,
+                               ArchivedTravelRequests.objects.all())
+
+
+@async_read_view()
+async def admin_requests_detail(request, pk):
+    """Async version of views.admin_requests_detail()."""
+    return await detail_response(request, TravelRequests.objects.filter(pk=pk))
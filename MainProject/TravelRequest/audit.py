@@ -0,0 +1,124 @@
+"""
+Audit trail of travel request changes.
+
+Every change to a travel request is recorded as a TravelRequestEvent:
+    - creation, updates and deletion, from the model signals (see signals.py);
+    - status transitions, from transitions.apply_many().
+
+Mutating views run inside recording(), which attributes the events to the
+logged-in user and buffers them; the buffer is written with a single
+bulk_create just before the view's transaction commits, so auditing costs one
+INSERT per transaction and rolls back together with the change. Events recorded
+outside recording() (management commands, the shell) are inserted immediately.
+
+The detail endpoints embed a request's timeline with '?timeline=true'; it is
+read with one query on the (travel_request, created_at, id) index.
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import TravelRequestEvent
+
+_local = threading.local()
+
+
+class _Recording:
+    """Actor and pending events of the innermost recording() block."""
+
+    def __init__(self, actor, role, events):
+        self.actor = actor
+        self.role = role
+        self.events = events
+
+
+@contextmanager
+def recording(actor=None, role=''):
+    """
+    Run a block in a transaction, writing the events it records when it commits.
+
+    Nested blocks share the outermost block's buffer, which writes every event;
+    events recorded in a nested block that raises are discarded with it.
+
+    Args:
+        actor (User): The user making the changes.
+        role (str): 'employee', 'manager' or 'admin'.
+    """
+    outer = getattr(_local, 'current', None)
+    events = outer.events if outer is not None else []
+    mark = len(events)
+    _local.current = _Recording(actor if getattr(actor, 'is_authenticated', False) else None, role, events)
+    try:
+        with transaction.atomic():
+            try:
+                yield
+            except BaseException:
+                del events[mark:]
+                raise
+            # A failed query inside the block (e.g. a caught ConcurrentUpdateError)
+            # rolls the whole transaction back: there is nothing to record then.
+            if outer is None and events and not transaction.get_connection().needs_rollback:
+                TravelRequestEvent.objects.bulk_create(events)
+    finally:
+        _local.current = outer
+
+
+def recorded(role):
+    """
+    Decorate a view so that it runs in recording(), acting as request.user.
+
+    Replaces @transaction.atomic on views that change travel requests. Reads
+    (GET, HEAD, OPTIONS) record nothing and run outside any transaction, so they
+    never wait for the SQLite write lock (see the sqlite backend).
+
+    Args:
+        role (str): 'employee', 'manager' or 'admin'.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            with recording(request.user, role):
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(travel_request_id, action, from_status='', to_status='', note=None, changes=None):
+    """
+    Record one change to a travel request.
+
+    Args:
+        travel_request_id (int): The request that changed.
+        action (str): One of TravelRequestEvent.ACTION_CHOICES.
+        from_status (str): Status before the change.
+        to_status (str): Status after the change.
+        note (str): Manager or admin note given with the change.
+        changes (dict): Field name -> new value of an update.
+    """
+    current = getattr(_local, 'current', None)
+    event = TravelRequestEvent(
+        travel_request_id=travel_request_id, action=action, from_status=from_status or '',
+        to_status=to_status or '', note=note or None, changes=changes or {},
+        actor=current.actor if current else None, actor_role=current.role if current else '',
+        created_at=timezone.now())
+    if current is None:
+        event.save()
+    else:
+        current.events.append(event)
+
+
+def timeline_requested(params):
+    """Return whether the detail endpoints should embed the timeline ('?timeline=true')."""
+    return params.get('timeline', '').lower() in ('1', 'true', 'yes')
+
+
+def timeline(travel_request_id):
+    """Return the events of a travel request, oldest first (one index range scan)."""
+    return TravelRequestEvent.objects.filter(travel_request_id=travel_request_id).order_by('created_at', 'id')
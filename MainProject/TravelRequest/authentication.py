@@ -0,0 +1,158 @@
+"""
+Token authentication backed by Django's cache framework.
+
+DRF's TokenAuthentication looks the token up (joined with its user) on every
+request. CachedTokenAuthentication keeps the resolved token and user in the
+cache named by AUTH_TOKEN_CACHE_ALIAS (locmem by default) for
+AUTH_TOKEN_CACHE_TTL seconds. Entries are evicted by signals (see signals.py)
+when a token is deleted, e.g. by logout_view, or when its user is saved, which
+covers deactivation.
+
+Eviction only reaches the cache of the process that deleted the token or saved
+the user: with a process-local cache, the other worker processes keep accepting
+a deleted token, or the token of a deactivated user, until their entry expires.
+Queryset updates such as User.objects.filter(...).update(is_active=False) send
+no signals and are not evicted anywhere. The TTL therefore defaults to a short
+DEFAULT_TTL; deployments running several processes should point
+AUTH_TOKEN_CACHE_ALIAS at a shared cache (Redis, Memcached) before raising it,
+which check_token_cache() warns about.
+
+The async views (the event streams and async_views.py) authenticate with
+authenticate_request_async(), which uses the same cache entries through the
+cache's and the ORM's async APIs.
+"""
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from .caching import register_stats
+
+DEFAULT_TTL = 30
+
+token_cache_stats = register_stats('auth_token')
+
+
+def get_token_cache():
+    """Return the cache backend used for authentication tokens."""
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+
+
+def token_cache_ttl():
+    """Return how long (in seconds) a token stays cached."""
+    return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', DEFAULT_TTL)
+
+
+@checks.register(checks.Tags.security, checks.Tags.caches)
+def check_token_cache(app_configs, **kwargs):
+    """Warn when tokens are cached per process for longer than DEFAULT_TTL."""
+    if isinstance(get_token_cache(), LocMemCache) and token_cache_ttl() > DEFAULT_TTL:
+        return [checks.Warning(
+            f'AUTH_TOKEN_CACHE_TTL is {token_cache_ttl()} seconds but the token cache is local to each process, '
+            f'so other processes accept revoked tokens and deactivated users for that long.',
+            hint=f'Set AUTH_TOKEN_CACHE_ALIAS to a shared cache or AUTH_TOKEN_CACHE_TTL to at most {DEFAULT_TTL}.',
+            id='TravelRequest.W001',
+        )]
+    return []
+
+
+def token_cache_key(key):
+    """Return the cache key under which a token is stored."""
+    return f'authtoken:{key}'
+
+
+def evict_token(key):
+    """Remove a token from the cache."""
+    get_token_cache().delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that serves repeat lookups from the cache.
+
+    Only valid tokens of active users are cached, so invalid keys keep failing
+    against the database and cannot fill the cache.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(token_cache_key(key))
+        if token is not None:
+            token_cache_stats.hit()
+            return (token.user, token)
+        token_cache_stats.miss()
+        user, token = super().authenticate_credentials(key)
+        cache.set(token_cache_key(key), token, token_cache_ttl())
+        return (user, token)
+
+
+def get_request_token(request, query_param=None):
+    """
+    Return the token key sent with a request, or None.
+
+    Args:
+        request (HttpRequest): The incoming request.
+        query_param (str): Query parameter accepted as a fallback for clients that
+            cannot set headers, such as the browser EventSource API.
+    """
+    auth = get_authorization_header(request).split()
+    if len(auth) == 2 and auth[0].lower() == b'token':
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            return None
+    if query_param:
+        return request.GET.get(query_param) or None
+    return None
+
+
+async def authenticate_token_async(key):
+    """
+    Async counterpart of CachedTokenAuthentication.authenticate_credentials().
+
+    Returns:
+        tuple: (user, token).
+
+    Raises:
+        AuthenticationFailed: If the token does not exist or its user is inactive.
+    """
+    cache = get_token_cache()
+    token = await cache.aget(token_cache_key(key))
+    if token is not None:
+        token_cache_stats.hit()
+        return (token.user, token)
+    token_cache_stats.miss()
+    model = CachedTokenAuthentication().get_model()
+    try:
+        token = await model.objects.select_related('user').aget(key=key)
+    except model.DoesNotExist:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    await cache.aset(token_cache_key(key), token, token_cache_ttl())
+    return (token.user, token)
+
+
+async def authenticate_request_async(request, query_param=None):
+    """
+    Authenticate a plain Django request from an async view.
+
+    Args:
+        request (HttpRequest): The incoming request.
+        query_param (str): Optional query parameter accepted in place of the header.
+
+    Returns:
+        tuple: (user, token).
+
+    Raises:
+        NotAuthenticated: If no token was sent.
+        AuthenticationFailed: If the token is invalid or its user inactive.
+    """
+    key = get_request_token(request, query_param)
+    if key is None:
+        raise exceptions.NotAuthenticated()
+    return await authenticate_token_async(key)
@@ -0,0 +1,63 @@
+"""
+Hit/miss counters for the caches used by the Travel Request app.
+
+Each cache registers a CacheStats instance under a name; the collected
+snapshots are exposed on the admin cache statistics endpoint.
+"""
+
+import threading
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        """Record a cache hit."""
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        """Record a cache miss."""
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        """Set both counters back to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self):
+        """
+        Return the current counters.
+
+        Returns:
+            dict: 'hits', 'misses' and 'hit_rate' (0.0 when the cache was never used).
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+_registry = {}
+
+
+def register_stats(name):
+    """
+    Return the CacheStats registered under name, creating it if needed.
+
+    Args:
+        name (str): The cache name reported by all_stats().
+    """
+    return _registry.setdefault(name, CacheStats())
+
+
+def all_stats():
+    """Return a snapshot of every registered cache, keyed by name."""
+    return {name: stats.snapshot() for name, stats in _registry.items()}
@@ -0,0 +1,69 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the travel request endpoints.
+
+Detail endpoints derive their validators from the row's updated_at column; list
+endpoints from the version counter of their scope (see counters.list_version)
+combined with the query parameters. Both are looked up with a single cheap
+query before anything is fetched or serialized, so an unchanged poll is
+answered with 304 Not Modified.
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def row_etag(pk, updated_at, variant=None):
+    """
+    Return the ETag of one travel request at the given version.
+
+    Args:
+        variant (str): Distinguishes other representations of the same row (e.g. 'timeline').
+    """
+    suffix = f'-{variant}' if variant else ''
+    return f'W/"tr-{pk}-{int(updated_at.timestamp() * 1000000)}{suffix}"'
+
+
+def list_etag(scope, version, params):
+    """
+    Return the ETag of a list response.
+
+    Args:
+        scope (str): The list version scope (see counters.py).
+        version (int or str): The current version of that scope (see counters.list_version).
+        params (QueryDict): The request query parameters, which select the rows shown.
+    """
+    query = urlencode(sorted((key, value) for key, values in params.lists() for value in values))
+    digest = hashlib.sha1(query.encode()).hexdigest()[:16]
+    return f'W/"{scope}-{version}-{digest}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the client's cached copy is still current, else None.
+
+    The 304 carries the same ETag / Last-Modified headers as a 200 would (RFC 9110).
+
+    Args:
+        request: The incoming request (If-None-Match / If-Modified-Since headers).
+        etag (str): The current ETag of the resource.
+        last_modified (datetime): The last modification time of the resource, if known.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None and response.status_code == 304:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Add ETag and Last-Modified headers to a successful response."""
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
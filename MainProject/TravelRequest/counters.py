@@ -0,0 +1,237 @@
+"""
+Incrementally maintained travel request counters for the dashboards.
+
+Every travel request contributes one count per dimension ('status',
+'destination' and 'month' of creation) to two scopes: the global scope 'all'
+and the scope of its manager. When a request is created, changed or deleted,
+the difference between its old and new contributions is applied to the
+TravelRequestCounter rows with a single INSERT ... ON CONFLICT DO UPDATE SET
+count = count + delta statement, which also creates missing rows.
+
+Model saves and deletes are tracked by signals (see signals.py), using the
+values captured when the instance was loaded. QuerySet.update() bypasses
+signals, so code that changes requests in bulk must call apply_changes()
+itself. Either way the counters must be written in the same transaction as the
+change, which is why the mutating views are wrapped in transaction.atomic.
+
+Archived requests (see archive.py) keep contributing to the counters.
+
+The same table also holds a 'version' counter per list scope (global, manager
+and employee), bumped by every change to a request in that scope. The list
+endpoints derive their ETags from it (see conditional.py). A global 'profiles'
+counter, bumped when a profile is renamed or deleted, is added to the version
+of expanded lists only, which embed profile summaries (see expansion.py).
+"""
+
+import datetime
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+
+from .models import ArchivedTravelRequests, TravelRequests, TravelRequestCounter
+
+GLOBAL_SCOPE = 'all'
+DIMENSIONS = ('status', 'destination', 'month')
+VERSION = 'version'
+PROFILES = 'profiles'
+SNAPSHOT_FIELDS = ('manager_id', 'status', 'destination', 'created_at', 'employee_id')
+# Counter rows per upsert statement (four parameters each, within SQLite's 999 limit).
+UPSERT_BATCH_SIZE = 200
+
+
+def manager_scope(manager_id):
+    """Return the counter scope of one manager's requests."""
+    return f'manager:{manager_id}'
+
+
+def employee_scope(employee_id):
+    """Return the list version scope of one employee's requests."""
+    return f'employee:{employee_id}'
+
+
+def month_key(created_at):
+    """Return the 'YYYY-MM' (UTC) month a request was created in."""
+    return created_at.astimezone(datetime.timezone.utc).strftime('%Y-%m')
+
+
+def snapshot(instance):
+    """
+    Capture the values of a travel request that its counters depend on.
+
+    Returns:
+        tuple or None: Values of SNAPSHOT_FIELDS, or None if some of these fields
+        were not loaded.
+    """
+    values = instance.__dict__
+    if any(field not in values for field in SNAPSHOT_FIELDS):
+        return None
+    return tuple(values[field] for field in SNAPSHOT_FIELDS)
+
+
+def counter_keys(row):
+    """Return the (scope, dimension, key) counters a snapshot contributes to."""
+    manager_id, status, destination, created_at, _ = row
+    keys = {'status': status, 'destination': destination, 'month': month_key(created_at)}
+    return [(scope, dimension, keys[dimension])
+            for scope in (GLOBAL_SCOPE, manager_scope(manager_id))
+            for dimension in DIMENSIONS]
+
+
+def apply_changes(changes):
+    """
+    Apply the counter differences of many travel request changes.
+
+    Args:
+        changes (iterable): (before, after) snapshot pairs; before is None for a new
+            request and after is None for a deleted one.
+    """
+    deltas = Counter()
+    versioned = set()
+    for before, after in changes:
+        for row, sign in ((before, -1), (after, 1)):
+            if row is None:
+                continue
+            for key in counter_keys(row):
+                deltas[key] += sign
+            versioned.update((GLOBAL_SCOPE, manager_scope(row[0]), employee_scope(row[4])))
+    for scope in versioned:
+        deltas[(scope, VERSION, '')] += 1
+    _add([(*key, delta) for key, delta in deltas.items() if delta])
+
+
+def _add(deltas):
+    """Add (scope, dimension, key, delta) rows to their counters, with as few statements as the database allows."""
+    connection = connections[router.db_for_write(TravelRequestCounter)]
+    if not connection.features.supports_update_conflicts_with_target:
+        for scope, dimension, key, delta in deltas:
+            _increment(scope, dimension, key, delta)
+        return
+    for start in range(0, len(deltas), UPSERT_BATCH_SIZE):
+        _upsert(connection, deltas[start:start + UPSERT_BATCH_SIZE])
+
+
+def touch(rows):
+    """
+    Bump the list versions of the scopes of some requests without changing any count.
+
+    Used when requests leave the live lists without being deleted (see archive.py).
+
+    Args:
+        rows (iterable): Snapshots of the requests.
+    """
+    apply_changes((row, row) for row in rows)
+
+
+def touch_profiles():
+    """
+    Bump the profiles generation, which only expanded lists depend on.
+
+    Used when a profile embedded in list responses is renamed or deleted (see
+    expansion.py); plain lists keep their versions, ETags and cached responses.
+    """
+    _add([(GLOBAL_SCOPE, PROFILES, '', 1)])
+
+
+def _upsert(connection, deltas):
+    """Add (scope, dimension, key, delta) rows to their counters, creating missing ones, in one statement."""
+    quote = connection.ops.quote_name
+    table = quote(TravelRequestCounter._meta.db_table)
+    scope, dimension, key, count = (quote(name) for name in ('scope', 'dimension', 'key', 'count'))
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(deltas))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({scope}, {dimension}, {key}, {count}) VALUES {values} '
+            f'ON CONFLICT ({scope}, {dimension}, {key}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}',
+            [value for row in deltas for value in row])
+
+
+def _increment(scope, dimension, key, delta):
+    counters = TravelRequestCounter.objects.filter(scope=scope, dimension=dimension, key=key)
+    if counters.update(count=F('count') + delta):
+        return
+    _, created = TravelRequestCounter.objects.get_or_create(scope=scope, dimension=dimension, key=key,
+                                                            defaults={'count': delta})
+    if not created:
+        counters.update(count=F('count') + delta)
+
+
+def summary(scope):
+    """
+    Return the dashboard counts of one scope.
+
+    Args:
+        scope (str): GLOBAL_SCOPE or manager_scope(manager_id).
+
+    Returns:
+        dict: 'total' plus 'by_status', 'by_destination' and 'by_month' mappings.
+    """
+    result = {'total': 0, 'by_status': {}, 'by_destination': {}, 'by_month': {}}
+    rows = (TravelRequestCounter.objects.filter(scope=scope, dimension__in=DIMENSIONS, count__gt=0)
+            .order_by('dimension', 'key'))
+    for dimension, key, count in rows.values_list('dimension', 'key', 'count'):
+        result[f'by_{dimension}'][key] = count
+    result['total'] = sum(result['by_status'].values())
+    return result
+
+
+def _versions(scope, expanded):
+    """Return the query reading the version of a scope, and the profiles generation for expanded lists."""
+    versions = Q(scope=scope, dimension=VERSION)
+    if expanded:
+        versions |= Q(scope=GLOBAL_SCOPE, dimension=PROFILES)
+    return TravelRequestCounter.objects.filter(versions, key='').values_list('dimension', 'count')
+
+
+def _list_version(counts, expanded):
+    counts = dict(counts)
+    version = counts.get(VERSION, 0)
+    return f'{version}.{counts.get(PROFILES, 0)}' if expanded else version
+
+
+def list_version(scope, expanded=False):
+    """
+    Return the version of a list scope, bumped by every change to a request in it.
+
+    Args:
+        scope (str): GLOBAL_SCOPE, manager_scope(manager_id) or employee_scope(employee_id).
+        expanded (bool): Whether the list embeds profile summaries; the profiles
+            generation is then read with the version, in the same query.
+
+    Returns:
+        int or str: The current version (0 if nothing changed since versions were
+        introduced), as 'version.profiles' for expanded lists.
+    """
+    return _list_version(_versions(scope, expanded), expanded)
+
+
+async def alist_version(scope, expanded=False):
+    """Async version of list_version()."""
+    return _list_version([row async for row in _versions(scope, expanded)], expanded)
+
+
+def rebuild():
+    """
+    Recompute every dashboard counter from the TravelRequests and ArchivedTravelRequests tables.
+
+    List versions are kept and bumped, so no client can reuse an ETag issued
+    before the rebuild.
+    """
+    counts = Counter()
+    for model in (TravelRequests, ArchivedTravelRequests):
+        rows = (model.objects
+                .values_list('manager_id', 'status', 'destination',
+                             TruncMonth('created_at', tzinfo=datetime.timezone.utc))
+                .annotate(n=Count('id'))
+                .order_by())
+        for manager_id, status, destination, month, n in rows:
+            for key in counter_keys((manager_id, status, destination, month, None)):
+                counts[key] += n
+    with transaction.atomic():
+        TravelRequestCounter.objects.filter(dimension__in=DIMENSIONS).delete()
+        TravelRequestCounter.objects.filter(dimension=VERSION).update(count=F('count') + 1)
+        TravelRequestCounter.objects.bulk_create(
+            TravelRequestCounter(scope=scope, dimension=dimension, key=key, count=count)
+            for (scope, dimension, key), count in counts.items()
+        )
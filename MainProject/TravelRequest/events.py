@@ -0,0 +1,286 @@
+"""
+In-process publish/subscribe of travel request status changes.
+
+Status transitions (see transitions.py) publish an event once their
+transaction commits; the server-sent events endpoints (see views.py) subscribe
+to the channels of the connected user:
+    - 'employee:<id>' : changes to one employee's requests.
+    - 'manager:<id>'  : changes to requests assigned to one manager.
+    - 'all'           : every change (admins).
+
+Each subscriber has a bounded queue; when a slow client falls behind, its
+oldest undelivered events are dropped rather than letting memory grow.
+Delivery only reaches subscribers connected to the same process as the
+publisher, so run a single ASGI worker per host or put a shared broker in
+front of it when scaling out.
+
+Django 4.2 does not watch for the client disconnecting while it streams a
+response, so a stream would otherwise keep its subscription open forever.
+DisconnectMiddleware (installed in asgi.py) tells the streams when their
+client goes away, and every stream also ends after EVENTS_MAX_AGE seconds;
+clients then reconnect after the 'retry' delay and should refetch, since
+events published in between are not replayed.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .counters import GLOBAL_SCOPE, employee_scope, manager_scope
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_HEARTBEAT = 15
+DEFAULT_MAX_AGE = 600
+
+# ASGI scope key under which DisconnectMiddleware stores the ClientConnection.
+CONNECTION_SCOPE_KEY = 'travelrequest.connection'
+
+
+class Subscription:
+    """
+    A subscriber's bounded event queue, bound to the event loop that created it.
+
+    Must be created from a coroutine; events are handed over to that loop with
+    call_soon_threadsafe, so publishers may run in any thread.
+    """
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        """Queue an event, dropping the oldest one if the queue is full. Runs on self.loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        """Wait for the next event."""
+        return await self.queue.get()
+
+    def close(self):
+        """Stop receiving events."""
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Thread-safe registry of subscriptions by channel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, channels, maxsize=None):
+        """
+        Subscribe the running event loop to one or more channels.
+
+        Args:
+            channels (iterable of str): Channels to receive events from.
+            maxsize (int): Queue bound (default: the EVENTS_QUEUE_SIZE setting).
+
+        Returns:
+            Subscription: Call close() when the client goes away.
+        """
+        if maxsize is None:
+            maxsize = getattr(settings, 'EVENTS_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)
+        subscription = Subscription(self, channels, maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def publish(self, channels, event):
+        """
+        Deliver an event to every subscriber of any of the channels (at most once each).
+
+        Args:
+            channels (iterable of str): Channels the event belongs to.
+            event (dict): JSON-serializable event payload; an 'id' sequence number is added.
+        """
+        with self._lock:
+            subscribers = set()
+            for channel in channels:
+                subscribers.update(self._channels.get(channel, ()))
+            event = dict(event, id=next(self._sequence))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is closed; it is going away.
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._channels.values())) if self._channels else 0
+
+
+broker = EventBroker()
+
+
+def status_event(pk, employee_id, manager_id, status, note=None):
+    """Build the payload of a status change event."""
+    return {
+        'type': 'status_changed',
+        'request': pk,
+        'employee': employee_id,
+        'manager': manager_id,
+        'status': status,
+        'note': note,
+    }
+
+
+def publish_on_commit(events):
+    """
+    Publish status change events once the current transaction commits.
+
+    Args:
+        events (iterable of dict): Payloads built with status_event().
+    """
+    events = list(events)
+    if not events:
+        return
+
+    def publish():
+        for event in events:
+            channels = (GLOBAL_SCOPE, manager_scope(event['manager']), employee_scope(event['employee']))
+            broker.publish(channels, event)
+    transaction.on_commit(publish)
+
+
+def format_sse(event, name=None):
+    """Encode an event as a server-sent events message."""
+    lines = []
+    if name:
+        lines.append(f'event: {name}')
+    if 'id' in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f'data: {json.dumps(event)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class ClientConnection:
+    """
+    The receive side of one ASGI HTTP connection, watched for 'http.disconnect'.
+
+    The application reads the request body through receive(); once the body has
+    been read, wait() (and any further receive()) waits for the disconnect.
+    """
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._body_read = False
+        self._watcher = None
+
+    async def receive(self):
+        """The ASGI receive callable handed to the application."""
+        if self._body_read:
+            await self.wait()
+            return {'type': 'http.disconnect'}
+        message = await self._receive()
+        if message['type'] == 'http.request' and not message.get('more_body', False):
+            self._body_read = True
+        return message
+
+    async def _watch(self):
+        while (await self._receive())['type'] != 'http.disconnect':
+            pass
+
+    async def wait(self):
+        """Wait until the client disconnects."""
+        if self._watcher is None:
+            self._watcher = asyncio.ensure_future(self._watch())
+        await asyncio.shield(self._watcher)
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+
+class DisconnectMiddleware:
+    """
+    ASGI middleware giving HTTP requests a ClientConnection in their scope.
+
+    The event streams read it from request.scope[CONNECTION_SCOPE_KEY] to stop
+    as soon as their client disconnects. The connection is only watched once a
+    stream asks for it, so other requests are not affected.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        client = ClientConnection(receive)
+        try:
+            await self.app(dict(scope, **{CONNECTION_SCOPE_KEY: client}), client.receive, send)
+        finally:
+            client.close()
+
+
+async def stream(channels, heartbeat=None, connection=None, max_age=None):
+    """
+    Subscribe to channels and yield server-sent events until the client disconnects.
+
+    A comment line is sent every `heartbeat` seconds (default: the EVENTS_HEARTBEAT
+    setting) so proxies keep the connection open. When events had to be dropped
+    because the client was too slow, a 'dropped' event tells it to refetch.
+
+    Args:
+        channels (iterable of str): Channels to subscribe to.
+        heartbeat (float): Seconds between keepalive comments.
+        connection (ClientConnection): The client's connection, if DisconnectMiddleware
+            is installed; the stream ends when it disconnects.
+        max_age (float): Seconds after which the stream ends anyway (default: the
+            EVENTS_MAX_AGE setting); the client reconnects after the 'retry' delay.
+    """
+    if heartbeat is None:
+        heartbeat = getattr(settings, 'EVENTS_HEARTBEAT', DEFAULT_HEARTBEAT)
+    if max_age is None:
+        max_age = getattr(settings, 'EVENTS_MAX_AGE', DEFAULT_MAX_AGE)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    subscription = broker.subscribe(channels)
+    disconnected = asyncio.ensure_future(connection.wait()) if connection is not None else None
+    reported = 0
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or (disconnected is not None and disconnected.done()):
+                return
+            next_event = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({next_event, disconnected} - {None}, timeout=min(heartbeat, remaining),
+                               return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                if loop.time() < deadline and (disconnected is None or not disconnected.done()):
+                    yield ': keepalive\n\n'
+                continue
+            event = next_event.result()
+            if subscription.dropped != reported:
+                yield format_sse({'dropped': subscription.dropped - reported}, 'dropped')
+                reported = subscription.dropped
+            yield format_sse(event, event['type'])
+    finally:
+        if disconnected is not None:
+            disconnected.cancel()
+        subscription.close()
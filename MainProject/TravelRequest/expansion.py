@@ -0,0 +1,93 @@
+"""
+Opt-in embedding of related profiles in travel request responses.
+
+With '?expand=employee,manager,processed_by' (any subset, comma separated), the
+travel request list and detail endpoints replace those foreign key ids by
+compact summaries of the employee, manager and processing admin ('id',
+'first_name', 'last_name' and, except for admins, 'department'), so clients
+need no request per row to show names. The summaries are read by the same
+query as the requests: lists add the related columns to their values_list()
+query (see serializers.ExpandedValuesSerializer) and details use
+select_related().
+
+Expanded representations depend on profile rows as well as on the requests,
+so renaming or deleting a profile bumps a profiles generation that is part of
+the version of expanded lists only (see counters.list_version and signals.py),
+and detail ETags include a digest of the embedded summaries.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+
+from .serializers import (AdminSummarySerializer, AdminSummaryValuesSerializer, EmployeeSummarySerializer,
+                          EmployeeSummaryValuesSerializer, ExpandedValuesSerializer, ManagerSummarySerializer,
+                          ManagerSummaryValuesSerializer)
+
+# Expandable foreign key -> (summary serializer, its values serializer), in output order.
+EXPANSIONS = {
+    'employee': (EmployeeSummarySerializer, EmployeeSummaryValuesSerializer()),
+    'manager': (ManagerSummarySerializer, ManagerSummaryValuesSerializer()),
+    'processed_by': (AdminSummarySerializer, AdminSummaryValuesSerializer()),
+}
+
+
+class ExpandError(ValueError):
+    """Raised when the 'expand' query parameter names an unknown relation."""
+
+
+def parse_expand(params):
+    """
+    Validate the 'expand' query parameter.
+
+    Args:
+        params (QueryDict): The request query parameters.
+
+    Returns:
+        tuple: The relations to expand, in EXPANSIONS order (empty when not requested).
+    """
+    names = {name.strip() for name in params.get('expand', '').split(',') if name.strip()}
+    unknown = names.difference(EXPANSIONS)
+    if unknown:
+        raise ExpandError(f"expand must be a comma separated list of {', '.join(EXPANSIONS)}")
+    return tuple(name for name in EXPANSIONS if name in names)
+
+
+@lru_cache(maxsize=None)
+def expanded_reader(reader, expand):
+    """
+    Return the values serializer rendering rows of reader with the given relations expanded.
+
+    Args:
+        reader (ValuesSerializer): Serializer of the travel request rows.
+        expand (tuple): Relations returned by parse_expand().
+    """
+    if not expand:
+        return reader
+    return ExpandedValuesSerializer(reader, tuple((name, EXPANSIONS[name][1]) for name in expand))
+
+
+def embed(data, travel_request, expand):
+    """
+    Replace the expanded foreign key ids in a serialized travel request by summaries.
+
+    The related objects must have been fetched with select_related(*expand).
+    """
+    for name in expand:
+        related = getattr(travel_request, name)
+        data[name] = None if related is None else EXPANSIONS[name][0](related).data
+    return data
+
+
+def expanded_variant(variant, data, expand):
+    """
+    Return the ETag variant of an expanded travel request representation.
+
+    Args:
+        variant (str): The variant of the unexpanded representation, if any.
+        data (dict): The serialized travel request, with the summaries embedded.
+        expand (tuple): Relations returned by parse_expand().
+    """
+    summaries = json.dumps([data[name] for name in expand], sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha1(summaries.encode()).hexdigest()[:12]
+    return '-'.join(filter(None, (variant, 'expand', *expand, digest)))
@@ -0,0 +1,65 @@
+"""
+Streaming export of travel requests as NDJSON or CSV.
+
+Rows are read as value tuples with QuerySet.iterator(chunk_size=...), then
+rendered by TravelRequestValuesSerializer and encoded one at a time inside the
+response generator, so memory use stays flat no matter how many rows match;
+nothing is materialised before the first byte is sent. Live and archived
+requests are read side by side and merged in sort order.
+"""
+
+import csv
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .pagination import sorted_rows
+from .serializers import TravelRequestSerializer, TravelRequestValuesSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_serialized(querysets, sort_by='id', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the serialized representation of each row of the querysets, in sort_by order.
+
+    Args:
+        querysets (list of QuerySet): Live and archived travel requests to export.
+        sort_by (str): Field to sort by, optionally prefixed with '-'.
+    """
+    reader = TravelRequestValuesSerializer()
+    to_representation = reader.bind()
+    for row in sorted_rows(querysets, reader.columns, sort_by, chunk_size):
+        yield to_representation(row)
+
+
+def stream_ndjson(querysets, sort_by='id', chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one JSON document per line for each travel request."""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for data in iter_serialized(querysets, sort_by, chunk_size):
+        yield encoder.encode(data) + '\n'
+
+
+def stream_csv(querysets, sort_by='id', chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a CSV header row followed by one row per travel request."""
+    fields = list(TravelRequestSerializer().fields)
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for data in iter_serialized(querysets, sort_by, chunk_size):
+        yield writer.writerow(['' if data[field] is None else data[field] for field in fields])
+
+
+EXPORT_STREAMS = {
+    'ndjson': stream_ndjson,
+    'csv': stream_csv,
+}
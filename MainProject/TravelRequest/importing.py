@@ -0,0 +1,238 @@
+"""
+Bulk import of Employees and Managers from JSON Lines or CSV.
+
+Rows are read lazily from the input and processed in chunks. For every chunk:
+    1. Each row is validated with EmployeeSerializer / ManagerSerializer. Related
+       managers are loaded once per chunk and email uniqueness is checked with a
+       single query, instead of one query per row.
+    2. Passwords of the Django Users to create are hashed, in a process pool
+       when workers are requested.
+    3. Profiles and Users are inserted with bulk_create inside one transaction.
+       If another import took one of the emails since step 1, the chunk is
+       inserted again row by row and the rows that clash are reported as errors.
+
+Used by the admin import endpoints and the import_profiles management command.
+"""
+
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.validators import UniqueValidator
+
+from .profiles import profile_cache
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 500
+FORMATS = ('jsonl', 'csv')
+
+
+class PreloadedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves pks from a dict loaded once per chunk."""
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.objects:
+            self.fail('does_not_exist', pk_value=data)
+        return self.objects[pk]
+
+
+def iter_rows(lines, fmt):
+    """
+    Parse input lines into (row number, data) pairs.
+
+    Args:
+        lines (iterable of str): The input, one line at a time.
+        fmt (str): 'jsonl' or 'csv'. Empty CSV cells are treated as missing values.
+
+    Yields:
+        tuple: (row number, dict of field values, or an error message string).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}
+        return
+    for row_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, f'Invalid JSON: {exc}'
+            continue
+        yield row_number, data if isinstance(data, dict) else 'Expected a JSON object'
+
+
+def hash_passwords(passwords, executor=None):
+    """Hash passwords, in parallel when a process pool executor is given."""
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    return list(executor.map(make_password, passwords, chunksize=16))
+
+
+def _init_hash_worker():
+    """Make sure Django is configured in pool workers started with 'spawn'."""
+    import django
+    django.setup()
+
+
+class ProfileImporter:
+    """
+    Import Employees or Managers, creating a Django User for each new email.
+
+    Args:
+        serializer_class: EmployeeSerializer or ManagerSerializer.
+        chunk_size (int): Number of rows validated and inserted together.
+        executor: Optional executor used to hash passwords.
+    """
+
+    def __init__(self, serializer_class, chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.report = {'created': 0, 'users_created': 0, 'errors': []}
+
+    def run(self, rows):
+        """
+        Import every row and return the report.
+
+        Returns:
+            dict: 'created' profiles, 'users_created' and a list of per-row 'errors'.
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        # bulk_create does not send post_save, so clear the cached profile lookups here.
+        profile_cache.clear()
+        return self.report
+
+    def error(self, row_number, errors):
+        self.report['errors'].append({'row': row_number, 'errors': errors})
+
+    def make_serializer(self, data, related):
+        serializer = self.serializer_class(data=data)
+        for name, objects in related.items():
+            field = serializer.fields[name]
+            serializer.fields[name] = PreloadedPrimaryKeyRelatedField(
+                objects, queryset=field.queryset, allow_null=field.allow_null, required=field.required)
+        email_field = serializer.fields['email']
+        email_field.validators = [v for v in email_field.validators if not isinstance(v, UniqueValidator)]
+        return serializer
+
+    def preload_related(self, chunk):
+        """Load every related object referenced by the chunk with one query per relation."""
+        related = {}
+        for name, field in self.serializer_class().fields.items():
+            if not isinstance(field, PrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for _, data in chunk:
+                try:
+                    pks.add(int(data[name]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            related[name] = field.queryset.in_bulk(pks) if pks else {}
+        return related
+
+    def import_chunk(self, chunk):
+        rows = [(row_number, data) for row_number, data in chunk if isinstance(data, dict)]
+        for row_number, data in chunk:
+            if not isinstance(data, dict):
+                self.error(row_number, {'non_field_errors': [data]})
+
+        related = self.preload_related(rows)
+        emails = {data.get('email') for _, data in rows if isinstance(data.get('email'), str)}
+        taken = set(self.model.objects.filter(email__in=emails).values_list('email', flat=True))
+        duplicate = f'{self.model._meta.verbose_name} with this email already exists.'
+
+        valid = []
+        for row_number, data in rows:
+            serializer = self.make_serializer(data, related)
+            if not serializer.is_valid():
+                self.error(row_number, serializer.errors)
+                continue
+            email = serializer.validated_data['email']
+            if email in taken:
+                self.error(row_number, {'email': [duplicate]})
+                continue
+            taken.add(email)
+            valid.append((row_number, serializer.validated_data))
+        if not valid:
+            return
+
+        existing_users = set(User.objects.filter(username__in=[vd['email'] for _, vd in valid])
+                             .values_list('username', flat=True))
+        new_users = [vd for _, vd in valid if vd['email'] not in existing_users]
+        hashes = dict(zip((vd['email'] for vd in new_users),
+                          hash_passwords([vd['password'] for vd in new_users], self.executor)))
+
+        try:
+            self.insert([vd for _, vd in valid], hashes)
+        except IntegrityError:
+            for row_number, vd in valid:
+                try:
+                    self.insert([vd], hashes)
+                except IntegrityError:
+                    self.error(row_number, {'email': [duplicate]})
+
+    def insert(self, validated, hashes):
+        """
+        Insert profiles, and the Users of those whose email is in hashes, in one transaction.
+
+        Args:
+            validated (list of dict): Validated profile data.
+            hashes (dict): Password hash of each email that needs a new User.
+        """
+        users = [User(username=vd['email'], email=vd['email'], password=hashes[vd['email']])
+                 for vd in validated if vd['email'] in hashes]
+        with transaction.atomic():
+            self.model.objects.bulk_create([self.model(**vd) for vd in validated])
+            User.objects.bulk_create(users)
+        self.report['created'] += len(validated)
+        self.report['users_created'] += len(users)
+
+
+def import_profiles(lines, fmt, serializer_class, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    Import Employees or Managers from JSON Lines or CSV input.
+
+    Args:
+        lines (iterable of str): The input, one line at a time.
+        fmt (str): 'jsonl' or 'csv'.
+        serializer_class: EmployeeSerializer or ManagerSerializer.
+        chunk_size (int): Number of rows processed per batch.
+        workers (int): Password hashing processes; 0 hashes in the calling process,
+            None uses the IMPORT_HASH_WORKERS setting (default: one per CPU).
+
+    Returns:
+        dict: 'created' profiles, 'users_created' and a list of per-row 'errors'.
+    """
+    if workers is None:
+        workers = getattr(settings, 'IMPORT_HASH_WORKERS', None)
+    rows = iter_rows(lines, fmt)
+    if workers == 0:
+        return ProfileImporter(serializer_class, chunk_size).run(rows)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as executor:
+        return ProfileImporter(serializer_class, chunk_size, executor).run(rows)
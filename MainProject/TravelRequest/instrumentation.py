@@ -0,0 +1,256 @@
+"""
+Per-endpoint request latency and SQL statistics.
+
+RequestStatsMiddleware times every request and attributes the SQL it runs to
+the matched URL pattern (e.g. 'api/myadmin/requests/<int:pk>/') and method.
+Queries are counted by a database execute wrapper installed on every
+connection when it is opened (see signals.py); the wrapper adds to the
+statistics of the request being handled, found through a context variable, so
+queries run by async views in the sync_to_async thread pool are counted too.
+
+Aggregates are kept in-process under a lock taken once per request and are
+rendered in the Prometheus text format by the admin metrics endpoint:
+    - travelrequest_request_duration_seconds: latency histogram
+    - travelrequest_request_queries: histogram of SQL queries per request
+    - travelrequest_db_queries_total / travelrequest_db_query_seconds_total
+    - travelrequest_query_budget_exceeded_total
+    - travelrequest_cache_hits_total / travelrequest_cache_misses_total (see caching.py)
+
+A request running more queries than the QUERY_BUDGET setting is logged as a
+warning, which catches N+1 regressions. Latency is measured until the view
+returns its response, so the body of streaming responses (export, event
+streams) and the queries run while sending it are not included.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .caching import all_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+DEFAULT_QUERY_BUDGET = 30
+UNMATCHED_ROUTE = '<unmatched>'
+
+_current = contextvars.ContextVar('travelrequest_request_usage', default=None)
+
+
+class QueryUsage:
+    """SQL queries run while handling one request."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's QueryUsage."""
+    usage = _current.get()
+    if usage is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        usage.seconds += time.perf_counter() - started
+        usage.count += 1
+
+
+def install_query_counter(connection):
+    """Add count_queries to a database connection's execute wrappers, once."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds, as exposed by Prometheus."""
+
+    __slots__ = ('bounds', 'buckets', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * len(bounds)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, count of observations <= bound) pairs, ending with '+Inf'."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.bounds, self.buckets):
+            total += count
+            pairs.append((bound, total))
+        pairs.append(('+Inf', self.count))
+        return pairs
+
+
+class RouteStats:
+    """Aggregated statistics of one (route, method) pair."""
+
+    __slots__ = ('latency', 'queries', 'query_seconds', 'over_budget')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.query_seconds = 0.0
+        self.over_budget = 0
+
+
+class RequestStats:
+    """Thread-safe registry of RouteStats by (route, method)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, method, seconds, usage, over_budget):
+        with self._lock:
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = RouteStats()
+            stats.latency.observe(seconds)
+            stats.queries.observe(usage.count)
+            stats.query_seconds += usage.seconds
+            stats.over_budget += over_budget
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def snapshot(self):
+        """
+        Return a copy of the statistics of every route.
+
+        Returns:
+            dict: (route, method) -> dict with 'latency' and 'queries' as lists of
+            cumulative (bound, count) pairs, plus their sums and counts, 'query_seconds'
+            and 'over_budget'.
+        """
+        with self._lock:
+            return {
+                key: {
+                    'latency': stats.latency.cumulative(),
+                    'latency_sum': stats.latency.sum,
+                    'queries': stats.queries.cumulative(),
+                    'queries_sum': stats.queries.sum,
+                    'count': stats.latency.count,
+                    'query_seconds': stats.query_seconds,
+                    'over_budget': stats.over_budget,
+                }
+                for key, stats in self._routes.items()
+            }
+
+
+request_stats = RequestStats()
+
+
+def query_budget():
+    """Return the QUERY_BUDGET setting (None disables the check)."""
+    return getattr(settings, 'QUERY_BUDGET', DEFAULT_QUERY_BUDGET)
+
+
+class RequestStatsMiddleware:
+    """Record the latency and SQL usage of every request under its URL pattern."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        usage = QueryUsage()
+        token = _current.set(usage)
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            _current.reset(token)
+            self.finish(request, time.perf_counter() - started, usage)
+
+    async def __acall__(self, request):
+        usage = QueryUsage()
+        token = _current.set(usage)
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
+            self.finish(request, time.perf_counter() - started, usage)
+
+    def finish(self, request, seconds, usage):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else UNMATCHED_ROUTE
+        budget = query_budget()
+        over_budget = budget is not None and usage.count > budget
+        if over_budget:
+            logger.warning('%s %s ran %d SQL queries (budget %d, %.1f ms of SQL) for route %s',
+                           request.method, request.path, usage.count, budget, usage.seconds * 1000, route)
+        request_stats.record(route, request.method, seconds, usage, over_budget)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, labels, pairs, total, count):
+    for bound, cumulative in pairs:
+        yield f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}'
+    yield f'{name}_sum{_labels(**labels)} {total}'
+    yield f'{name}_count{_labels(**labels)} {count}'
+
+
+def render_prometheus():
+    """Return every statistic in the Prometheus text exposition format (version 0.0.4)."""
+    routes = sorted(request_stats.snapshot().items())
+    lines = [
+        '# HELP travelrequest_request_duration_seconds Time until the view returned its response.',
+        '# TYPE travelrequest_request_duration_seconds histogram',
+    ]
+    for (route, method), stats in routes:
+        lines.extend(_histogram_lines('travelrequest_request_duration_seconds', {'route': route, 'method': method},
+                                      stats['latency'], stats['latency_sum'], stats['count']))
+    lines += [
+        '# HELP travelrequest_request_queries SQL queries run per request.',
+        '# TYPE travelrequest_request_queries histogram',
+    ]
+    for (route, method), stats in routes:
+        lines.extend(_histogram_lines('travelrequest_request_queries', {'route': route, 'method': method},
+                                      stats['queries'], stats['queries_sum'], stats['count']))
+    for name, key, help_text in (
+            ('travelrequest_db_queries_total', 'queries_sum', 'SQL queries run by requests.'),
+            ('travelrequest_db_query_seconds_total', 'query_seconds', 'Time spent running SQL queries.'),
+            ('travelrequest_query_budget_exceeded_total', 'over_budget',
+             'Requests that ran more SQL queries than QUERY_BUDGET.')):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines.extend(f"{name}{_labels(route=route, method=method)} {stats[key]}" for (route, method), stats in routes)
+    caches = sorted(all_stats().items())
+    for name, key in (('travelrequest_cache_hits_total', 'hits'), ('travelrequest_cache_misses_total', 'misses')):
+        lines += [f'# HELP {name} Cache {key} (see caching.py).', f'# TYPE {name} counter']
+        lines.extend(f'{name}{_labels(cache=cache)} {stats[key]}' for cache, stats in caches)
+    return '\n'.join(lines) + '\n'
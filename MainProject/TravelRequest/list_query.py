@@ -0,0 +1,134 @@
+"""
+Validated filters and sorts of the travel request list endpoints.
+
+compile_list_query() turns the query parameters of the manager and admin lists
+(and of the admin export) into a ListQuery, parsing every value once; invalid
+values raise ListQueryError, answered with 400 instead of failing in the
+database.
+
+Only sorts that an index serves in both list scopes are accepted, with id as
+the tiebreaker (SQLite indexes end with the rowid), so no list ever sorts the
+whole table:
+
+    sort_by       manager list (manager_id = ?)      admin list and archive
+    created_at    travelreq_mgr_created_idx          travelreq_created_idx
+    from_date     travelreq_mgr_from_date_idx        travelreq_from_date_idx
+    to_date       travelreq_mgr_to_date_idx          travelreq_to_date_idx
+    id            manager_id foreign key index       primary key
+
+Anything else, e.g. 'destination' or a join like 'employee__last_name', is
+rejected. A query filtered by 'id' matches at most one row, so its sort is
+dropped.
+"""
+
+from django.utils.dateparse import parse_date
+
+from .models import TravelRequests
+from .pagination import sorted_query
+from .search import filter_by_employee_name
+
+SORT_FIELDS = ('created_at', 'from_date', 'to_date', 'id')
+STATUSES = tuple(value for value, _ in TravelRequests.STATUS_CHOICES)
+
+
+class ListQueryError(ValueError):
+    """Raised when a list filter or sort supplied by the client is invalid."""
+
+
+class ListQuery:
+    """
+    The filters and sort of a travel request list.
+
+    Attributes:
+        id (int): Only the request with this id.
+        name (str): Only requests of employees whose first or last name contains it.
+        from_date (date): Only requests starting on or after this date.
+        to_date (date): Only requests ending on or before this date.
+        status (str): Only requests with this status.
+        sort_by (str): One of SORT_FIELDS, optionally prefixed with '-', or None for no order.
+    """
+
+    def __init__(self, id=None, name=None, from_date=None, to_date=None, status=None, sort_by=None):
+        self.id = id
+        self.name = name
+        self.from_date = from_date
+        self.to_date = to_date
+        self.status = status
+        self.sort_by = None if id is not None else sort_by
+
+    def filter(self, qs):
+        """
+        Apply the filters to a TravelRequests or ArchivedTravelRequests queryset.
+
+        Returns:
+            QuerySet: The filtered queryset (unordered).
+        """
+        if self.id is not None:
+            qs = qs.filter(id=self.id)
+        if self.name:
+            qs = filter_by_employee_name(qs, self.name)
+        if self.from_date:
+            qs = qs.filter(from_date__gte=self.from_date)
+        if self.to_date:
+            qs = qs.filter(to_date__lte=self.to_date)
+        if self.status:
+            qs = qs.filter(status=self.status)
+        return qs
+
+    def order(self, qs):
+        """Order a filtered queryset by (sort field, id), as the paginated lists are."""
+        return sorted_query(qs, self.sort_by) if self.sort_by else qs
+
+
+def _parse_id(raw):
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ListQueryError('id must be an integer')
+    if value < 1:
+        raise ListQueryError('id must be positive')
+    return value
+
+
+def _parse_date(name, raw):
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ListQueryError(f'{name} must be a valid date (YYYY-MM-DD)')
+    return value
+
+
+def _parse_status(raw):
+    if raw not in STATUSES:
+        raise ListQueryError(f"status must be one of {', '.join(STATUSES)}")
+    return raw
+
+
+def _parse_sort(raw):
+    if raw.lstrip('-') not in SORT_FIELDS or raw.startswith('--'):
+        raise ListQueryError(f"sort_by must be one of {', '.join(SORT_FIELDS)} (prefixed with '-' for "
+                             f"descending order)")
+    return raw
+
+
+def compile_list_query(params):
+    """
+    Parse and validate the list filters and sort of a request.
+
+    Args:
+        params (QueryDict): The request query parameters ('id', 'name', 'from_date',
+            'to_date', 'status', 'sort_by'); empty values are ignored.
+
+    Returns:
+        ListQuery: The validated query.
+    """
+    return ListQuery(
+        id=_parse_id(params['id']) if params.get('id') else None,
+        name=params.get('name') or None,
+        from_date=_parse_date('from_date', params['from_date']) if params.get('from_date') else None,
+        to_date=_parse_date('to_date', params['to_date']) if params.get('to_date') else None,
+        status=_parse_status(params['status']) if params.get('status') else None,
+        sort_by=_parse_sort(params['sort_by']) if params.get('sort_by') else None,
+    )
@@ -0,0 +1,38 @@
+"""
+Management command to move finished travel requests to the archive table.
+
+Closed and rejected requests unchanged for --days days are moved in batches of
+--batch-size, one transaction per batch; an interrupted run can simply be
+started again (see TravelRequest/archive.py).
+
+Usage:
+    python manage.py archive_travel_requests --days 365
+    python manage.py archive_travel_requests --days 90 --batch-size 2000 --max-batches 10
+"""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from TravelRequest.archive import DEFAULT_BATCH_SIZE, archive
+
+
+class Command(BaseCommand):
+    help = 'Move closed and rejected travel requests older than --days days to the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, required=True,
+                            help='Archive requests whose last change is at least this many days old.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches (default: until nothing is left).')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days must not be negative and --batch-size must be positive')
+        total = 0
+        for number, archived in enumerate(islice(archive(options['days'], options['batch_size']),
+                                                 options['max_batches']), 1):
+            total += archived
+            self.stdout.write(f'Batch {number}: archived {archived} requests')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} travel requests'))
@@ -0,0 +1,153 @@
+"""
+Management command to fill the database with synthetic managers, employees,
+admins and travel requests for benchmarking.
+
+The data follows realistic shapes rather than uniform noise:
+    - team sizes are skewed (a few managers have large teams);
+    - trips start between a year ago and six months ahead, mostly last a few days,
+      and go to a handful of popular destinations far more often than to the rest;
+    - the status depends on the trip date: past trips are mostly closed or
+      approved, upcoming ones mostly pending.
+
+Rows are added with bulk_create in batches, inside one transaction, and with a
+seeded random generator, so the same arguments always produce the same data.
+Running the command again adds to the existing data (employees are assigned to
+every manager and requests to every employee, old and new), which lets the
+benchmarks grow one database through several scales. bulk_create bypasses the
+model signals, so the dashboard counters are rebuilt at the end and no audit
+events are recorded.
+
+Usage:
+    python manage.py generate_benchmark_data --requests 100000
+    python manage.py generate_benchmark_data --managers 500 --employees 10000 --requests 1000000 --seed 7
+"""
+
+import datetime
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from TravelRequest import counters
+from TravelRequest.models import Admins, Employees, Managers, TravelRequests
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Priya', 'Wei', 'Fatima', 'Mohammed', 'Olga', 'Kenji', 'Aisha', 'Carlos', 'Ingrid', 'Tariq']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+              'Nakamura', 'Okafor', 'Kowalski', 'Lindqvist', 'Haddad', 'Chen', 'Patel', 'Novak', 'Silva']
+DEPARTMENTS = ['Sales', 'Engineering', 'Marketing', 'Finance', 'Operations', 'Legal', 'Support', 'Research']
+OFFICES = ['Berlin', 'London', 'New York', 'Bangalore', 'Singapore']
+# Ordered by popularity: destination n is picked with a weight of 1 / (n + 1).
+DESTINATIONS = ['London', 'New York', 'Paris', 'Berlin', 'Singapore', 'Tokyo', 'San Francisco', 'Amsterdam',
+                'Dubai', 'Madrid', 'Toronto', 'Sydney', 'Mumbai', 'Sao Paulo', 'Chicago', 'Zurich', 'Stockholm',
+                'Lagos', 'Nairobi', 'Seoul', 'Mexico City', 'Warsaw', 'Lisbon', 'Lima', 'Reykjavik']
+DESTINATION_WEIGHTS = [1 / (n + 1) for n in range(len(DESTINATIONS))]
+TRAVEL_MODES = (['Flight', 'Train', 'Car', 'Bus'], [60, 25, 10, 5])
+PURPOSES = ['Customer visit', 'Conference', 'Team offsite', 'Training', 'Trade fair', 'Recruiting', 'Audit']
+# Status weights of trips that have started and of upcoming trips.
+PAST_STATUSES = (['closed', 'approved', 'rejected', 'pending', 'FI_required'], [50, 25, 15, 5, 5])
+UPCOMING_STATUSES = (['pending', 'approved', 'rejected', 'FI_required'], [45, 30, 15, 10])
+DEFAULT_BATCH_SIZE = 5000
+
+
+def batched(items, size):
+    """Yield lists of at most size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def person(rng, n, kind):
+    """Return the name and a unique email of the n-th generated person of a kind."""
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    return {'first_name': first_name, 'last_name': last_name, 'password': 'x',
+            'email': f'{first_name}.{last_name}.{kind}{n}@example.com'.lower()}
+
+
+def travel_request(rng, employee_id, manager_id, admin_ids, today):
+    """Build one unsaved TravelRequests with realistic dates, destination and status."""
+    from_date = today + datetime.timedelta(days=rng.randint(-365, 180))
+    to_date = from_date + datetime.timedelta(days=min(int(rng.expovariate(1 / 3)), 30))
+    statuses = PAST_STATUSES if from_date <= today else UPCOMING_STATUSES
+    status = rng.choices(*statuses)[0]
+    processed = status in ('approved', 'rejected', 'closed')
+    return TravelRequests(
+        employee_id=employee_id, manager_id=manager_id, from_date=from_date, to_date=to_date,
+        location=rng.choice(OFFICES), destination=rng.choices(DESTINATIONS, DESTINATION_WEIGHTS)[0],
+        travel_mode=rng.choices(*TRAVEL_MODES)[0], lodging_required=to_date > from_date,
+        purpose_of_travel=rng.choice(PURPOSES), status=status, is_closed=status == 'closed',
+        manager_note=rng.choice([None, 'Approved within budget', 'Please book economy']) if processed else None,
+        admin_note='Booked' if status == 'closed' else None,
+        further_information='Agenda attached' if status == 'pending' and rng.random() < 0.1 else None,
+        processed_by_id=rng.choice(admin_ids) if status == 'closed' else None,
+        resubmission_count=1 if status == 'FI_required' and rng.random() < 0.2 else 0)
+
+
+class Command(BaseCommand):
+    help = 'Add synthetic managers, employees, admins and travel requests for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--managers', type=int, default=50)
+        parser.add_argument('--employees', type=int, default=1000)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if min(options['managers'], options['employees'], options['admins'], options['requests']) < 0:
+            raise CommandError('Counts must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        rng = random.Random(options['seed'])
+        size = options['batch_size']
+        with transaction.atomic():
+            # Emails are numbered after the existing rows, so reruns never collide.
+            offset = Managers.objects.count()
+            Managers.objects.bulk_create(
+                (Managers(**person(rng, offset + n, 'manager'), department=rng.choice(DEPARTMENTS))
+                 for n in range(options['managers'])), batch_size=size)
+            offset = Admins.objects.count()
+            Admins.objects.bulk_create(
+                (Admins(**person(rng, offset + n, 'admin')) for n in range(options['admins'])), batch_size=size)
+
+            manager_ids = list(Managers.objects.values_list('id', flat=True))
+            if options['employees'] and not manager_ids:
+                raise CommandError('Employees need at least one manager')
+            # Pareto team weights: most teams are small, a few are large.
+            team_weights = [rng.paretovariate(1.5) for _ in manager_ids]
+            offset = Employees.objects.count()
+            for batch in batched(range(options['employees']), size):
+                managers = rng.choices(manager_ids, team_weights, k=len(batch))
+                Employees.objects.bulk_create(
+                    Employees(**person(rng, offset + n, 'employee'), manager_id=manager_id,
+                              department=rng.choice(DEPARTMENTS))
+                    for n, manager_id in zip(batch, managers))
+
+            employees = list(Employees.objects.filter(manager__isnull=False).values_list('id', 'manager_id'))
+            admin_ids = list(Admins.objects.values_list('id', flat=True))
+            if options['requests'] and not (employees and admin_ids):
+                raise CommandError('Travel requests need at least one employee with a manager and one admin')
+            # Some employees travel much more than others.
+            travel_weights = [rng.paretovariate(2) for _ in employees]
+            today = timezone.localdate()
+            created = 0
+            for batch in batched(range(options['requests']), size):
+                TravelRequests.objects.bulk_create(
+                    travel_request(rng, employee_id, manager_id, admin_ids, today)
+                    for employee_id, manager_id in rng.choices(employees, travel_weights, k=len(batch)))
+                created += len(batch)
+                self.stdout.write(f'Created {created} of {options["requests"]} travel requests')
+            counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {options["managers"]} managers, {options["employees"]} employees, {options["admins"]} admins '
+            f'and {options["requests"]} travel requests'))
@@ -0,0 +1,48 @@
+"""
+Management command to bulk import employees or managers.
+
+Usage:
+    python manage.py import_profiles employees people.csv --format csv
+    python manage.py import_profiles managers managers.jsonl --chunk-size 1000 --workers 8
+"""
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from TravelRequest.importing import DEFAULT_CHUNK_SIZE, FORMATS, import_profiles
+from TravelRequest.serializers import EmployeeSerializer, ManagerSerializer
+
+SERIALIZERS = {
+    'employees': EmployeeSerializer,
+    'managers': ManagerSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = 'Import employees or managers (and their Django Users) from a JSON Lines or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=SERIALIZERS)
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: guessed from the file extension, else jsonl).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (0 = hash in this process).')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            report = import_profiles(stream, fmt, SERIALIZERS[options['kind']],
+                                     chunk_size=options['chunk_size'], workers=options['workers'])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(json.dumps(report, indent=2))
+        style = self.style.WARNING if report['errors'] else self.style.SUCCESS
+        self.stderr.write(style(f"Created {report['created']} {options['kind']}, "
+                                f"{report['users_created']} users, {len(report['errors'])} errors"))
@@ -0,0 +1,22 @@
+"""
+Management command to recompute the dashboard counters from the live and archived travel requests.
+
+Counters are maintained incrementally; run this after changing travel requests
+outside the application (raw SQL, fixtures) to bring them back in line.
+
+Usage:
+    python manage.py rebuild_dashboard_counters
+"""
+
+from django.core.management.base import BaseCommand
+
+from TravelRequest import counters
+from TravelRequest.models import TravelRequestCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from the live and archived travel requests.'
+
+    def handle(self, *args, **options):
+        counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {TravelRequestCounter.objects.count()} counters'))
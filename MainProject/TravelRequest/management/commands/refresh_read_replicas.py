@@ -0,0 +1,41 @@
+"""
+Management command to refresh the local SQLite read replicas from the primary database.
+
+Without a replicating database server, the replicas configured with
+TRAVELREQUEST_READ_REPLICAS are plain SQLite files. This copies the primary
+into each of them with SQLite's online backup API, which does not block writers
+on the primary. Run it periodically (e.g. every minute from cron); replicas lag
+behind by up to that period, which TravelRequest/routing.py hides from the
+users who wrote.
+
+Usage:
+    TRAVELREQUEST_READ_REPLICAS=replica.sqlite3 python manage.py refresh_read_replicas
+"""
+
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from TravelRequest.routing import replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into every local read replica.'
+
+    def handle(self, *args, **options):
+        if not replicas():
+            raise CommandError('No read replicas are configured (TRAVELREQUEST_READ_REPLICAS)')
+        if any(connections[alias].vendor != 'sqlite' for alias in ('default', *replicas())):
+            raise CommandError('Only SQLite replicas can be refreshed by copying')
+        source = sqlite3.connect(connections['default'].settings_dict['NAME'])
+        try:
+            for alias in replicas():
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'Refreshed {alias}'))
+        finally:
+            source.close()
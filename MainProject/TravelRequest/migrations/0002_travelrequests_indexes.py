@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['manager', 'status', 'created_at'], name='travelreq_mgr_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['manager', 'created_at'], name='travelreq_mgr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['employee', 'created_at'], name='travelreq_emp_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['status', 'created_at'], name='travelreq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['created_at', 'id'], name='travelreq_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['from_date'], name='travelreq_from_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['to_date'], name='travelreq_to_date_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""
+Full-text trigram index over employee names (SQLite only).
+
+Creates an external-content FTS5 table over TravelRequest_employees using the
+trigram tokenizer, so substring searches on first/last name are served by the
+index instead of a leading-wildcard LIKE. Triggers keep it in sync with every
+insert, update and delete, including bulk operations that bypass model signals.
+On other database backends, or SQLite builds older than 3.34 (no trigram
+tokenizer), this migration does nothing and search.py falls back to icontains.
+"""
+
+import sqlite3
+
+from django.db import migrations
+
+FTS_TABLE = 'TravelRequest_employees_name_fts'
+CONTENT_TABLE = 'TravelRequest_employees'
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE "{FTS_TABLE}" USING fts5(
+        first_name, last_name, content='{CONTENT_TABLE}', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_ai" AFTER INSERT ON "{CONTENT_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"(rowid, first_name, last_name) VALUES (new.id, new.first_name, new.last_name);
+    END""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_ad" AFTER DELETE ON "{CONTENT_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, first_name, last_name)
+            VALUES ('delete', old.id, old.first_name, old.last_name);
+    END""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_au" AFTER UPDATE OF first_name, last_name ON "{CONTENT_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, first_name, last_name)
+            VALUES ('delete', old.id, old.first_name, old.last_name);
+        INSERT INTO "{FTS_TABLE}"(rowid, first_name, last_name) VALUES (new.id, new.first_name, new.last_name);
+    END""",
+    f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""",
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+
+def supports_trigram_index(connection):
+    return connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def create_name_index(apps, schema_editor):
+    if not supports_trigram_index(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0002_travelrequests_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_index, drop_name_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-17 01:47
+
+import datetime
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_counters(apps, schema_editor):
+    """Compute the dashboard counters of the existing travel requests."""
+    TravelRequests = apps.get_model('TravelRequest', 'TravelRequests')
+    TravelRequestCounter = apps.get_model('TravelRequest', 'TravelRequestCounter')
+    counts = Counter()
+    rows = (TravelRequests.objects
+            .values_list('manager_id', 'status', 'destination',
+                         TruncMonth('created_at', tzinfo=datetime.timezone.utc))
+            .annotate(n=Count('id'))
+            .order_by())
+    for manager_id, status, destination, month, n in rows:
+        for scope in ('all', f'manager:{manager_id}'):
+            counts[(scope, 'status', status)] += n
+            counts[(scope, 'destination', destination)] += n
+            counts[(scope, 'month', month.strftime('%Y-%m'))] += n
+    TravelRequestCounter.objects.bulk_create(
+        TravelRequestCounter(scope=scope, dimension=dimension, key=key, count=count)
+        for (scope, dimension, key), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0003_employee_name_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravelRequestCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32)),
+                ('dimension', models.CharField(max_length=16)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='travelrequestcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'dimension', 'key'), name='travelreq_counter_unique'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 02:05
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_created_at(apps, schema_editor):
+    """Existing requests were last modified, as far as we know, when they were created."""
+    TravelRequests = apps.get_model('TravelRequest', 'TravelRequests')
+    TravelRequests.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0004_travelrequestcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travelrequests',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0005_travelrequests_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travelrequests',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
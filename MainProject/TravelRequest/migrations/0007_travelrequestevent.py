@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 02:07
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('TravelRequest', '0006_travelrequests_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravelRequestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('approve', 'Approved'), ('reject', 'Rejected'), ('fi_request', 'Further Information Requested'), ('resubmit', 'Resubmitted'), ('close', 'Closed')], max_length=20)),
+                ('from_status', models.CharField(blank=True, default='', max_length=20)),
+                ('to_status', models.CharField(blank=True, default='', max_length=20)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('changes', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor_role', models.CharField(blank=True, default='', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('travel_request', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='TravelRequest.travelrequests')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='travelrequestevent',
+            index=models.Index(fields=['travel_request', 'created_at', 'id'], name='travelreq_event_timeline_idx'),
+        ),
+    ]
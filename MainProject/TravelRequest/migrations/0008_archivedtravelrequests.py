@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-17 02:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0007_travelrequestevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='travelrequestevent',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('approve', 'Approved'), ('reject', 'Rejected'), ('fi_request', 'Further Information Requested'), ('resubmit', 'Resubmitted'), ('close', 'Closed'), ('archived', 'Archived')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTravelRequests',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('from_date', models.DateField(blank=True, null=True)),
+                ('to_date', models.DateField(blank=True, null=True)),
+                ('location', models.CharField(max_length=100)),
+                ('destination', models.CharField(max_length=100)),
+                ('travel_mode', models.CharField(max_length=50)),
+                ('lodging_required', models.BooleanField(default=False)),
+                ('purpose_of_travel', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('FI_required', 'Further Information Required'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('closed', 'Closed')], max_length=20)),
+                ('manager_note', models.TextField(blank=True, null=True)),
+                ('admin_note', models.TextField(blank=True, null=True)),
+                ('further_information', models.TextField(blank=True, null=True)),
+                ('resubmission_count', models.IntegerField(default=0)),
+                ('is_closed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('employee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='TravelRequest.employees')),
+                ('manager', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='TravelRequest.managers')),
+                ('processed_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='TravelRequest.admins')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedtravelrequests',
+            index=models.Index(fields=['from_date'], name='travelreq_arch_from_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtravelrequests',
+            index=models.Index(fields=['to_date'], name='travelreq_arch_to_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtravelrequests',
+            index=models.Index(fields=['created_at', 'id'], name='travelreq_arch_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TravelRequest', '0008_archivedtravelrequests'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['manager', 'from_date'], name='travelreq_mgr_from_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelrequests',
+            index=models.Index(fields=['manager', 'to_date'], name='travelreq_mgr_to_date_idx'),
+        ),
+    ]
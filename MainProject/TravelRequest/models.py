@@ -4,11 +4,19 @@ This file defines four models:
     2. Employees: Represents an employee, who is linked to a manager.
     3. Admins: Represents an admin user.
     4. TravelRequests: Represents a travel request submitted by an employee, processed by a manager/admin.
+    5. TravelRequestCounter: Denormalized travel request counts backing the dashboards.
+    6. TravelRequestEvent: Append-only history of changes to travel requests.
+    7. ArchivedTravelRequests: Closed and rejected travel requests moved out of TravelRequests.
 """
 
 
 
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, models, router, transaction
+from django.db.models import F
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
 
 class Managers(models.Model):
     """
@@ -84,6 +92,10 @@ class Admins(models.Model):
         return f"Admin: {self.first_name} {self.last_name}"
 
 
+class ConcurrentUpdateError(DatabaseError):
+    """Raised when saving a travel request that was changed or deleted since it was read."""
+
+
 class TravelRequests(models.Model):
     """
     Model representing a travel request.
@@ -107,6 +119,13 @@ class TravelRequests(models.Model):
         resubmission_count (IntegerField): Number of times the request was resubmitted.
         is_closed (BooleanField): Indicates if the request is closed.
         created_at (DateTimeField): Timestamp of when the travel request was created.
+        updated_at (DateTimeField): Timestamp of the last change; the row version used for ETags.
+        version (PositiveIntegerField): Incremented by every save; used for optimistic concurrency control.
+
+    Saving an existing request (see save_versioned()) only updates the row if its
+    version still equals the instance's version, and raises ConcurrentUpdateError
+    otherwise, so two users editing the same request cannot silently overwrite
+    each other.
     """
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -132,7 +151,206 @@ class TravelRequests(models.Model):
     resubmission_count = models.IntegerField(default=0)
     is_closed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        # Composite indexes matching the filter/order shapes used by the list views.
+        indexes = [
+            models.Index(fields=['manager', 'status', 'created_at'], name='travelreq_mgr_status_idx'),
+            models.Index(fields=['manager', 'created_at'], name='travelreq_mgr_created_idx'),
+            models.Index(fields=['manager', 'from_date'], name='travelreq_mgr_from_date_idx'),
+            models.Index(fields=['manager', 'to_date'], name='travelreq_mgr_to_date_idx'),
+            models.Index(fields=['employee', 'created_at'], name='travelreq_emp_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='travelreq_status_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='travelreq_created_idx'),
+            models.Index(fields=['from_date'], name='travelreq_from_date_idx'),
+            models.Index(fields=['to_date'], name='travelreq_to_date_idx'),
+        ]
 
     def __str__(self):
         """Return a string representation of the Travel Request."""
         return f"Travel Request #{self.id} by {self.employee} to {self.destination}"
+
+    def save(self, *args, **kwargs):
+        """Insert a new request; existing requests are saved with save_versioned()."""
+        if self._state.adding or kwargs.get('force_insert'):
+            super().save(*args, **kwargs)
+            return
+        self.save_versioned(using=kwargs.get('using'), update_fields=kwargs.get('update_fields'))
+
+    def save_versioned(self, using=None, update_fields=None):
+        """
+        Save an existing request with 'UPDATE ... WHERE id = pk AND version = n', setting version to n + 1.
+
+        Sends pre_save and post_save like Model.save(), so the dashboard counters
+        and the audit trail follow the change.
+
+        Args:
+            using (str): Database alias (defaults to the router's choice).
+            update_fields (iterable): Names of the fields to save (defaults to every field).
+
+        Raises:
+            ConcurrentUpdateError: If the request was changed or deleted since it was read.
+        """
+        using = using or router.db_for_write(type(self), instance=self)
+        if update_fields is not None:
+            update_fields = frozenset(update_fields)
+        fields = [field for field in self._meta.concrete_fields
+                  if not field.primary_key and field.name != 'version'
+                  and (update_fields is None or field.name in update_fields or field.attname in update_fields)]
+        pre_save.send(sender=type(self), instance=self, raw=False, using=using, update_fields=update_fields)
+        values = {field.attname: field.pre_save(self, False) for field in fields}
+        expected = self.version
+        with transaction.mark_for_rollback_on_error(using):
+            updated = (type(self)._base_manager.using(using).filter(pk=self.pk, version=expected)
+                       .update(**values, version=F('version') + 1))
+            if not updated:
+                raise ConcurrentUpdateError(f'Travel request {self.pk} is no longer at version {expected}')
+            self.version = expected + 1
+            self._state.db = using
+            post_save.send(sender=type(self), instance=self, created=False, update_fields=update_fields,
+                           raw=False, using=using)
+
+
+class TravelRequestCounter(models.Model):
+    """
+    Model holding a denormalized count of travel requests for the dashboards.
+
+    Counters are maintained incrementally in the same transaction as every change
+    to TravelRequests (see counters.py), so dashboard reads never aggregate the
+    requests table.
+
+    Fields:
+        scope (CharField): 'all' for global counts or 'manager:<id>' for one manager's requests.
+        dimension (CharField): What is counted: 'status', 'destination' or 'month' (of created_at, UTC).
+        key (CharField): The status, destination or 'YYYY-MM' month being counted.
+        count (IntegerField): Number of travel requests in this scope with this key.
+    """
+    scope = models.CharField(max_length=32)
+    dimension = models.CharField(max_length=16)
+    key = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'dimension', 'key'], name='travelreq_counter_unique'),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the counter."""
+        return f"{self.scope} {self.dimension}={self.key}: {self.count}"
+
+
+class TravelRequestEvent(models.Model):
+    """
+    Model recording one change to a travel request (see audit.py).
+
+    Events are only ever inserted: saving an existing event or deleting one
+    raises an error. The travel request is referenced without a database
+    constraint so that the history outlives deleted requests.
+
+    Fields:
+        ACTION_CHOICES (list): The kinds of change recorded.
+        travel_request (ForeignKey): The request that changed.
+        action (CharField): 'created', 'updated', 'deleted', 'archived' or a status transition
+            (see transitions.py).
+        from_status (CharField): The request's status before the change (empty when created).
+        to_status (CharField): The request's status after the change (empty when deleted).
+        note (TextField): The manager or admin note given with the change, if any.
+        changes (JSONField): Field name -> new value of an update.
+        actor (ForeignKey): The user who made the change (null for changes made outside a view).
+        actor_role (CharField): Whether the actor acted as 'employee', 'manager' or 'admin'.
+        created_at (DateTimeField): When the change was made.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+        ('approve', 'Approved'),
+        ('reject', 'Rejected'),
+        ('fi_request', 'Further Information Requested'),
+        ('resubmit', 'Resubmitted'),
+        ('close', 'Closed'),
+        ('archived', 'Archived'),
+    ]
+    travel_request = models.ForeignKey(TravelRequests, on_delete=models.DO_NOTHING, db_constraint=False,
+                                       related_name='events')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    from_status = models.CharField(max_length=20, blank=True, default='')
+    to_status = models.CharField(max_length=20, blank=True, default='')
+    note = models.TextField(blank=True, null=True)
+    changes = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='+')
+    actor_role = models.CharField(max_length=20, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Timelines are read per request in chronological order.
+        indexes = [
+            models.Index(fields=['travel_request', 'created_at', 'id'], name='travelreq_event_timeline_idx'),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the event."""
+        return f"Travel Request #{self.travel_request_id} {self.action} at {self.created_at}"
+
+    def save(self, *args, **kwargs):
+        """Insert the event; events are never updated."""
+        if not self._state.adding:
+            raise DatabaseError('Travel request events are append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Refuse to delete an event."""
+        raise DatabaseError('Travel request events are append-only')
+
+
+class ArchivedTravelRequests(models.Model):
+    """
+    Model holding finished travel requests moved out of TravelRequests (see archive.py).
+
+    Rows have the same columns as TravelRequests and keep their id, so the
+    values serializers and audit timelines of TravelRequests apply to them
+    unchanged. Related rows are referenced without database constraints, and
+    deleting an employee or manager leaves their archived requests in place.
+
+    Fields:
+        (every field of TravelRequests, copied as is)
+        archived_at (DateTimeField): When the request was archived.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    employee = models.ForeignKey(Employees, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    manager = models.ForeignKey(Managers, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    from_date = models.DateField(null=True, blank=True)
+    to_date = models.DateField(null=True, blank=True)
+    location = models.CharField(max_length=100)
+    destination = models.CharField(max_length=100)
+    travel_mode = models.CharField(max_length=50)
+    lodging_required = models.BooleanField(default=False)
+    purpose_of_travel = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=TravelRequests.STATUS_CHOICES)
+    manager_note = models.TextField(blank=True, null=True)
+    admin_note = models.TextField(blank=True, null=True)
+    further_information = models.TextField(blank=True, null=True)
+    processed_by = models.ForeignKey(Admins, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                                     blank=True, related_name='+')
+    resubmission_count = models.IntegerField(default=0)
+    is_closed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # The archive is only read by date range (admin list and export).
+        indexes = [
+            models.Index(fields=['from_date'], name='travelreq_arch_from_date_idx'),
+            models.Index(fields=['to_date'], name='travelreq_arch_to_date_idx'),
+            models.Index(fields=['created_at', 'id'], name='travelreq_arch_created_idx'),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the archived Travel Request."""
+        return f"Archived Travel Request #{self.id} to {self.destination}"
@@ -0,0 +1,289 @@
+"""
+Keyset (cursor) pagination for the travel request list endpoints.
+
+Instead of OFFSET/LIMIT, each page is fetched with a WHERE clause that starts
+right after the last row of the previous page, ordered by the sort field with
+the primary key as a tiebreaker. Every page therefore costs the same, no
+matter how deep the client has paged.
+
+The cursor handed back to clients is an opaque, URL-safe base64 string that
+encodes the sort it was produced for together with the sort value and id of
+the last row on the page.
+
+Results can also span several querysets with the same columns and disjoint ids
+(live and archived requests): each one is queried in the same order and the
+rows are merged in Python, so every query still follows its own index.
+"""
+
+import base64
+import binascii
+import datetime
+import heapq
+import json
+from itertools import chain, islice
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+DEFAULT_SORT = 'created_at'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+CURSOR_KEY = '_cursor_key'
+
+
+class CursorError(ValueError):
+    """Raised when a cursor or page size supplied by the client is invalid."""
+
+
+def is_paginated(params):
+    """
+    Return True if the client opted in to cursor pagination.
+
+    Args:
+        params (QueryDict): The request query parameters.
+
+    Returns:
+        bool: True when either 'cursor' or 'page_size' is present.
+    """
+    return 'cursor' in params or 'page_size' in params
+
+
+def parse_page_size(value):
+    """
+    Validate the 'page_size' query parameter.
+
+    Args:
+        value (str or None): The raw query parameter.
+
+    Returns:
+        int: The page size, capped at MAX_PAGE_SIZE.
+    """
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise CursorError('page_size must be an integer')
+    if size < 1:
+        raise CursorError('page_size must be positive')
+    return min(size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(sort_by, value, pk):
+    """
+    Build an opaque cursor pointing just after the given row.
+
+    Args:
+        sort_by (str): The sort expression the page was produced with.
+        value: The sort value of the last row on the page.
+        pk (int): The primary key of the last row on the page.
+
+    Returns:
+        str: URL-safe base64 encoded cursor.
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort_by, 'v': value, 'id': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor sent by the client.
+        sort_by (str): The sort expression of the current request.
+
+    Returns:
+        tuple: (raw sort value, primary key).
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, pk = payload['v'], int(payload['id'])
+        cursor_sort = payload['s']
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise CursorError('Invalid cursor')
+    if value is not None and not isinstance(value, (str, int)):
+        raise CursorError('Invalid cursor')
+    if cursor_sort != sort_by:
+        raise CursorError('Cursor does not match sort_by')
+    return value, pk
+
+
+def _after(value, pk, descending):
+    """
+    Build the keyset predicate selecting rows that come after (value, pk).
+
+    NULL sort values are placed first in ascending order and last in
+    descending order, so the predicate has to account for them explicitly.
+    """
+    if descending:
+        if value is None:
+            return Q(**{CURSOR_KEY + '__isnull': True, 'id__lt': pk})
+        return (Q(**{CURSOR_KEY + '__lt': value})
+                | Q(**{CURSOR_KEY: value, 'id__lt': pk})
+                | Q(**{CURSOR_KEY + '__isnull': True}))
+    if value is None:
+        return Q(**{CURSOR_KEY + '__isnull': True, 'id__gt': pk}) | Q(**{CURSOR_KEY + '__isnull': False})
+    return Q(**{CURSOR_KEY + '__gt': value}) | Q(**{CURSOR_KEY: value, 'id__gt': pk})
+
+
+def sorted_query(qs, sort_by):
+    """
+    Annotate a queryset with its sort value (as CURSOR_KEY) and order it by (sort value, id).
+
+    NULL sort values come first in ascending order and last in descending order,
+    whatever the database's default.
+
+    Args:
+        qs (QuerySet): The queryset to order.
+        sort_by (str): Field to sort by, optionally prefixed with '-'.
+    """
+    qs = qs.annotate(**{CURSOR_KEY: F(sort_by.lstrip('-'))})
+    if sort_by.startswith('-'):
+        return qs.order_by(F(CURSOR_KEY).desc(nulls_last=True), '-id')
+    return qs.order_by(F(CURSOR_KEY).asc(nulls_first=True), 'id')
+
+
+def _row_key(row):
+    """Return the ordering key of a row ending with (sort value, id), as in sorted_query()."""
+    value, pk = row[-2:]
+    return (value is not None, value, pk)
+
+
+def merge_sorted(row_lists, sort_by):
+    """
+    Merge rows read from several sorted_query() querysets into one ordered stream.
+
+    Args:
+        row_lists (iterable): Iterables of rows ending with (sort value, id).
+        sort_by (str): The sort the rows were read with.
+    """
+    return heapq.merge(*row_lists, key=_row_key, reverse=sort_by.startswith('-'))
+
+
+def page_query(qs, reader, sort_by=None, cursor=None, page_size=None):
+    """
+    Build the query fetching one keyset-paginated page (plus one row to detect the next page).
+
+    Args:
+        qs (QuerySet): The filtered queryset to paginate.
+        reader (ValuesSerializer): Serializer used to read and render the page rows.
+        sort_by (str): Field to sort by, optionally prefixed with '-' (defaults to created_at).
+        cursor (str): Cursor returned with the previous page, if any.
+        page_size (str): Requested number of rows per page.
+
+    Returns:
+        tuple: (values_list queryset, normalized sort_by, page size), to be passed
+        on to build_page() once the rows are fetched.
+    """
+    sort_by = sort_by or DEFAULT_SORT
+    size = parse_page_size(page_size)
+    descending = sort_by.startswith('-')
+    qs = sorted_query(qs, sort_by)
+
+    if cursor:
+        raw, pk = decode_cursor(cursor, sort_by)
+        output_field = qs.query.annotations[CURSOR_KEY].output_field
+        try:
+            value = None if raw is None else output_field.to_python(raw)
+        except (ValidationError, TypeError, ValueError):
+            raise CursorError('Invalid cursor')
+        qs = qs.filter(_after(value, pk, descending))
+
+    return qs.values_list(*reader.columns, CURSOR_KEY, 'id')[:size + 1], sort_by, size
+
+
+def build_page(rows, reader, sort_by, size):
+    """Serialize the rows fetched with page_query() and compute the next cursor."""
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(sort_by, rows[-1][-2], rows[-1][-1])
+    to_representation = reader.bind()
+    return [to_representation(row) for row in rows], next_cursor
+
+
+def paginate(qs, reader, sort_by=None, cursor=None, page_size=None):
+    """
+    Return one keyset-paginated page of a queryset.
+
+    Takes the same arguments as page_query().
+
+    Returns:
+        tuple: (list of serialized rows, next cursor or None).
+    """
+    query, sort_by, size = page_query(qs, reader, sort_by, cursor, page_size)
+    return build_page(list(query), reader, sort_by, size)
+
+
+async def apaginate(qs, reader, sort_by=None, cursor=None, page_size=None):
+    """Async version of paginate(), fetching the page with the async ORM."""
+    query, sort_by, size = page_query(qs, reader, sort_by, cursor, page_size)
+    return build_page([row async for row in query], reader, sort_by, size)
+
+
+def paginate_many(querysets, reader, sort_by=None, cursor=None, page_size=None):
+    """
+    Return one keyset-paginated page spanning several querysets.
+
+    Each queryset is queried for a full page after the cursor and the rows are
+    merged; cursors are interchangeable with those of paginate().
+
+    Args:
+        querysets (list of QuerySet): Querysets with the same columns and disjoint ids.
+
+    Returns:
+        tuple: (list of serialized rows, next cursor or None).
+    """
+    if len(querysets) == 1:
+        return paginate(querysets[0], reader, sort_by, cursor, page_size)
+    queries = [page_query(qs, reader, sort_by, cursor, page_size) for qs in querysets]
+    _, sort_by, size = queries[0]
+    rows = list(islice(merge_sorted([query for query, _, _ in queries], sort_by), size + 1))
+    return build_page(rows, reader, sort_by, size)
+
+
+async def apaginate_many(querysets, reader, sort_by=None, cursor=None, page_size=None):
+    """Async version of paginate_many()."""
+    if len(querysets) == 1:
+        return await apaginate(querysets[0], reader, sort_by, cursor, page_size)
+    queries = [page_query(qs, reader, sort_by, cursor, page_size) for qs in querysets]
+    _, sort_by, size = queries[0]
+    row_lists = [[row async for row in query] for query, _, _ in queries]
+    rows = list(islice(merge_sorted(row_lists, sort_by), size + 1))
+    return build_page(rows, reader, sort_by, size)
+
+
+def _sorted_values(querysets, columns, sort_by):
+    """Return the values_list() querysets read by sorted_rows()."""
+    if not sort_by:
+        return [qs.values_list(*columns) for qs in querysets]
+    return [sorted_query(qs, sort_by).values_list(*columns, CURSOR_KEY, 'id') for qs in querysets]
+
+
+def sorted_rows(querysets, columns, sort_by=None, chunk_size=2000):
+    """
+    Stream the rows of several querysets, merged in sort_by order when given.
+
+    Args:
+        querysets (list of QuerySet): Querysets with the same columns and disjoint ids.
+        columns (tuple): Columns to read; every row is followed by (sort value, id)
+            when sort_by is given.
+        sort_by (str): Field to sort by, optionally prefixed with '-'.
+        chunk_size (int): Rows fetched from the database at a time, per queryset.
+
+    Returns:
+        iterator: The rows, read lazily.
+    """
+    row_lists = [query.iterator(chunk_size=chunk_size) for query in _sorted_values(querysets, columns, sort_by)]
+    return merge_sorted(row_lists, sort_by) if sort_by else chain.from_iterable(row_lists)
+
+
+async def asorted_rows(querysets, columns, sort_by=None):
+    """Async version of sorted_rows(), returning a list."""
+    row_lists = [[row async for row in query] for query in _sorted_values(querysets, columns, sort_by)]
+    return list(merge_sorted(row_lists, sort_by) if sort_by else chain.from_iterable(row_lists))
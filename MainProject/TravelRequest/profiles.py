@@ -0,0 +1,132 @@
+"""
+Resolution of an authenticated Django User to their Employee, Manager or Admin profile.
+
+Profiles are matched to users by email. Looking them up costs a query on every
+API call, so the results are kept in a small per-process LRU cache with a TTL,
+keyed by user id. The cache is cleared by signals (see signals.py) whenever an
+Employees, Managers or Admins row is saved or deleted in this process, and
+again once that transaction commits; other processes pick the change up once
+their entries expire.
+
+Lookups that miss read the generation of the cache before querying and store
+their result only if no clear() happened in between, so a result read before
+a change cannot be cached after the clear that followed the change.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Employees, Managers, Admins
+
+PROFILE_MODELS = {
+    'employee': Employees,
+    'manager': Managers,
+    'admin': Admins,
+}
+
+
+class ProfileCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Each entry maps a user id to the email it was resolved for and a dict of
+    role -> profile id (or None when the user has no profile for that role).
+    The generation counts the calls to clear().
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, email, role):
+        """
+        Return (hit, profile_id) for the given user and role.
+
+        An entry is ignored if it expired or was resolved for a different email.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return False, None
+            expires, cached_email, roles = entry
+            if expires < time.monotonic() or cached_email != email:
+                del self._entries[user_id]
+                return False, None
+            if role not in roles:
+                return False, None
+            self._entries.move_to_end(user_id)
+            return True, roles[role]
+
+    def set(self, user_id, email, role, profile_id, generation):
+        """
+        Store the profile id resolved for a user and role.
+
+        Args:
+            generation (int): The generation read before looking the profile up; the
+                result is dropped if the cache was cleared since.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] != email:
+                entry = (time.monotonic() + self.ttl, email, {})
+                self._entries[user_id] = entry
+            entry[2][role] = profile_id
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+profile_cache = ProfileCache(
+    maxsize=getattr(settings, 'PROFILE_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'PROFILE_CACHE_TTL', 300),
+)
+
+
+def resolve_profile(user, role):
+    """
+    Return the id of the profile matching the user's email for the given role.
+
+    Args:
+        user (User): The authenticated Django User.
+        role (str): One of 'employee', 'manager' or 'admin'.
+
+    Returns:
+        int or None: The profile's primary key, or None if the user has no such profile.
+    """
+    generation = profile_cache.generation
+    hit, profile_id = profile_cache.get(user.pk, user.email, role)
+    if hit:
+        return profile_id
+    model = PROFILE_MODELS[role]
+    profile_id = model.objects.filter(email=user.email).values_list('pk', flat=True).first()
+    profile_cache.set(user.pk, user.email, role, profile_id, generation)
+    return profile_id
+
+
+async def aresolve_profile(user, role):
+    """Async version of resolve_profile(), sharing its cache."""
+    generation = profile_cache.generation
+    hit, profile_id = profile_cache.get(user.pk, user.email, role)
+    if hit:
+        return profile_id
+    model = PROFILE_MODELS[role]
+    profile_id = await model.objects.filter(email=user.email).values_list('pk', flat=True).afirst()
+    profile_cache.set(user.pk, user.email, role, profile_id, generation)
+    return profile_id
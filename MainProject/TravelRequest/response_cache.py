@@ -0,0 +1,96 @@
+"""
+Shared cache of rendered list responses.
+
+The manager and admin list endpoints are called with the same filters and
+sorts over and over by many users. Their rendered JSON bodies are kept in the
+cache named by RESPONSE_CACHE_ALIAS (shared between processes when that cache
+is), under the list's ETag (see conditional.list_etag), which combines:
+    - the caller's scope: 'manager:<id>' or 'all' for admins;
+    - the version of that scope: a generation counter bumped in the same
+      transaction as every change to a request of the scope (post_save /
+      post_delete signals, transitions and archiving, see counters.py), plus
+      the profiles generation for lists embedding profiles with '?expand=';
+    - the normalized query parameters.
+A change to a request therefore makes the cached lists of its manager and of
+the admins unreachable at once, and leaves every other manager's lists cached;
+stale entries simply expire after RESPONSE_CACHE_TTL seconds. Looking a list up
+costs the single version query that the ETag needs anyway.
+
+Bodies larger than RESPONSE_CACHE_MAX_BYTES (large unpaginated lists) are not
+cached. Hits and misses are reported as 'list_response' by the cache statistics
+endpoint.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .caching import register_stats
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_BYTES = 1024 * 1024
+CONTENT_TYPE = 'application/json'
+
+response_cache_stats = register_stats('list_response')
+
+
+def get_response_cache():
+    """Return the cache backend used for list responses."""
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def response_cache_key(etag):
+    return f'listresponse:{etag}'
+
+
+def _ttl():
+    return getattr(settings, 'RESPONSE_CACHE_TTL', DEFAULT_TTL)
+
+
+def _cacheable(body):
+    return len(body) <= getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def cached_response(etag):
+    """
+    Return the cached list response with this ETag, or None.
+
+    Returns:
+        HttpResponse: The cached JSON body (without validators), or None on a miss.
+    """
+    body = get_response_cache().get(response_cache_key(etag))
+    if body is None:
+        response_cache_stats.miss()
+        return None
+    response_cache_stats.hit()
+    return HttpResponse(body, content_type=CONTENT_TYPE)
+
+
+def store_response(etag, data):
+    """
+    Render list data as JSON, cache the body under etag and return it as a response.
+
+    Renders exactly what DRF's JSONRenderer would.
+    """
+    body = JSONRenderer().render(data)
+    if _cacheable(body):
+        get_response_cache().set(response_cache_key(etag), body, _ttl())
+    return HttpResponse(body, content_type=CONTENT_TYPE)
+
+
+async def acached_response(etag):
+    """Async version of cached_response()."""
+    body = await get_response_cache().aget(response_cache_key(etag))
+    if body is None:
+        response_cache_stats.miss()
+        return None
+    response_cache_stats.hit()
+    return HttpResponse(body, content_type=CONTENT_TYPE)
+
+
+async def astore_response(etag, response):
+    """Cache the body of a rendered JSON list response (see async_views.json_response)."""
+    if _cacheable(response.content):
+        await get_response_cache().aset(response_cache_key(etag), response.content, _ttl())
+    return response
@@ -0,0 +1,179 @@
+"""
+Read replica routing.
+
+The DATABASE_REPLICAS setting lists the aliases of read-only copies of the
+'default' database (settings.py builds them from TRAVELREQUEST_READ_REPLICAS).
+ReplicaRouter sends the reads of a request to one of them, picked at random per
+request, when:
+    - the request uses a safe method (GET, HEAD, OPTIONS): every query of a
+      request that may write reads the primary, so checks and writes never see
+      different databases;
+    - the authenticated user has not written anything within the last
+      REPLICA_STICKY_SECONDS (read-your-writes): after e.g. approving a request,
+      the manager's lists and dashboard are read from the primary until the
+      replicas have caught up. Stickiness is kept in the default cache, which
+      must be shared between processes (e.g. Redis) when running several;
+    - the model is not an authentication model (users, tokens, sessions), so a
+      token created by login_view can be used at once.
+Everything else, and every write, uses the primary. The routing state of a
+request lives in a context variable set by ReplicaRoutingMiddleware, so it
+follows the queries of async views into the sync_to_async thread pool and the
+rows of streamed exports.
+
+Replicas are only read, never migrated. Without a replicating database server,
+local SQLite copies refreshed with the refresh_read_replicas command stand in for
+them; in tests they mirror 'default' (TEST MIRROR).
+"""
+
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_STICKY_SECONDS = 10
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Apps whose models are always read from the primary.
+PRIMARY_APPS = ('auth', 'authtoken', 'sessions')
+
+_current = contextvars.ContextVar('travelrequest_replica_routing', default=None)
+
+
+def replicas():
+    """Return the aliases of the configured read replicas."""
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+def sticky_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+
+def stick_to_primary(user):
+    """Read from the primary on behalf of a user for the next REPLICA_STICKY_SECONDS."""
+    cache.set(sticky_key(user.pk), True, sticky_seconds())
+
+
+async def astick_to_primary(user):
+    """Async version of stick_to_primary()."""
+    await cache.aset(sticky_key(user.pk), True, sticky_seconds())
+
+
+def is_sticky(user):
+    """Return whether a user wrote recently and must read from the primary."""
+    return cache.get(sticky_key(user.pk), False)
+
+
+class RequestRouting:
+    """Routing state of one request."""
+
+    __slots__ = ('request', 'replica', 'checked', 'wrote')
+
+    def __init__(self, request):
+        self.request = request
+        # The replica to read from; None when the request must use the primary.
+        self.replica = random.choice(replicas()) if request.method in SAFE_METHODS and replicas() else None
+        self.checked = False
+        self.wrote = False
+
+    def read_database(self):
+        """Return the replica this request reads from, or None for the primary."""
+        if self.replica is not None and not self.checked:
+            # Checked at the first routed read, which comes after authentication:
+            # the token lookup reads the primary (PRIMARY_APPS).
+            self.checked = True
+            user = getattr(self.request, 'user', None)
+            if user is not None and user.is_authenticated and is_sticky(user):
+                self.replica = None
+        return self.replica
+
+    def writer(self):
+        """Return the authenticated user if the request wrote something, else None."""
+        user = getattr(self.request, 'user', None)
+        return user if self.wrote and user is not None and user.is_authenticated else None
+
+
+class ReplicaRouter:
+    """Database router sending the reads of safe requests to a replica (see the module docstring)."""
+
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None or model._meta.app_label in PRIMARY_APPS:
+            return None
+        return routing.read_database()
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = ('default', *replicas())
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in replicas() else None
+
+
+def _routed(routing, chunks):
+    """Iterate over a streaming response's content with the request's routing state."""
+    chunks = iter(chunks)
+    while True:
+        token = _current.set(routing)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _current.reset(token)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """Make the routing state of the request available to ReplicaRouter, and record who wrote."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting(request)
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        writer = routing.writer()
+        if writer is not None:
+            stick_to_primary(writer)
+        return self.finish(routing, response)
+
+    async def __acall__(self, request):
+        routing = RequestRouting(request)
+        token = _current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        writer = await sync_to_async(routing.writer)() if routing.wrote else None
+        if writer is not None:
+            await astick_to_primary(writer)
+        return self.finish(routing, response)
+
+    def finish(self, routing, response):
+        if routing.replica is not None and response.streaming and not response.is_async:
+            response.streaming_content = _routed(routing, response.streaming_content)
+        return response
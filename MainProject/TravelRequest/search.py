@@ -0,0 +1,70 @@
+"""
+Employee name search for the travel request list filters.
+
+On SQLite the 'name' filter is served by the FTS5 trigram index created in
+migration 0003 (TravelRequest_employees_name_fts), which matches substrings of
+first or last name without scanning the employees table. Queries shorter than
+three characters cannot be expressed as trigrams, and other database backends
+(or SQLite builds without the trigram tokenizer, where the migration creates
+nothing) have no such table, so both fall back to the original icontains filter.
+"""
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+NAME_FTS_TABLE = 'TravelRequest_employees_name_fts'
+MIN_TRIGRAM_LENGTH = 3
+
+# (alias, database name) -> whether NAME_FTS_TABLE exists there.
+_index_tables = {}
+
+
+def trigram_index_available(using='default'):
+    """
+    Return True if the employee name trigram index exists on this database.
+
+    The table is looked up once per database (one query on first use).
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    key = (using, str(connection.settings_dict['NAME']))
+    if key not in _index_tables:
+        with connection.cursor() as cursor:
+            _index_tables[key] = NAME_FTS_TABLE in connection.introspection.table_names(cursor)
+    return _index_tables[key]
+
+
+def fts_phrase(term):
+    """Quote a search term as an FTS5 phrase so operators in it are matched literally."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def matching_employee_ids(name):
+    """
+    Build a subquery selecting the ids of employees whose first or last name contains name.
+
+    Args:
+        name (str): The search term (at least MIN_TRIGRAM_LENGTH characters).
+
+    Returns:
+        RawSQL: Subquery usable as the right-hand side of an '__in' lookup.
+    """
+    return RawSQL(f'SELECT rowid FROM "{NAME_FTS_TABLE}" WHERE "{NAME_FTS_TABLE}" MATCH %s', [fts_phrase(name)])
+
+
+def filter_by_employee_name(qs, name):
+    """
+    Restrict a TravelRequests queryset to employees whose first or last name contains name.
+
+    Args:
+        qs (QuerySet): TravelRequests queryset.
+        name (str): Case-insensitive substring to look for.
+
+    Returns:
+        QuerySet: The filtered queryset.
+    """
+    if len(name) >= MIN_TRIGRAM_LENGTH and trigram_index_available(qs.db):
+        return qs.filter(employee_id__in=matching_employee_ids(name))
+    return qs.filter(Q(employee__first_name__icontains=name) | Q(employee__last_name__icontains=name))
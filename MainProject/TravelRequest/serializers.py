@@ -7,10 +7,23 @@ validate incoming data for the following models:
     - Employees: Handles employee data.
     - Admins: Handles admin data.
     - TravelRequests: Handles travel request data.
+    - TravelRequestEvent: Renders the audit trail of a travel request (read-only).
+
+It also provides ValuesSerializer, a read-only fast path that renders rows
+fetched with values_list() exactly like a ModelSerializer would, and the
+compact profile summaries embedded in travel requests with '?expand='.
 """
 
+import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import Managers, Employees, Admins, TravelRequests
+from rest_framework.settings import api_settings, ISO_8601
+from .models import Managers, Employees, Admins, TravelRequests, TravelRequestEvent
 
 class ManagerSerializer(serializers.ModelSerializer):
     """
@@ -48,7 +61,289 @@ class TravelRequestSerializer(serializers.ModelSerializer):
 
     Converts TravelRequests model instances to JSON and validates incoming data 
     for travel request operations.
+
+    Updates save only the fields that were sent, guarded by the row version
+    (see TravelRequests). New requests start as pending, and updates cannot
+    change the status: that only happens through the actions of transitions.py
+    (approve, reject, ...), which check the caller's role, record the audit
+    event and notify the event streams.
     """
     class Meta:
         model = TravelRequests
         fields = '__all__'
+        read_only_fields = ['version', 'resubmission_count']
+
+    def validate_status(self, value):
+        if self.instance is None:
+            if value != 'pending':
+                raise serializers.ValidationError('New requests must be pending.')
+        elif value != self.instance.status:
+            raise serializers.ValidationError(
+                'The status cannot be updated; use the approve, reject, fi_request or close actions.')
+        return value
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save_versioned(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+class EmployeeSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact read-only representation of an employee, embedded in travel requests
+    with '?expand=employee' (see expansion.py).
+    """
+    class Meta:
+        model = Employees
+        fields = ['id', 'first_name', 'last_name', 'department']
+        read_only_fields = fields
+
+class ManagerSummarySerializer(serializers.ModelSerializer):
+    """Compact read-only representation of a manager, embedded with '?expand=manager'."""
+    class Meta:
+        model = Managers
+        fields = ['id', 'first_name', 'last_name', 'department']
+        read_only_fields = fields
+
+class AdminSummarySerializer(serializers.ModelSerializer):
+    """Compact read-only representation of an admin, embedded with '?expand=processed_by'."""
+    class Meta:
+        model = Admins
+        fields = ['id', 'first_name', 'last_name']
+        read_only_fields = fields
+
+class TravelRequestEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the TravelRequestEvent model.
+
+    Renders one entry of a travel request's timeline; events are never written
+    through the API.
+    """
+    class Meta:
+        model = TravelRequestEvent
+        fields = ['id', 'action', 'from_status', 'to_status', 'note', 'changes', 'actor', 'actor_role',
+                  'created_at']
+        read_only_fields = fields
+
+
+def _datetime_converter(field):
+    """
+    Return a factory for a converter matching DateTimeField.to_representation with
+    ISO 8601 output. The field's timezone is resolved once, when the factory is called.
+    """
+    def bind():
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def convert(value):
+            if field_timezone is not None:
+                if value.utcoffset() is not None:
+                    value = value.astimezone(field_timezone)
+                else:
+                    value = field.enforce_timezone(value)
+            elif value.utcoffset() is not None:
+                value = timezone.make_naive(value, datetime.timezone.utc)
+            value = value.isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return bind
+
+
+def _static(converter):
+    """Wrap a converter that does not depend on the request in a factory."""
+    return lambda: converter
+
+
+def _compile_converter(field, model_field):
+    """
+    Return a factory for the cheapest function producing the same output as
+    field.to_representation for a value read from model_field, or None when the
+    database value can be used as is.
+    """
+    representation = type(field).to_representation
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if representation is serializers.CharField.to_representation:
+        return None if isinstance(model_field, (models.CharField, models.TextField)) else _static(str)
+    if representation is serializers.IntegerField.to_representation:
+        return None if isinstance(model_field, (models.IntegerField, models.AutoField)) else _static(int)
+    if representation is serializers.BooleanField.to_representation:
+        return None if isinstance(model_field, models.BooleanField) else _static(field.to_representation)
+    if representation is serializers.ChoiceField.to_representation:
+        # Every stored string maps to itself when all choice keys are strings.
+        if isinstance(model_field, models.CharField) and all(
+                isinstance(key, str) for key in field.choice_strings_to_values.values()):
+            return None
+        return _static(field.to_representation)
+    if representation is serializers.DateField.to_representation:
+        if (getattr(field, 'format', api_settings.DATE_FORMAT) or '').lower() == ISO_8601:
+            return _static(datetime.date.isoformat)
+    if representation is serializers.DateTimeField.to_representation:
+        if (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() == ISO_8601:
+            return _datetime_converter(field)
+    return _static(field.to_representation)
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path for a ModelSerializer.
+
+    Rows are fetched with values_list() instead of building model instances, and
+    each column is converted by a function precompiled from the corresponding
+    serializer field (columns whose database value is already the serialized
+    value are copied as is). The resulting dicts have the same keys, order and
+    values as serializer_class(qs, many=True).data, so the rendered JSON is
+    byte-identical. Only fields backed by a concrete model field are supported.
+    """
+    serializer_class = None
+
+    @cached_property
+    def plan(self):
+        """Return (field names, database columns, converter factories) compiled from the serializer."""
+        serializer = self.serializer_class()
+        model = self.serializer_class.Meta.model
+        names, columns, factories = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or not model_field.concrete:
+                raise ImproperlyConfigured(
+                    f'{type(self).__name__} cannot read {self.serializer_class.__name__}.{name}: '
+                    'only concrete model fields are supported.')
+            names.append(name)
+            columns.append(model_field.attname)
+            factories.append(_compile_converter(field, model_field))
+        return tuple(names), tuple(columns), tuple(factories)
+
+    @property
+    def columns(self):
+        """Database columns to pass to values_list(), in serializer field order."""
+        return self.plan[1]
+
+    def bind(self):
+        """
+        Return a function converting one values_list() row to its serialized dict.
+
+        Converters that depend on the active timezone are resolved once here, so
+        bind once per batch of rows. Columns beyond those in self.columns (e.g.
+        annotations appended by the caller) are ignored.
+        """
+        names, _, factories = self.plan
+        converted = tuple((index, names[index], factory())
+                          for index, factory in enumerate(factories) if factory is not None)
+
+        def to_representation(row):
+            data = dict(zip(names, row))
+            for index, name, convert in converted:
+                value = row[index]
+                if value is not None:
+                    data[name] = convert(value)
+            return data
+        return to_representation
+
+    def prepare(self, qs):
+        """Return the queryset to read self.columns from (unchanged here; see ExpandedValuesSerializer)."""
+        return qs
+
+    def serialize(self, qs):
+        """Return the serialized representation of every row in the queryset."""
+        to_representation = self.bind()
+        return [to_representation(row) for row in self.prepare(qs).values_list(*self.columns)]
+
+    async def aserialize(self, qs):
+        """Async version of serialize(), reading the rows with the async ORM."""
+        to_representation = self.bind()
+        return [to_representation(row) async for row in self.prepare(qs).values_list(*self.columns)]
+
+
+class TravelRequestValuesSerializer(ValuesSerializer):
+    """
+    Fast read-only serializer for TravelRequests list responses.
+
+    Produces exactly the output of TravelRequestSerializer without building
+    model instances.
+    """
+    serializer_class = TravelRequestSerializer
+
+
+class TravelRequestEventValuesSerializer(ValuesSerializer):
+    """Fast read-only serializer for travel request timelines."""
+    serializer_class = TravelRequestEventSerializer
+
+
+class EmployeeSummaryValuesSerializer(ValuesSerializer):
+    """Fast read-only serializer for embedded employee summaries."""
+    serializer_class = EmployeeSummarySerializer
+
+
+class ManagerSummaryValuesSerializer(ValuesSerializer):
+    """Fast read-only serializer for embedded manager summaries."""
+    serializer_class = ManagerSummarySerializer
+
+
+class AdminSummaryValuesSerializer(ValuesSerializer):
+    """Fast read-only serializer for embedded admin summaries."""
+    serializer_class = AdminSummarySerializer
+
+
+class ExpandedValuesSerializer(ValuesSerializer):
+    """
+    A ValuesSerializer whose rows also embed the summaries of related objects.
+
+    The related columns are added to the queryset by prepare() and read by the
+    same values_list() query: through a join when the foreign key has a
+    database constraint, and through a subquery otherwise (ArchivedTravelRequests),
+    so rows referencing a deleted object are kept and embed None.
+    """
+
+    def __init__(self, reader, relations):
+        """
+        Args:
+            reader (ValuesSerializer): Serializer of the rows themselves.
+            relations (tuple): (foreign key name, ValuesSerializer of the summary) pairs;
+                the summary's first column must be the primary key.
+        """
+        self.reader = reader
+        self.relations = relations
+
+    @cached_property
+    def aliases(self):
+        """Return ((foreign key name, related column, annotation name), ...) for every related column."""
+        return tuple((name, column, f'_{name}_{column}') for name, related in self.relations
+                     for column in related.columns)
+
+    @property
+    def columns(self):
+        return self.reader.columns + tuple(alias for _, _, alias in self.aliases)
+
+    def prepare(self, qs):
+        annotations = {}
+        for name, column, alias in self.aliases:
+            if alias in qs.query.annotations:  # already prepared
+                continue
+            field = qs.model._meta.get_field(name)
+            if field.db_constraint:
+                annotations[alias] = F(f'{name}__{column}')
+            else:
+                related = field.related_model._base_manager.filter(pk=OuterRef(field.attname))
+                annotations[alias] = Subquery(related.values(column)[:1])
+        return qs.annotate(**annotations)
+
+    def bind(self):
+        to_representation = self.reader.bind()
+        embedded, start = [], len(self.reader.columns)
+        for name, related in self.relations:
+            embedded.append((name, related.bind(), start, start + len(related.columns)))
+            start += len(related.columns)
+
+        def expanded_representation(row):
+            data = to_representation(row)
+            for name, related_representation, first, last in embedded:
+                data[name] = related_representation(row[first:last]) if row[first] is not None else None
+            return data
+        return expanded_representation
@@ -0,0 +1,156 @@
+"""
+Signal handlers for the Travel Request app.
+
+Connected in TravelrequestConfig.ready():
+    - Employees / Managers / Admins changes clear the cached user -> profile mapping;
+      updates and deletions also bump the profiles generation of the lists that
+      embed profile summaries (see expansion.py). Deleting an admin also refreshes
+      the requests it processed, whose processed_by is cleared without signals.
+    - Token deletion and User changes evict cached authentication tokens.
+    - TravelRequests saves and deletes update the dashboard counters and are
+      recorded in the audit trail.
+    - New database connections get the query counter of the request statistics
+      and the SQLITE_PRAGMAS of the database profile.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import audit, counters
+from .authentication import evict_token
+from .instrumentation import install_query_counter
+from .models import Employees, Managers, Admins, TravelRequests
+from .profiles import profile_cache
+from .sqlite import configure_connection
+
+User = get_user_model()
+
+# Bookkeeping columns left out of the audited changes of an update.
+AUDIT_IGNORED_FIELDS = ('updated_at', 'version')
+
+
+@receiver(post_save, sender=Employees)
+@receiver(post_delete, sender=Employees)
+@receiver(post_save, sender=Managers)
+@receiver(post_delete, sender=Managers)
+@receiver(post_save, sender=Admins)
+@receiver(post_delete, sender=Admins)
+def invalidate_profile_cache(sender, **kwargs):
+    """
+    Clear the profile cache when a profile row changes.
+
+    A changed email can move a user to a different profile, so the whole cache
+    is dropped rather than a single entry; profile writes are rare. It is dropped
+    again on commit, for lookups that read the row before the change committed.
+    """
+    profile_cache.clear()
+    transaction.on_commit(profile_cache.clear)
+
+
+@receiver(post_save, sender=Employees)
+@receiver(post_delete, sender=Employees)
+@receiver(post_save, sender=Managers)
+@receiver(post_delete, sender=Managers)
+@receiver(post_save, sender=Admins)
+@receiver(post_delete, sender=Admins)
+def invalidate_expanded_lists(sender, created=False, **kwargs):
+    """
+    Bump the profiles generation when an existing profile changes or is deleted.
+
+    Expanded list responses embed profile names and departments, and a profile can
+    appear in any scope (as employee, manager or processing admin); lists without
+    '?expand=' do not depend on profiles and keep their versions. A new profile
+    appears in no request yet.
+    """
+    if not created:
+        counters.touch_profiles()
+
+
+@receiver(pre_delete, sender=Admins)
+def touch_processed_requests(sender, instance, **kwargs):
+    """
+    Refresh the requests an admin processed before it is deleted.
+
+    Their processed_by is set to NULL with a QuerySet.update() that sends no
+    signals, which would leave the list versions and the detail updated_at, and
+    so every ETag and cached list showing the admin, unchanged.
+    """
+    processed = TravelRequests.objects.filter(processed_by_id=instance.pk)
+    rows = list(processed.values_list(*counters.SNAPSHOT_FIELDS))
+    if rows:
+        processed.update(updated_at=timezone.now())
+        counters.touch(rows)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Evict a token from the authentication cache once it is deleted (e.g. on logout)."""
+    evict_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, created, **kwargs):
+    """
+    Evict a user's cached tokens whenever the user is saved.
+
+    The cached token carries a copy of the user, so any change (deactivation,
+    password or permission changes) must force a fresh lookup.
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        evict_token(key)
+
+
+@receiver(post_init, sender=TravelRequests)
+def remember_counted_values(sender, instance, **kwargs):
+    """Remember the values the dashboard counters were computed from when a request is loaded."""
+    instance._counted = counters.snapshot(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=TravelRequests)
+def load_counted_values(sender, instance, **kwargs):
+    """Fetch the stored values of a request saved without them loaded (e.g. built by hand or deferred)."""
+    if instance.pk and instance._counted is None and not instance._state.adding:
+        row = TravelRequests.objects.filter(pk=instance.pk).values_list(*counters.SNAPSHOT_FIELDS).first()
+        instance._counted = row
+
+
+@receiver(post_save, sender=TravelRequests)
+def track_saved_request(sender, instance, created, update_fields, **kwargs):
+    """Apply the counter difference of a created or updated request and record the change."""
+    before = None if created else instance._counted
+    after = counters.snapshot(instance)
+    counters.apply_changes([(before, after)])
+    instance._counted = after
+    if created:
+        audit.record(instance.pk, 'created', to_status=instance.status)
+        return
+    changes = {name: sender._meta.get_field(name).value_from_object(instance)
+               for name in update_fields or () if name not in AUDIT_IGNORED_FIELDS}
+    note = changes.get('admin_note') or changes.get('manager_note')
+    audit.record(instance.pk, 'updated', before[1] if before else '', instance.status, note, changes)
+
+
+@receiver(post_delete, sender=TravelRequests)
+def track_deleted_request(sender, instance, **kwargs):
+    """Remove a deleted request from the counters and record its deletion."""
+    counters.apply_changes([(instance._counted, None)])
+    audit.record(instance.pk, 'deleted', from_status=instance.status)
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs):
+    """Count the queries of every database connection in the per-endpoint statistics."""
+    install_query_counter(connection)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply the SQLite PRAGMAs of the database profile (WAL, busy timeout...) to a new connection."""
+    configure_connection(connection)
@@ -0,0 +1,62 @@
+"""
+SQLite tuning for the production database profile.
+
+settings.py selects the profile with the TRAVELREQUEST_DATABASE_PROFILE
+environment variable. The default 'development' profile is a plain SQLite
+database. The 'production' profile:
+    - applies the SQLITE_PRAGMAS setting to every new connection (see
+      configure_connection(), connected to connection_created in signals.py):
+      WAL journaling so readers never wait for the writer, synchronous=NORMAL
+      (durable at each WAL checkpoint, safe against corruption), a memory-mapped
+      read path and a busy timeout;
+    - keeps connections open between requests (CONN_MAX_AGE) instead of
+      reconnecting and re-applying the PRAGMAs on every request;
+    - uses the database backend in base.py, which serializes writers.
+
+SQLite allows one writer at a time. Django starts transactions with a plain
+(deferred) BEGIN, so two transactions may both read and then both try to write:
+one of them fails at once with 'database is locked', whatever the busy timeout,
+and writers that do wait poll the lock with growing sleeps. The backend instead
+takes a process-wide writer lock before every transaction and starts it with
+BEGIN IMMEDIATE, which takes SQLite's write lock up front (waiting up to the
+busy timeout for other processes). Writers of one process are handed the
+database in turn without polling, and the transactions of several processes
+wait for each other instead of failing. Single statements outside a
+transaction (e.g. creating a login token) keep relying on the busy timeout.
+
+Reads outside transactions do not take the lock; in WAL mode they run
+concurrently with the writer.
+"""
+
+import threading
+
+from django.conf import settings
+
+DEFAULT_BUSY_TIMEOUT = 5000
+
+_writer_locks = {}
+_writer_locks_lock = threading.Lock()
+
+
+def busy_timeout():
+    """Return the busy timeout of the SQLITE_PRAGMAS setting, in seconds."""
+    return int(getattr(settings, 'SQLITE_PRAGMAS', {}).get('busy_timeout', DEFAULT_BUSY_TIMEOUT)) / 1000
+
+
+def writer_lock(name):
+    """Return the process-wide writer lock of a database file."""
+    with _writer_locks_lock:
+        lock = _writer_locks.get(name)
+        if lock is None:
+            lock = _writer_locks[name] = threading.Lock()
+        return lock
+
+
+def configure_connection(connection):
+    """Apply the SQLITE_PRAGMAS setting to a new SQLite connection."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
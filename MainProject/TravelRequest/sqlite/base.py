@@ -0,0 +1,50 @@
+"""
+SQLite database backend serializing writers (ENGINE 'TravelRequest.sqlite').
+
+Every transaction takes the process-wide writer lock of its database file and
+starts with BEGIN IMMEDIATE; the lock is released when the transaction commits
+or rolls back, or the connection is closed. See the package docstring.
+"""
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+from . import busy_timeout, writer_lock
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    holds_writer_lock = False
+
+    def _start_transaction_under_autocommit(self):
+        lock = writer_lock(str(self.settings_dict['NAME']))
+        if not lock.acquire(timeout=busy_timeout()):
+            raise OperationalError('database is locked (timed out waiting for the writer lock)')
+        self.holds_writer_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self._release_writer_lock()
+            raise
+
+    def _release_writer_lock(self):
+        if self.holds_writer_lock:
+            self.holds_writer_lock = False
+            writer_lock(str(self.settings_dict['NAME'])).release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_writer_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_writer_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_writer_lock()
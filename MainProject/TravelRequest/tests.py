@@ -1,3 +1,1615 @@
-from django.test import TestCase
+"""
+Tests for the Travel Request project.
+"""
 
-# Create your tests here.
+import asyncio
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.db.utils import load_backend
+from django.http import HttpResponse, QueryDict
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .models import (ArchivedTravelRequests, ConcurrentUpdateError, Managers, Employees, Admins, TravelRequests,
+                     TravelRequestCounter, TravelRequestEvent)
+from . import async_views, audit, counters, events, transitions, views
+from .authentication import check_token_cache, get_token_cache
+from .importing import ProfileImporter, iter_rows
+from .instrumentation import request_stats
+from .list_query import ListQueryError, compile_list_query
+from .pagination import encode_cursor
+from .profiles import profile_cache, resolve_profile
+from .response_cache import get_response_cache, response_cache_stats
+from .routing import ReplicaRouter, ReplicaRoutingMiddleware
+from .search import filter_by_employee_name, trigram_index_available
+from .serializers import (EmployeeSerializer, TravelRequestEventSerializer, TravelRequestEventValuesSerializer,
+                          TravelRequestSerializer, TravelRequestValuesSerializer)
+from .sqlite import writer_lock
+
+User = get_user_model()
+
+TRAVEL_REQUESTS_TABLE = TravelRequests._meta.db_table
+
+_sequence = itertools.count(1)
+
+
+def make_manager(**fields):
+    """Create a Manager with a unique email; fields override the defaults."""
+    n = next(_sequence)
+    return Managers.objects.create(**{'first_name': f'Mia{n}', 'last_name': 'Lee', 'email': f'manager{n}@example.com',
+                                      'password': 'x', 'department': 'Sales', **fields})
+
+
+def make_employee(manager, **fields):
+    """Create an Employee of a manager with a unique email."""
+    n = next(_sequence)
+    return Employees.objects.create(**{'first_name': f'Eli{n}', 'last_name': 'Ray', 'email': f'employee{n}@example.com',
+                                       'password': 'x', 'manager': manager, **fields})
+
+
+def make_admin(**fields):
+    """Create an Admin with a unique email."""
+    n = next(_sequence)
+    return Admins.objects.create(**{'first_name': f'Ada{n}', 'last_name': 'Kay', 'email': f'admin{n}@example.com',
+                                    'password': 'x', **fields})
+
+
+def make_travel_request(employee, **fields):
+    """Create a TravelRequest of an employee, assigned to the employee's manager."""
+    n = next(_sequence)
+    return TravelRequests.objects.create(**{
+        'employee': employee, 'manager_id': employee.manager_id, 'from_date': datetime.date(2025, 1, 1 + n % 28),
+        'to_date': datetime.date(2025, 2, 1 + n % 28), 'location': 'Berlin', 'destination': 'Paris',
+        'travel_mode': 'Train', 'purpose_of_travel': 'Conference', **fields})
+
+
+def make_user(profile):
+    """Create the Django User a profile logs in with."""
+    return User.objects.create_user(username=profile.email, email=profile.email, password='secret-password')
+
+
+class TeamMixin:
+    """
+    Test case mixin: one manager with one employee, and an admin, created with
+    the factories above; client_for() logs any of them in.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_manager()
+        cls.employee = make_employee(cls.manager)
+        cls.admin = make_admin()
+
+    def client_for(self, profile):
+        """Return an APIClient authenticated as the User of a profile (created on first use)."""
+        client = APIClient()
+        client.force_authenticate(User.objects.filter(username=profile.email).first() or make_user(profile))
+        return client
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class TravelRequestIndexTests(TeamMixin, TestCase):
+    """
+    Run EXPLAIN QUERY PLAN on the queries issued by each list view and check that
+    the composite indexes on TravelRequests serve both the filter and the ordering.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day in range(1, 11):
+            make_travel_request(cls.employee, from_date=datetime.date(2025, 1, day),
+                                to_date=datetime.date(2025, 2, day))
+
+    def setUp(self):
+        get_response_cache().clear()
+
+    def query_plan(self, client, url, params):
+        """Call a list view and return the EXPLAIN QUERY PLAN rows of its TravelRequests query."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = [q['sql'] for q in ctx.captured_queries if f'FROM "{TRAVEL_REQUESTS_TABLE}"' in q['sql']][-1]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, plan, index_name):
+        self.assertTrue(any(f'INDEX {index_name}' in step for step in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_employee_list(self):
+        client = self.client_for(self.employee)
+        self.assertUsesIndex(self.query_plan(client, '/api/employee/requests/', {}), 'travelreq_emp_created_idx')
+
+    def test_manager_list(self):
+        client = self.client_for(self.manager)
+        url = '/api/manager/requests/'
+        # Unordered: any of the (manager_id, ...) indexes serves the filter.
+        self.assertUsesIndex(self.query_plan(client, url, {}), 'travelreq_mgr_')
+        self.assertUsesIndex(self.query_plan(client, url, {'page_size': 5}), 'travelreq_mgr_created_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'status': 'pending'}), 'travelreq_mgr_status_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'status': 'pending', 'page_size': 5}),
+                             'travelreq_mgr_status_idx')
+
+    def test_admin_list(self):
+        client = self.client_for(self.admin)
+        url = '/api/myadmin/requests/'
+        self.assertUsesIndex(self.query_plan(client, url, {'page_size': 5}), 'travelreq_created_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'page_size': 5, 'sort_by': '-created_at'}),
+                             'travelreq_created_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'status': 'approved'}), 'travelreq_status_created_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'from_date': '2025-01-05'}), 'travelreq_from_date_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'to_date': '2025-02-05'}), 'travelreq_to_date_idx')
+        self.assertUsesIndex(self.query_plan(client, url, {'page_size': 5, 'expand': 'employee,manager,processed_by'}),
+                             'travelreq_created_idx')
+
+    def test_sorts(self):
+        manager, admin = self.client_for(self.manager), self.client_for(self.admin)
+        for sort_by, manager_index, admin_index in (
+                ('from_date', 'travelreq_mgr_from_date_idx', 'travelreq_from_date_idx'),
+                ('-to_date', 'travelreq_mgr_to_date_idx', 'travelreq_to_date_idx'),
+                ('-created_at', 'travelreq_mgr_created_idx', 'travelreq_created_idx')):
+            for params in ({'sort_by': sort_by}, {'sort_by': sort_by, 'page_size': 5}):
+                self.assertUsesIndex(self.query_plan(manager, '/api/manager/requests/', params), manager_index)
+                self.assertUsesIndex(self.query_plan(admin, '/api/myadmin/requests/', params), admin_index)
+        self.assertUsesIndex(self.query_plan(manager, '/api/manager/requests/', {'sort_by': 'id', 'page_size': 5}),
+                             'TravelRequest_travelrequests_manager_id')
+
+
+
+class ListQueryTests(TestCase):
+    """Check the validation of list filters and sorts."""
+
+    def test_valid_parameters_are_parsed_once(self):
+        query = compile_list_query(QueryDict('name=Eli&from_date=2025-01-05&to_date=&status=pending&sort_by=-to_date'))
+        self.assertEqual((query.name, query.from_date, query.to_date, query.status, query.sort_by),
+                         ('Eli', datetime.date(2025, 1, 5), None, 'pending', '-to_date'))
+        # At most one row matches an id: no sort is needed.
+        self.assertIsNone(compile_list_query(QueryDict('id=3&sort_by=from_date')).sort_by)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ('sort_by=destination', 'sort_by=employee__last_name', 'sort_by=--id', 'from_date=2025-02-30',
+                       'to_date=yesterday', 'status=lost', 'id=x', 'id=0'):
+            with self.subTest(params), self.assertRaises(ListQueryError):
+                compile_list_query(QueryDict(params))
+
+    def test_list_endpoints_answer_400(self):
+        client = APIClient()
+        client.force_authenticate(make_user(make_admin()))
+        for path in ('/api/myadmin/requests/', '/api/myadmin/requests/export/'):
+            response = client.get(path, {'sort_by': 'employee__last_name'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('sort_by must be one of created_at, from_date, to_date, id', response.json()['error'])
+
+class AsyncReadViewTests(TeamMixin, TestCase):
+    """Check that the async read views answer exactly like the DRF views they replace under ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        statuses = ['pending', 'approved', 'rejected']
+        cls.requests = [
+            make_travel_request(cls.employee, from_date=datetime.date(2025, 1, day) if day % 4 else None,
+                                to_date=datetime.date(2025, 2, day), status=statuses[day % 3])
+            for day in range(1, 8)
+        ]
+        cls.tokens = {profile: Token.objects.create(user=make_user(profile)).key
+                      for profile in (cls.manager, cls.employee, cls.admin)}
+
+    def headers(self, profile, **extra):
+        return dict(extra, Authorization=f'Token {self.tokens[profile]}') if profile else extra
+
+    def call_both(self, name, path, profile, params=None, method='get', **kwargs):
+        """Call the DRF view and its async version with the same request and return both responses."""
+        sync_response = getattr(views, name)(getattr(RequestFactory(), method)(path, params, headers=self.headers(profile)),
+                                             **kwargs)
+        if hasattr(sync_response, 'render'):  # list responses are rendered by the response cache
+            sync_response.render()
+        get_response_cache().clear()  # compare with a response built by the async view
+        async_request = getattr(AsyncRequestFactory(), method)(path, params, headers=self.headers(profile))
+        async_response = async_to_sync(getattr(async_views, name))(async_request, **kwargs)
+        return sync_response, async_response
+
+    def assertSameResponse(self, name, path, profile, params=None, **kwargs):
+        sync_response, async_response = self.call_both(name, path, profile, params, **kwargs)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+        self.assertEqual(async_response.get('Last-Modified'), sync_response.get('Last-Modified'))
+        return async_response
+
+    def test_lists(self):
+        for params in ({}, {'status': 'approved'}, {'sort_by': '-from_date'}, {'page_size': 3},
+                       {'page_size': 2, 'sort_by': 'from_date'}, {'cursor': 'bad'},
+                       {'expand': 'employee,manager,processed_by'}, {'page_size': 2, 'expand': 'manager'},
+                       {'expand': 'department'}):
+            self.assertSameResponse('manager_requests_list', '/api/manager/requests/', self.manager, params)
+            self.assertSameResponse('admin_requests_list', '/api/myadmin/requests/', self.admin, params)
+        self.assertSameResponse('manager_requests_list', '/api/manager/requests/', self.employee)
+
+    def test_details(self):
+        pk = self.requests[0].pk
+        self.assertSameResponse('manager_requests_detail', f'/api/manager/requests/{pk}/', self.manager, pk=pk)
+        self.assertSameResponse('admin_requests_detail', f'/api/myadmin/requests/{pk}/', self.admin, pk=pk)
+        self.assertSameResponse('employee_requests_detail', f'/api/employee/requests/{pk}/', self.employee, pk=pk)
+        self.assertSameResponse('admin_requests_detail', '/api/myadmin/requests/0/', self.admin, pk=0)
+        for params in ({'expand': 'employee,manager,processed_by'}, {'expand': 'manager', 'timeline': 'true'},
+                       {'expand': 'x'}):
+            self.assertSameResponse('admin_requests_detail', f'/api/myadmin/requests/{pk}/', self.admin,
+                                    params, pk=pk)
+
+    def test_conditional_get(self):
+        pk = self.requests[0].pk
+        response = self.assertSameResponse('admin_requests_detail', f'/api/myadmin/requests/{pk}/',
+                                           self.admin, pk=pk)
+        request = AsyncRequestFactory().get(f'/api/myadmin/requests/{pk}/',
+                                            headers=self.headers(self.admin, **{'If-None-Match': response['ETag']}))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(async_to_sync(async_views.admin_requests_detail)(request, pk=pk).status_code, 304)
+        # An unchanged request is answered from its updated_at alone, without reading the row.
+        queries = [q['sql'] for q in ctx.captured_queries if f'"{TRAVEL_REQUESTS_TABLE}"' in q['sql']]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"destination"', queries[0])
+
+    def test_authentication(self):
+        response = self.assertSameResponse('admin_requests_list', '/api/myadmin/requests/', None)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        request = AsyncRequestFactory().get('/api/myadmin/requests/', headers={'Authorization': 'Token invalid'})
+        self.assertEqual(async_to_sync(async_views.admin_requests_list)(request).status_code, 401)
+
+    def test_employee_writes_use_drf_view(self):
+        pk = next(tr.pk for tr in self.requests if tr.status == 'pending')
+        request = AsyncRequestFactory().put(f'/api/employee/requests/{pk}/', {'purpose_of_travel': 'Workshop'},
+                                            content_type='application/json', headers=self.headers(self.employee))
+        response = async_to_sync(async_views.employee_requests_detail)(request, pk=pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TravelRequests.objects.get(pk=pk).purpose_of_travel, 'Workshop')
+
+
+class OptimisticConcurrencyTests(TeamMixin, TestCase):
+    """Check that stale saves of a travel request are rejected instead of overwriting newer changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+
+    def test_stale_instance_save_raises(self):
+        first = TravelRequests.objects.get(pk=self.travel_request.pk)
+        second = TravelRequests.objects.get(pk=self.travel_request.pk)
+        first.manager_note = 'first'
+        first.save()
+        self.assertEqual(first.version, 2)
+        second.manager_note = 'second'
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            second.save()
+        self.assertEqual(TravelRequests.objects.get(pk=self.travel_request.pk).manager_note, 'first')
+
+    def test_save_versioned_sends_the_save_signals(self):
+        travel_request = TravelRequests.objects.get(pk=self.travel_request.pk)
+        travel_request.destination = 'Rome'
+        travel_request.save_versioned(update_fields=['destination', 'updated_at'])
+        self.assertEqual(travel_request.version, 2)
+        self.assertEqual(counters.summary(counters.GLOBAL_SCOPE)['by_destination'], {'Rome': 1})
+        event = TravelRequestEvent.objects.filter(travel_request_id=travel_request.pk, action='updated').get()
+        self.assertEqual(event.changes, {'destination': 'Rome'})
+        TravelRequests.objects.filter(pk=travel_request.pk).delete()
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            travel_request.save_versioned()
+
+    def test_views_answer_conflict(self):
+        client = self.client_for(self.manager)
+        pk = self.travel_request.pk
+        response = client.put(f'/api/manager/requests/{pk}/update/', {'manager_note': 'ok', 'version': 1},
+                              format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 2)
+        response = client.put(f'/api/manager/requests/{pk}/update/', {'manager_note': 'late', 'version': 1},
+                              format='json')
+        self.assertEqual(response.status_code, 409)
+        response = client.post(f'/api/manager/requests/{pk}/approve/', {'version': 1}, format='json')
+        self.assertEqual(response.status_code, 409)
+        response = client.post(f'/api/manager/requests/{pk}/approve/', {'version': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        travel_request = TravelRequests.objects.get(pk=pk)
+        self.assertEqual((travel_request.status, travel_request.manager_note, travel_request.version),
+                         ('approved', '', 3))
+
+
+class StatusTransitionTests(TeamMixin, TestCase):
+    """Check that status changes follow the state machine in transitions.py."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+
+    def test_transition_is_one_guarded_update(self):
+        owned = TravelRequests.objects.filter(manager_id=self.manager.pk)
+        with CaptureQueriesContext(connection) as ctx, self.assertNumQueries(3):
+            # The transition, the counters upsert and the audit event.
+            changed = transitions.apply_many(owned, 'approve', manager_note='ok')
+        self.assertEqual([pk for pk, _, _ in changed], [self.travel_request.pk])
+        self.assertEqual([(before[1], after[1]) for _, before, after in changed], [('pending', 'approved')])
+        queries = [q['sql'] for q in ctx.captured_queries if f'"{TRAVEL_REQUESTS_TABLE}"' in q['sql']]
+        self.assertEqual([sql.split()[0] for sql in queries], ['UPDATE'])
+        self.assertIn(f'"{TRAVEL_REQUESTS_TABLE}"."manager_id" = {self.manager.pk}', queries[0])
+        self.assertIn(f'"{TRAVEL_REQUESTS_TABLE}"."status" = \'pending\'', queries[0])
+        self.assertIn('RETURNING', queries[0])
+        self.assertEqual(counters.summary(counters.GLOBAL_SCOPE)['by_status'], {'approved': 1})
+
+    def test_snapshot_changes_lock_then_update_owned_requests(self):
+        # Changing a counted field needs the values from before the UPDATE.
+        TravelRequests.objects.filter(pk=self.travel_request.pk).update(status='FI_required')
+        owned = TravelRequests.objects.filter(employee_id=self.employee.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            changed = transitions.apply_many(owned, 'resubmit', destination='Rome')
+        self.assertEqual([(before[2], after[2]) for _, before, after in changed], [('Paris', 'Rome')])
+        queries = [q['sql'] for q in ctx.captured_queries if f'"{TRAVEL_REQUESTS_TABLE}"' in q['sql']]
+        self.assertEqual([sql.split()[0] for sql in queries], ['SELECT', 'UPDATE'])
+        self.assertIn(f'"{TRAVEL_REQUESTS_TABLE}"."employee_id" = {self.employee.pk}', queries[1])
+        self.assertIn(f'"{TRAVEL_REQUESTS_TABLE}"."status" = \'FI_required\'', queries[1])
+
+    def test_concurrently_changed_requests_are_not_counted(self):
+        other = make_travel_request(self.employee)
+        concurrent = []
+
+        def reject_other_first(execute, sql, params, many, context):
+            # Simulate a transition committed just before the guarded UPDATE.
+            if sql.startswith('UPDATE') and not concurrent:
+                concurrent.append(other.pk)
+                TravelRequests.objects.filter(pk=other.pk).update(status='rejected')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(reject_other_first), audit.recording():
+            changed = transitions.apply_many(TravelRequests.objects.all(), 'approve')
+        self.assertEqual(concurrent, [other.pk])
+        self.assertEqual([pk for pk, _, _ in changed], [self.travel_request.pk])
+        self.assertEqual(list(TravelRequestEvent.objects.filter(action='approve')
+                              .values_list('travel_request_id', flat=True)), [self.travel_request.pk])
+        self.assertEqual(TravelRequests.objects.get(pk=other.pk).status, 'rejected')
+
+    def test_invalid_transitions_are_rejected(self):
+        manager, admin = self.client_for(self.manager), self.client_for(self.admin)
+        pk = self.travel_request.pk
+        self.assertEqual(admin.post(f'/api/myadmin/requests/{pk}/close/').status_code, 400)
+        self.assertEqual(manager.post(f'/api/manager/requests/{pk}/reject/').status_code, 200)
+        response = manager.post(f'/api/manager/requests/{pk}/approve/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Cannot approve a request that is rejected')
+        response = manager.put(f'/api/manager/requests/{pk}/update/', {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TravelRequests.objects.get(pk=pk).status, 'rejected')
+
+    def test_updates_cannot_change_the_status(self):
+        manager, admin = self.client_for(self.manager), self.client_for(self.admin)
+        pk = self.travel_request.pk
+        self.assertEqual(manager.post(f'/api/manager/requests/{pk}/approve/').status_code, 200)
+        for client, url in ((manager, f'/api/manager/requests/{pk}/update/'),
+                            (admin, f'/api/myadmin/requests/{pk}/update/')):
+            with self.subTest(url=url):
+                response = client.put(url, {'status': 'closed', 'destination': 'Rome'}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('status', response.data)
+        # Sending the current status back is not a change.
+        response = manager.put(f'/api/manager/requests/{pk}/update/', {'status': 'approved', 'destination': 'Rome'},
+                               format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TravelRequests.objects.values_list('status', 'destination').get(pk=pk), ('approved', 'Rome'))
+
+    def test_employee_resubmission(self):
+        manager, employee = self.client_for(self.manager), self.client_for(self.employee)
+        pk = self.travel_request.pk
+        self.assertEqual(manager.post(f'/api/manager/requests/{pk}/fi_request/').status_code, 200)
+        response = employee.put(f'/api/employee/requests/{pk}/',
+                                {'further_information': 'Agenda attached', 'destination': 'Rome'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['resubmission_count']), ('pending', 1))
+        self.assertEqual(response.data['further_information'], 'Agenda attached')
+        # The counters follow the fields changed together with the status.
+        self.assertEqual(counters.summary(counters.GLOBAL_SCOPE)['by_destination'], {'Rome': 1})
+        self.assertEqual(counters.summary(counters.GLOBAL_SCOPE)['by_status'], {'pending': 1})
+
+
+class EventStreamTests(TeamMixin, TestCase):
+    """Drive the manager event stream through the ASGI application of asgi.py."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+        cls.token = Token.objects.create(user=make_user(cls.manager))
+
+    def setUp(self):
+        # As the test clients do, keep the handler from closing the test transaction's connection.
+        signals.request_started.disconnect(close_old_connections)
+        self.addCleanup(signals.request_started.connect, close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        self.addCleanup(signals.request_finished.connect, close_old_connections)
+
+    def approve(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.manager).post(f'/api/manager/requests/{self.travel_request.pk}/approve/')
+        self.assertEqual(response.status_code, 200)
+
+    async def open_stream(self):
+        """Start a GET of the manager stream; return the (inbound, outbound) message queues and the app task."""
+        inbound, outbound = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': '/api/manager/events/', 'raw_path': b'/api/manager/events/', 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 40000), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {self.token.key}'.encode())],
+        }
+        await inbound.put({'type': 'http.request', 'body': b'', 'more_body': False})
+        task = asyncio.ensure_future(events.DisconnectMiddleware(ASGIHandler())(scope, inbound.get, outbound.put))
+        return inbound, outbound, task
+
+    async def read_body(self, outbound):
+        message = await asyncio.wait_for(outbound.get(), 5)
+        self.assertEqual(message['type'], 'http.response.body')
+        return message['body'].decode()
+
+    def test_delivers_events_until_the_client_disconnects(self):
+        async def scenario():
+            inbound, outbound, task = await self.open_stream()
+            start = await asyncio.wait_for(outbound.get(), 5)
+            self.assertEqual((start['type'], start['status']), ('http.response.start', 200))
+            self.assertEqual(await self.read_body(outbound), 'retry: 5000\n\n')
+            self.assertEqual(events.broker.subscriber_count(), 1)
+            await sync_to_async(self.approve)()
+            message = await self.read_body(outbound)
+            self.assertTrue(message.startswith('event: status_changed\n'), message)
+            event = json.loads(message.split('data: ', 1)[1])
+            self.assertEqual((event['request'], event['status']), (self.travel_request.pk, 'approved'))
+            await inbound.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 5)
+            self.assertEqual(events.broker.subscriber_count(), 0)
+        async_to_sync(scenario)()
+
+    @override_settings(EVENTS_MAX_AGE=0.2, EVENTS_HEARTBEAT=0.05)
+    def test_streams_end_after_max_age(self):
+        async def scenario():
+            chunks = []
+            async for chunk in events.stream(['manager:0']):
+                chunks.append(chunk)
+            return chunks
+        chunks = async_to_sync(scenario)()
+        self.assertEqual(chunks[0], 'retry: 5000\n\n')
+        self.assertTrue(set(chunks[1:]) <= {': keepalive\n\n'}, chunks)
+        self.assertEqual(events.broker.subscriber_count(), 0)
+
+
+class TokenAuthenticationTests(TeamMixin, TestCase):
+    """Check that cached tokens stop working once revoked."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = make_user(cls.employee)
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # The first request caches the token.
+        self.assertEqual(self.client.get('/api/employee/requests/').status_code, 200)
+
+    def test_logout_revokes_the_token(self):
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/employee/requests/').status_code, 401)
+
+    def test_deactivation_revokes_the_token(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/employee/requests/').status_code, 401)
+
+    def test_long_process_local_ttl_is_reported(self):
+        self.assertEqual(check_token_cache(None), [])
+        with self.settings(AUTH_TOKEN_CACHE_TTL=300):
+            self.assertEqual([warning.id for warning in check_token_cache(None)], ['TravelRequest.W001'])
+
+
+class ConditionalListTests(TeamMixin, TestCase):
+    """Check the ETags of the list endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+        cls.other = make_travel_request(make_employee(make_manager()))
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.lists = {'/api/employee/requests/': self.client_for(self.employee),
+                      '/api/manager/requests/': self.client_for(self.manager),
+                      '/api/myadmin/requests/': self.client_for(self.admin)}
+
+    def etags(self):
+        return {url: client.get(url)['ETag'] for url, client in self.lists.items()}
+
+    def test_not_modified_until_a_request_changes(self):
+        etags = self.etags()
+        for url, client in self.lists.items():
+            with self.subTest(url=url):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etags[url])
+                self.assertEqual(response.content, b'')
+                # Other filters are another representation.
+                self.assertEqual(client.get(url, {'status': 'pending'}, HTTP_IF_NONE_MATCH=etags[url]).status_code,
+                                 200)
+        response = self.lists['/api/manager/requests/'].post(
+            f'/api/manager/requests/{self.travel_request.pk}/approve/')
+        self.assertEqual(response.status_code, 200)
+        for url, client in self.lists.items():
+            with self.subTest(url=url):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etags[url])
+                self.assertEqual(response.json()[0]['status'], 'approved')
+                self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_changes_in_other_scopes_keep_the_etag(self):
+        etags = self.etags()
+        self.other.destination = 'Rome'
+        self.other.save()
+        changed = {url for url, etag in self.etags().items() if etag != etags[url]}
+        self.assertEqual(changed, {'/api/myadmin/requests/'})
+
+
+class DashboardTests(TeamMixin, TestCase):
+    """Check that the dashboard counts follow every kind of change to the requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pending = [make_travel_request(cls.employee, destination=city) for city in ('Rome', 'Oslo', 'Rome')]
+        cls.approved = make_travel_request(cls.employee, status='approved')
+        # Requests of another manager, counted on the admin dashboard only.
+        make_travel_request(make_employee(make_manager()), status='approved')
+
+    def assertDashboardsMatchTheRequests(self):
+        for profile, url, requests in ((self.manager, '/api/manager/dashboard/',
+                                        TravelRequests.objects.filter(manager=self.manager)),
+                                       (self.admin, '/api/myadmin/dashboard/', TravelRequests.objects.all())):
+            expected = dict(requests.values_list('status').annotate(n=Count('id')).order_by())
+            summary = self.client_for(profile).get(url).json()
+            self.assertEqual(summary['by_status'], expected)
+            self.assertEqual(summary['total'], sum(expected.values()))
+
+    def test_manager_transitions(self):
+        client = self.client_for(self.manager)
+        for travel_request, action in zip(self.pending, ('approve', 'reject', 'fi_request')):
+            with self.subTest(action=action):
+                response = client.post(f'/api/manager/requests/{travel_request.pk}/{action}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertDashboardsMatchTheRequests()
+
+    def test_close(self):
+        response = self.client_for(self.admin).post(f'/api/myadmin/requests/{self.approved.pk}/close/')
+        self.assertEqual(response.status_code, 200)
+        self.assertDashboardsMatchTheRequests()
+
+    def test_bulk_action(self):
+        ids = [travel_request.pk for travel_request in self.pending] + [self.approved.pk]
+        response = self.client_for(self.manager).post('/api/manager/requests/bulk/',
+                                                      {'ids': ids, 'action': 'reject'}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertDashboardsMatchTheRequests()
+
+    def test_delete(self):
+        response = self.client_for(self.employee).delete(f'/api/employee/requests/{self.pending[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TravelRequests.objects.filter(pk=self.pending[0].pk).exists())
+        self.assertDashboardsMatchTheRequests()
+
+
+class BulkActionTests(TeamMixin, TestCase):
+    """Check the per-id outcomes of the manager bulk action endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pending = [make_travel_request(cls.employee) for _ in range(2)]
+        cls.approved = make_travel_request(cls.employee, status='approved')
+        cls.foreign = make_travel_request(make_employee(make_manager()))
+
+    def test_outcome_per_id(self):
+        missing = TravelRequests.objects.order_by('-id').values_list('id', flat=True).first() + 1
+        ids = [self.pending[0].pk, self.approved.pk, missing, self.foreign.pk, self.pending[1].pk, self.pending[0].pk]
+        response = self.client_for(self.manager).post(
+            '/api/manager/requests/bulk/', {'ids': ids, 'action': 'reject', 'manager_note': 'No budget'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['action'], response.data['updated']), ('reject', 2))
+        # Duplicate ids are reported once; another manager's request is reported as missing.
+        self.assertEqual(response.data['results'], [
+            {'id': self.pending[0].pk, 'outcome': 'updated'},
+            {'id': self.approved.pk, 'outcome': 'invalid_status', 'status': 'approved'},
+            {'id': missing, 'outcome': 'not_found'},
+            {'id': self.foreign.pk, 'outcome': 'not_found'},
+            {'id': self.pending[1].pk, 'outcome': 'updated'},
+        ])
+        statuses = dict(TravelRequests.objects.values_list('id', 'status'))
+        self.assertEqual([statuses[request.pk] for request in (*self.pending, self.approved, self.foreign)],
+                         ['rejected', 'rejected', 'approved', 'pending'])
+        self.assertEqual(TravelRequests.objects.get(pk=self.pending[0].pk).manager_note, 'No budget')
+        self.assertEqual(TravelRequestEvent.objects.filter(action='reject').count(), 2)
+
+    def test_invalid_input(self):
+        client = self.client_for(self.manager)
+        for body, error in (({'ids': [1], 'action': 'close'}, 'action must be one of'),
+                            ({'ids': [], 'action': 'approve'}, 'ids must be a non-empty list'),
+                            ({'ids': ['x'], 'action': 'approve'}, 'ids must be integers'),
+                            ({'ids': [True], 'action': 'approve'}, 'ids must be integers'),
+                            ({'ids': [1.9], 'action': 'approve'}, 'ids must be integers'),
+                            ({'ids': ['1'], 'action': 'approve'}, 'ids must be integers')):
+            with self.subTest(body=body):
+                response = client.post('/api/manager/requests/bulk/', body, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.data['error'].startswith(error), response.data)
+
+
+class AuditTrailTests(TeamMixin, TestCase):
+    """Check that changes are recorded in the audit trail and embedded in the detail views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+
+    def test_changes_are_recorded_with_one_insert(self):
+        client = self.client_for(self.manager)
+        pk = self.travel_request.pk
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.put(f'/api/manager/requests/{pk}/update/',
+                                  {'manager_note': 'Book early', 'destination': 'Rome'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        inserts = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].startswith(f'INSERT INTO "{TravelRequestEvent._meta.db_table}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(client.post(f'/api/manager/requests/{pk}/approve/').status_code, 200)
+        events = list(TravelRequestEvent.objects.filter(travel_request_id=pk).order_by('id'))
+        self.assertEqual([event.action for event in events], ['created', 'updated', 'approve'])
+        self.assertEqual(events[1].changes, {'manager_note': 'Book early', 'destination': 'Rome'})
+        self.assertEqual((events[1].note, events[1].actor_role), ('Book early', 'manager'))
+        self.assertEqual(events[1].actor.username, self.manager.email)
+        self.assertEqual((events[2].from_status, events[2].to_status), ('pending', 'approved'))
+
+    def test_reads_run_outside_transactions(self):
+        pk = self.travel_request.pk
+        for profile, path in ((self.employee, '/api/employee/requests/'),
+                              (self.employee, f'/api/employee/requests/{pk}/'),
+                              (self.admin, f'/api/myadmin/employees/{self.employee.pk}/'),
+                              (self.admin, f'/api/myadmin/managers/{self.manager.pk}/')):
+            with self.subTest(path=path), CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client_for(profile).get(path).status_code, 200)
+                # Inside the test case's transaction, atomic() would show up as a savepoint.
+                self.assertFalse([q for q in ctx.captured_queries if 'SAVEPOINT' in q['sql']])
+
+    def test_rejected_change_is_not_recorded(self):
+        client = self.client_for(self.manager)
+        pk = self.travel_request.pk
+        response = client.put(f'/api/manager/requests/{pk}/update/', {'manager_note': 'x', 'version': 7},
+                              format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(TravelRequestEvent.objects.filter(travel_request_id=pk, action='updated').exists())
+
+    def test_detail_embeds_timeline(self):
+        client = self.client_for(self.manager)
+        pk = self.travel_request.pk
+        client.post(f'/api/manager/requests/{pk}/reject/', {'manager_note': 'Over budget'}, format='json')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'/api/manager/requests/{pk}/', {'timeline': 'true'})
+        self.assertEqual(response.status_code, 200)
+        event_queries = [q for q in ctx.captured_queries if TravelRequestEvent._meta.db_table in q['sql']]
+        self.assertEqual(len(event_queries), 1)
+        timeline = response.json()['timeline']
+        self.assertEqual([(event['action'], event['note']) for event in timeline],
+                         [('created', None), ('reject', 'Over budget')])
+        plain = client.get(f'/api/manager/requests/{pk}/')
+        self.assertNotIn('timeline', plain.json())
+        self.assertNotEqual(plain['ETag'], response['ETag'])
+
+
+class ArchiveTests(TeamMixin, TestCase):
+    """Check the archive command and that the admin list reads the archive when its date filters reach it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        statuses = ['closed', 'rejected', 'approved', 'closed', 'pending', 'rejected']
+        for day, request_status in enumerate(statuses, 1):
+            travel_request = make_travel_request(
+                cls.employee, from_date=datetime.date(2024, 1, day), to_date=datetime.date(2024, 2, day),
+                status=request_status, is_closed=request_status == 'closed')
+            # The last request was only finished recently.
+            age = 1 if day == len(statuses) else 400
+            TravelRequests.objects.filter(pk=travel_request.pk).update(
+                updated_at=timezone.now() - datetime.timedelta(days=age))
+
+    def counts(self):
+        return sorted(TravelRequestCounter.objects.exclude(dimension=counters.VERSION)
+                      .values_list('scope', 'dimension', 'key', 'count'))
+
+    def test_archive_moves_finished_requests_in_batches(self):
+        counts = self.counts()
+        call_command('archive_travel_requests', days=30, batch_size=2, stdout=io.StringIO())
+        self.assertEqual(sorted(ArchivedTravelRequests.objects.values_list('status', flat=True)),
+                         ['closed', 'closed', 'rejected'])
+        self.assertEqual(sorted(TravelRequests.objects.values_list('status', flat=True)),
+                         ['approved', 'pending', 'rejected'])
+        self.assertEqual(TravelRequestEvent.objects.filter(action='archived').count(), 3)
+        # Archived requests still count on the dashboards.
+        self.assertEqual(self.counts(), counts)
+        counters.rebuild()
+        self.assertEqual(self.counts(), counts)
+
+    def test_admin_list_reads_archive_for_old_dates(self):
+        client = self.client_for(self.admin)
+        everything = client.get('/api/myadmin/requests/', {'from_date': '2024-01-01', 'sort_by': '-from_date'}).json()
+        call_command('archive_travel_requests', days=30, stdout=io.StringIO())
+        self.assertEqual(len(client.get('/api/myadmin/requests/').json()), 3)
+        response = client.get('/api/myadmin/requests/', {'from_date': '2024-01-01', 'sort_by': '-from_date'})
+        self.assertEqual(response.json(), everything)
+        pages, cursor = [], None
+        while True:
+            params = {'from_date': '2024-01-01', 'sort_by': '-from_date', 'page_size': 4}
+            if cursor:
+                params['cursor'] = cursor
+            page = client.get('/api/myadmin/requests/', params).json()
+            pages.extend(page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(pages, everything)
+        with CaptureQueriesContext(connection) as ctx:
+            recent = client.get('/api/myadmin/requests/', {'from_date': '2024-01-05'}).json()
+        self.assertEqual([row['status'] for row in recent], ['pending', 'rejected'])
+        archive_reads = [q for q in ctx.captured_queries
+                         if f'FROM "{ArchivedTravelRequests._meta.db_table}"' in q['sql']]
+        self.assertEqual(len(archive_reads), 1)
+
+
+class RequestStatsTests(TeamMixin, TestCase):
+    """Check the per-route statistics, the query budget warning and the Prometheus endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.travel_request = make_travel_request(cls.employee)
+
+    def setUp(self):
+        request_stats.reset()
+
+    def test_queries_are_counted_per_route(self):
+        client = self.client_for(self.admin)
+        pk = self.travel_request.pk
+        client.get(f'/api/myadmin/requests/{pk}/')
+        client.get(f'/api/myadmin/requests/{pk}/')
+        stats = request_stats.snapshot()[('api/myadmin/requests/<int:pk>/', 'GET')]
+        self.assertEqual(stats['count'], 2)
+        # Each detail GET reads updated_at, then the row.
+        self.assertEqual(stats['queries_sum'], 4)
+
+    def test_query_budget_is_logged_and_exported(self):
+        client = self.client_for(self.manager)
+        with override_settings(QUERY_BUDGET=1), self.assertLogs('TravelRequest.instrumentation', 'WARNING') as logs:
+            client.post(f'/api/manager/requests/{self.travel_request.pk}/approve/')
+        self.assertIn('api/manager/requests/<int:pk>/approve/', logs.output[0])
+        response = client.get('/api/myadmin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('travelrequest_query_budget_exceeded_total'
+                      '{route="api/manager/requests/<int:pk>/approve/",method="POST"} 1', body)
+        self.assertIn('travelrequest_request_duration_seconds_count'
+                      '{route="api/manager/requests/<int:pk>/approve/",method="POST"} 1', body)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Call every route in urls.py and pin the number of SQL queries it runs.
+
+    Each endpoint is called on a small dataset, then again after grow() has
+    added many more requests, employees and managers (and after the input of
+    bulk endpoints has grown); both calls must run exactly the same number of
+    queries. A change to views.py that adds queries, or makes them depend on
+    the number of rows, fails here; update the budget only when the new count
+    is intended.
+
+    Clients are force-authenticated and the profile, token and response caches
+    are cleared before every measured call, so the counts include the profile
+    lookup but not token authentication (except for the login / logout and
+    event stream endpoints, which handle tokens themselves).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_manager()
+        cls.employee = make_employee(cls.manager)
+        cls.admin = make_admin()
+        cls.manager_user = make_user(cls.manager)
+        cls.employee_user = make_user(cls.employee)
+        cls.admin_user = make_user(cls.admin)
+        for request_status in ('pending', 'approved', 'rejected', 'FI_required'):
+            make_travel_request(cls.employee, status=request_status)
+        make_travel_request(cls.employee, status='closed', processed_by=cls.admin)
+
+    def setUp(self):
+        self.scale = 1
+        # Done once per database: keep it out of the measured calls.
+        trigram_index_available()
+        self.employee_client = APIClient()
+        self.employee_client.force_authenticate(self.employee_user)
+        self.manager_client = APIClient()
+        self.manager_client.force_authenticate(self.manager_user)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin_user)
+
+    def grow(self):
+        """Multiply the size of the dataset (and of scale-dependent inputs) by ten."""
+        self.scale = 10
+        for _ in range(5):
+            other = make_employee(make_manager())
+            make_travel_request(other)
+        for n in range(50):
+            make_travel_request(self.employee, status=('pending', 'approved', 'rejected')[n % 3])
+
+    def assertQueryBudget(self, budget, call, prepare=tuple):
+        """
+        Check that call(*prepare()) runs exactly budget queries before and after grow().
+
+        prepare() runs outside the measurement, e.g. to create the request to approve.
+
+        Returns:
+            The response of the second call.
+        """
+        for grown in (False, True):
+            if grown:
+                self.grow()
+            args = prepare()
+            profile_cache.clear()
+            get_token_cache().clear()
+            get_response_cache().clear()
+            with self.assertNumQueries(budget):
+                response = call(*args)
+            self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+        return response
+
+    def pending_request(self):
+        return (make_travel_request(self.employee).pk,)
+
+    def profile_lines(self):
+        """Return a JSON Lines body importing 2 * scale new employees."""
+        rows = ({'first_name': 'Imp', 'last_name': f'Ort{next(_sequence)}', 'email': f'import{next(_sequence)}@example.com',
+                 'password': 'x', 'manager': self.manager.pk} for _ in range(2 * self.scale))
+        return ('\n'.join(json.dumps(row) for row in rows),)
+
+    # Authentication
+
+    def test_login(self):
+        Token.objects.create(user=self.employee_user)
+        self.assertQueryBudget(2, lambda: APIClient().post(
+            '/api/login/', {'username': self.employee_user.username, 'password': 'secret-password'}, format='json'))
+
+    def test_logout(self):
+        def prepare():
+            client = APIClient()
+            client.force_authenticate(self.employee_user, Token.objects.create(user=self.employee_user))
+            return (client,)
+        self.assertQueryBudget(1, lambda client: client.post('/api/logout/'), prepare)
+
+    # Employee endpoints
+
+    def test_employee_list(self):
+        response = self.assertQueryBudget(3, lambda: self.employee_client.get('/api/employee/requests/'))
+        self.assertEqual(len(response.json()), 55)
+
+    def test_employee_create(self):
+        data = {'employee': self.employee.pk, 'manager': self.manager.pk, 'location': 'Berlin', 'destination': 'Paris',
+                'travel_mode': 'Train', 'purpose_of_travel': 'Conference'}
+        self.assertQueryBudget(8, lambda: self.employee_client.post('/api/employee/requests/', data, format='json'))
+
+    def test_employee_detail(self):
+        pk = self.employee.travelrequests_set.first().pk
+        self.assertQueryBudget(3, lambda: self.employee_client.get(f'/api/employee/requests/{pk}/'))
+
+    def test_employee_update(self):
+        self.assertQueryBudget(7, lambda pk: self.employee_client.put(
+            f'/api/employee/requests/{pk}/', {'purpose_of_travel': 'Training'}, format='json'), self.pending_request)
+
+    def test_employee_resubmit(self):
+        self.assertQueryBudget(8, lambda pk: self.employee_client.put(
+            f'/api/employee/requests/{pk}/', {'further_information': 'Agenda'}, format='json'),
+            lambda: (make_travel_request(self.employee, status='FI_required').pk,))
+
+    def test_employee_delete(self):
+        self.assertQueryBudget(7, lambda pk: self.employee_client.delete(f'/api/employee/requests/{pk}/'),
+                               self.pending_request)
+
+    # Manager endpoints
+
+    def test_manager_list(self):
+        response = self.assertQueryBudget(3, lambda: self.manager_client.get('/api/manager/requests/'))
+        self.assertEqual(len(response.json()), 55)
+
+    def test_manager_list_filtered_page(self):
+        params = {'status': 'pending', 'name': 'Eli', 'sort_by': '-created_at', 'page_size': 10}
+        self.assertQueryBudget(3, lambda: self.manager_client.get('/api/manager/requests/', params))
+
+    def test_manager_dashboard(self):
+        self.assertQueryBudget(2, lambda: self.manager_client.get('/api/manager/dashboard/'))
+
+    def test_manager_detail(self):
+        pk = self.employee.travelrequests_set.first().pk
+        self.assertQueryBudget(4, lambda: self.manager_client.get(f'/api/manager/requests/{pk}/', {'timeline': 'true'}))
+
+    def test_manager_transitions(self):
+        for action in ('approve', 'reject', 'fi_request'):
+            with self.subTest(action=action):
+                self.assertQueryBudget(6, lambda pk: self.manager_client.post(
+                    f'/api/manager/requests/{pk}/{action}/', {'manager_note': 'Noted'}, format='json'),
+                    self.pending_request)
+
+    def test_manager_update(self):
+        self.assertQueryBudget(7, lambda pk: self.manager_client.put(
+            f'/api/manager/requests/{pk}/update/', {'manager_note': 'Book early'}, format='json'), self.pending_request)
+
+    def test_manager_bulk_action(self):
+        def prepare():
+            ids = [make_travel_request(self.employee).pk for _ in range(2 * self.scale)]
+            return (ids + [0],)
+        response = self.assertQueryBudget(7, lambda ids: self.manager_client.post(
+            '/api/manager/requests/bulk/', {'ids': ids, 'action': 'approve'}, format='json'), prepare)
+        self.assertEqual(response.data['updated'], 20)
+
+    # Admin endpoints for requests
+
+    def test_admin_list(self):
+        response = self.assertQueryBudget(2, lambda: self.admin_client.get('/api/myadmin/requests/'))
+        self.assertEqual(len(response.json()), 60)
+
+    def test_expanded_lists_and_details(self):
+        expand = {'expand': 'employee,manager,processed_by'}
+        self.assertQueryBudget(3, lambda: self.manager_client.get('/api/manager/requests/', expand))
+        self.assertQueryBudget(3, lambda: self.manager_client.get('/api/manager/requests/', {**expand, 'page_size': 10}))
+        self.assertQueryBudget(2, lambda: self.admin_client.get('/api/myadmin/requests/', expand))
+        self.assertQueryBudget(3, lambda: self.employee_client.get('/api/employee/requests/', expand))
+        pk = TravelRequests.objects.filter(processed_by__isnull=False).values_list('pk', flat=True).get()
+        self.assertQueryBudget(1, lambda: self.admin_client.get(f'/api/myadmin/requests/{pk}/', expand))
+        self.assertQueryBudget(3, lambda: self.manager_client.get(f'/api/manager/requests/{pk}/',
+                                                                  {**expand, 'timeline': 'true'}))
+
+    def test_admin_list_with_archive(self):
+        ArchivedTravelRequests.objects.create(
+            id=10 ** 9, employee=self.employee, manager=self.manager, from_date=datetime.date(2020, 1, 1),
+            to_date=datetime.date(2020, 1, 5), location='Berlin', destination='Paris', travel_mode='Train',
+            purpose_of_travel='Conference', status='closed', is_closed=True, created_at=timezone.now(),
+            updated_at=timezone.now())
+        params = {'from_date': '2019-01-01', 'to_date': '2030-01-01', 'sort_by': 'from_date'}
+        response = self.assertQueryBudget(5, lambda: self.admin_client.get('/api/myadmin/requests/', params))
+        self.assertEqual(len(response.json()), 61)
+
+    def test_admin_export(self):
+        def export():
+            response = self.admin_client.get('/api/myadmin/requests/export/', {'export_format': 'csv'})
+            response.rows = b''.join(response.streaming_content).count(b'\n')
+            return response
+        response = self.assertQueryBudget(1, export)
+        self.assertEqual(response.rows, 61)
+
+    def test_admin_dashboard(self):
+        self.assertQueryBudget(1, lambda: self.admin_client.get('/api/myadmin/dashboard/'))
+
+    def test_admin_detail(self):
+        pk = self.employee.travelrequests_set.first().pk
+        self.assertQueryBudget(2, lambda: self.admin_client.get(f'/api/myadmin/requests/{pk}/'))
+
+    def test_admin_close(self):
+        self.assertQueryBudget(5, lambda pk: self.admin_client.post(f'/api/myadmin/requests/{pk}/close/'),
+                               lambda: (make_travel_request(self.employee, status='approved').pk,))
+
+    def test_admin_update(self):
+        self.assertQueryBudget(6, lambda pk: self.admin_client.put(
+            f'/api/myadmin/requests/{pk}/update/', {'admin_note': 'Booked'}, format='json'), self.pending_request)
+
+    # Admin endpoints for employees and managers
+
+    def test_admin_employees(self):
+        data = lambda: {'first_name': 'New', 'last_name': 'Hire', 'email': f'hire{next(_sequence)}@example.com',
+                        'password': 'x', 'manager': self.manager.pk}
+        self.assertQueryBudget(1, lambda: self.admin_client.get('/api/myadmin/employees/'))
+        self.assertQueryBudget(5, lambda body: self.admin_client.post('/api/myadmin/employees/', body, format='json'),
+                               lambda: (data(),))
+        self.assertQueryBudget(1, lambda: self.admin_client.get(f'/api/myadmin/employees/{self.employee.pk}/'))
+        self.assertQueryBudget(5, lambda: self.admin_client.put(
+            f'/api/myadmin/employees/{self.employee.pk}/', {'last_name': 'Roy'}, format='json'))
+        self.assertQueryBudget(6, lambda pk: self.admin_client.delete(f'/api/myadmin/employees/{pk}/'),
+                               lambda: (make_employee(self.manager).pk,))
+
+    def test_admin_managers(self):
+        data = lambda: {'first_name': 'New', 'last_name': 'Boss', 'email': f'boss{next(_sequence)}@example.com',
+                        'password': 'x'}
+        self.assertQueryBudget(1, lambda: self.admin_client.get('/api/myadmin/managers/'))
+        self.assertQueryBudget(4, lambda body: self.admin_client.post('/api/myadmin/managers/', body, format='json'),
+                               lambda: (data(),))
+        self.assertQueryBudget(1, lambda: self.admin_client.get(f'/api/myadmin/managers/{self.manager.pk}/'))
+        self.assertQueryBudget(5, lambda: self.admin_client.put(
+            f'/api/myadmin/managers/{self.manager.pk}/', {'department': 'Travel'}, format='json'))
+        self.assertQueryBudget(7, lambda pk: self.admin_client.delete(f'/api/myadmin/managers/{pk}/'),
+                               lambda: (make_manager().pk,))
+
+    def test_admin_imports(self):
+        for kind, budget in (('employees', 7), ('managers', 6)):
+            with self.subTest(kind=kind):
+                self.assertQueryBudget(budget, lambda body: self.admin_client.generic(
+                    'POST', f'/api/myadmin/{kind}/import/', body, 'application/x-ndjson'), self.profile_lines)
+
+    def test_admin_monitoring(self):
+        self.assertQueryBudget(0, lambda: self.admin_client.get('/api/myadmin/cache_stats/'))
+        self.assertQueryBudget(0, lambda: self.admin_client.get('/api/myadmin/metrics/'))
+
+    # Event streams
+
+    def test_event_streams(self):
+        async def subscribe(url, token):
+            response = await self.async_client.get(url, headers={'Authorization': f'Token {token.key}'})
+            response.close()
+            return response
+        for url, user in (('/api/employee/events/', self.employee_user), ('/api/manager/events/', self.manager_user),
+                          ('/api/myadmin/events/', self.admin_user)):
+            with self.subTest(url=url):
+                token = Token.objects.get_or_create(user=user)[0]
+                self.assertQueryBudget(2, lambda: async_to_sync(subscribe)(url, token))
+
+
+class ProfileImportTests(TeamMixin, TestCase):
+    """Check the per-row report of the bulk profile import."""
+
+    def row(self, email, **fields):
+        return json.dumps({'first_name': 'Imp', 'last_name': 'Ort', 'email': email, 'password': 'x',
+                           'manager': self.manager.pk, **fields})
+
+    def test_reports_errors_per_row(self):
+        body = '\n'.join([
+            self.row('new1@example.com'),
+            '{not json',
+            '[1, 2]',
+            self.row(self.employee.email),
+            self.row('new1@example.com'),
+            self.row('new2@example.com', manager=999999),
+            json.dumps({'first_name': 'Imp', 'email': 'new3@example.com'}),
+            '',
+            self.row('new4@example.com'),
+        ])
+        response = self.client_for(self.admin).generic('POST', '/api/myadmin/employees/import/', body,
+                                                       'application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['users_created']), (2, 2))
+        errors = {error['row']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6, 7])
+        self.assertTrue(errors[2]['non_field_errors'][0].startswith('Invalid JSON'))
+        self.assertEqual(errors[3], {'non_field_errors': ['Expected a JSON object']})
+        self.assertIn('already exists', errors[4]['email'][0])
+        self.assertIn('already exists', errors[5]['email'][0])
+        self.assertIn('manager', errors[6])
+        self.assertEqual(set(errors[7]), {'last_name', 'password'})
+        self.assertEqual(set(Employees.objects.filter(email__startswith='new').values_list('email', flat=True)),
+                         {'new1@example.com', 'new4@example.com'})
+        self.assertTrue(User.objects.filter(username='new4@example.com').exists())
+
+    def test_email_taken_during_the_import_is_a_row_error(self):
+        test = self
+
+        class RacingImporter(ProfileImporter):
+            # Another import inserts an email after this one checked it.
+            def make_serializer(self, data, related):
+                if data['email'] == 'race@example.com' and not Employees.objects.filter(email=data['email']).exists():
+                    make_employee(test.manager, email=data['email'])
+                return super().make_serializer(data, related)
+
+        lines = [self.row('ok1@example.com'), self.row('race@example.com'), self.row('ok2@example.com')]
+        report = RacingImporter(EmployeeSerializer).run(iter_rows(lines, 'jsonl'))
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'],
+                         [{'row': 2, 'errors': {'email': ['employees with this email already exists.']}}])
+        self.assertEqual(Employees.objects.filter(email__in=['ok1@example.com', 'ok2@example.com']).count(), 2)
+
+
+class ProfileCacheTests(TeamMixin, TestCase):
+    """Check that cached profile lookups follow profile changes."""
+
+    def setUp(self):
+        profile_cache.clear()
+        self.user = make_user(self.employee)
+
+    def test_saving_or_deleting_a_profile_invalidates_the_cache(self):
+        self.assertIsNone(resolve_profile(self.user, 'manager'))
+        manager = make_manager(email=self.employee.email)
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_profile(self.user, 'manager'), manager.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_profile(self.user, 'manager'), manager.pk)
+        manager.email = 'moved@example.com'
+        manager.save()
+        self.assertIsNone(resolve_profile(self.user, 'manager'))
+        self.assertEqual(resolve_profile(self.user, 'employee'), self.employee.pk)
+        self.employee.delete()
+        self.assertIsNone(resolve_profile(self.user, 'employee'))
+
+    def test_lookups_overtaken_by_a_clear_are_not_cached(self):
+        generation = profile_cache.generation
+        self.assertEqual(profile_cache.get(self.user.pk, self.user.email, 'manager'), (False, None))
+        profile_cache.clear()
+        profile_cache.set(self.user.pk, self.user.email, 'manager', None, generation)
+        self.assertEqual(profile_cache.get(self.user.pk, self.user.email, 'manager'), (False, None))
+        profile_cache.set(self.user.pk, self.user.email, 'manager', None, profile_cache.generation)
+        self.assertEqual(profile_cache.get(self.user.pk, self.user.email, 'manager'), (True, None))
+
+
+class EmployeeNameSearchTests(TeamMixin, TestCase):
+    """Check that the trigram index finds the same requests as the icontains filter."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for first_name, last_name in (('Eli', 'Ray'), ('Ann', 'Lee'), ('Elias', 'Roe'), ('Dana', 'Bell'),
+                                      ('Li', 'O"Neil'), ('Ray', 'Ellis')):
+            make_travel_request(make_employee(cls.manager, first_name=first_name, last_name=last_name))
+
+    def test_same_rows_as_icontains(self):
+        if not trigram_index_available():
+            self.skipTest('no employee name trigram index on this database')
+        for term in ('e', 'E', 'li', 'Li', 'Eli', 'ELI', 'ell', 'ray', 'Ray Ellis', 'ann lee', 'ias', 'o"n', 'xyz',
+                     '%', '_a'):
+            with self.subTest(term=term):
+                qs = TravelRequests.objects.all()
+                fallback = qs.filter(Q(employee__first_name__icontains=term) | Q(employee__last_name__icontains=term))
+                filtered = filter_by_employee_name(qs, term)
+                self.assertEqual('MATCH' in str(filtered.query), len(term) >= 3)
+                self.assertEqual(sorted(filtered.values_list('pk', flat=True)),
+                                 sorted(fallback.values_list('pk', flat=True)))
+
+
+class PaginationTests(TeamMixin, TestCase):
+    """Walk the paginated lists with their cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Ties and NULLs in from_date, which the pages must neither repeat nor skip.
+        days = (3, None, 1, 3, None, 2, 3)
+        cls.requests = [make_travel_request(cls.employee, from_date=day and datetime.date(2025, 1, day))
+                        for day in days]
+        ArchivedTravelRequests.objects.create(
+            id=10 ** 9, employee=cls.employee, manager=cls.manager, from_date=datetime.date(2025, 1, 2),
+            to_date=datetime.date(2025, 2, 2), location='Berlin', destination='Oslo', travel_mode='Train',
+            purpose_of_travel='Conference', status='closed', is_closed=True, created_at=timezone.now(),
+            updated_at=timezone.now())
+
+    def expected_ids(self, sort_by, rows=None):
+        """Return the ids of rows ordered as sorted_query() orders them: NULLs first ascending, last descending."""
+        field = sort_by.lstrip('-')
+        rows = [(getattr(row, field), row.pk) for row in rows or self.requests]
+        present = sorted(row for row in rows if row[0] is not None)
+        missing = sorted(row for row in rows if row[0] is None)
+        if sort_by.startswith('-'):
+            return [pk for _, pk in present[::-1] + missing[::-1]]
+        return [pk for _, pk in missing + present]
+
+    def walk(self, client, url, params, page_size=2):
+        ids, cursor, pages = [], '', 0
+        while True:
+            response = client.get(url, dict(params, page_size=page_size, cursor=cursor))
+            self.assertEqual(response.status_code, 200, response.content)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), page_size)
+            ids.extend(row['id'] for row in data['results'])
+            pages += 1
+            if not data['next_cursor']:
+                return ids, pages
+            cursor = data['next_cursor']
+
+    def test_walks_every_sort(self):
+        client = self.client_for(self.manager)
+        for sort_by in ('from_date', '-from_date', 'created_at', '-created_at', 'id', '-id'):
+            with self.subTest(sort_by=sort_by):
+                ids, pages = self.walk(client, '/api/manager/requests/', {'sort_by': sort_by})
+                self.assertEqual(ids, self.expected_ids(sort_by))
+                self.assertEqual(pages, 4)
+                # The same order as the unpaginated list.
+                unpaginated = client.get('/api/manager/requests/', {'sort_by': sort_by}).json()
+                self.assertEqual(ids, [row['id'] for row in unpaginated])
+
+    def test_walks_live_and_archived_requests(self):
+        archived = ArchivedTravelRequests.objects.get()
+        ids, _ = self.walk(self.client_for(self.admin), '/api/myadmin/requests/',
+                           {'from_date': '2025-01-01', 'sort_by': '-from_date'}, page_size=3)
+        dated = [row for row in self.requests if row.from_date]
+        self.assertEqual(ids, self.expected_ids('-from_date', dated + [archived]))
+
+    def test_invalid_cursor_and_page_size(self):
+        client = self.client_for(self.manager)
+        url = '/api/manager/requests/'
+        cursor = client.get(url, {'sort_by': 'from_date', 'page_size': 2}).json()['next_cursor']
+        for params, error in (({'sort_by': '-from_date', 'cursor': cursor}, 'Cursor does not match sort_by'),
+                              ({'cursor': cursor}, 'Cursor does not match sort_by'),
+                              ({'cursor': 'not-a-cursor'}, 'Invalid cursor'),
+                              ({'cursor': 'e30'}, 'Invalid cursor'),
+                              ({'cursor': encode_cursor('created_at', {}, 1)}, 'Invalid cursor'),
+                              ({'sort_by': 'from_date', 'cursor': encode_cursor('from_date', [], 1)}, 'Invalid cursor'),
+                              ({'page_size': 'ten'}, 'page_size must be an integer'),
+                              ({'page_size': '0'}, 'page_size must be positive')):
+            with self.subTest(params=params):
+                response = client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': error})
+
+
+class ValuesSerializerTests(TeamMixin, TestCase):
+    """Check that the values_list() fast path renders exactly what the ModelSerializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # One request with every optional field NULL, one with every field set.
+        make_travel_request(cls.employee, from_date=None, to_date=None, manager_note=None, admin_note=None,
+                            further_information=None)
+        travel_request = make_travel_request(cls.employee, status='closed', is_closed=True, processed_by=cls.admin,
+                                             manager_note='Book early', admin_note='Done', further_information='-')
+        TravelRequestEvent.objects.create(travel_request_id=travel_request.pk, action='close', from_status='approved',
+                                          to_status='closed', changes={'admin_note': 'Done'}, actor_role='admin')
+        TravelRequestEvent.objects.create(travel_request_id=travel_request.pk, action='updated')
+
+    def assertSameOutput(self, reader, serializer_class, qs):
+        expected = serializer_class(qs, many=True).data
+        data = reader.serialize(qs)
+        self.assertEqual(data, expected)
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_output_matches_the_model_serializers(self):
+        with self.settings(TIME_ZONE='Asia/Kolkata'):
+            self.assertTrue(TravelRequestValuesSerializer().serialize(TravelRequests.objects.all())[0]['created_at']
+                            .endswith('+05:30'))
+        for time_zone in ('UTC', 'Asia/Kolkata', 'America/New_York'):
+            with self.subTest(time_zone=time_zone), self.settings(TIME_ZONE=time_zone):
+                self.assertSameOutput(TravelRequestValuesSerializer(), TravelRequestSerializer,
+                                      TravelRequests.objects.order_by('id'))
+                self.assertSameOutput(TravelRequestEventValuesSerializer(), TravelRequestEventSerializer,
+                                      TravelRequestEvent.objects.order_by('id'))
+
+
+class ExportTests(TeamMixin, TestCase):
+    """Check the rows streamed by the admin export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.paris = make_travel_request(cls.employee, from_date=datetime.date(2025, 3, 1),
+                                        to_date=datetime.date(2025, 3, 4), destination='Paris')
+        cls.rome = make_travel_request(cls.employee, from_date=datetime.date(2025, 1, 10),
+                                       to_date=datetime.date(2025, 1, 12), destination='Rome', status='approved')
+        cls.archived = ArchivedTravelRequests.objects.create(
+            id=10 ** 9, employee=cls.employee, manager=cls.manager, from_date=datetime.date(2020, 1, 1),
+            to_date=datetime.date(2020, 1, 5), location='Berlin', destination='Oslo', travel_mode='Train',
+            purpose_of_travel='Conference', status='closed', is_closed=True, created_at=timezone.now(),
+            updated_at=timezone.now())
+
+    def export(self, **params):
+        response = self.client_for(self.admin).get('/api/myadmin/requests/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_rows_are_the_serialized_requests(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        # Without date filters, only live requests are exported, by id.
+        expected = json.loads(JSONRenderer().render(TravelRequestSerializer([self.paris, self.rome], many=True).data))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
+    def test_csv_rows(self):
+        response, body = self.export(export_format='csv', sort_by='-from_date')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(list(rows[0]), list(TravelRequestSerializer().fields))
+        self.assertEqual([(row['id'], row['destination'], row['status']) for row in rows],
+                         [(str(self.paris.pk), 'Paris', 'pending'), (str(self.rome.pk), 'Rome', 'approved')])
+        self.assertEqual((rows[0]['from_date'], rows[0]['processed_by']), ('2025-03-01', ''))
+
+    def test_filters_and_archived_rows(self):
+        _, body = self.export(from_date='2019-06-01', sort_by='from_date')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.archived.pk, self.rome.pk, self.paris.pk])
+        self.assertEqual(rows[0]['destination'], 'Oslo')
+        _, body = self.export(from_date='2019-06-01', status='approved')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.rome.pk])
+        _, body = self.export(from_date='2025-02-01')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.paris.pk])
+
+
+class GenerateBenchmarkDataTests(TestCase):
+    """Check the synthetic data generator used by benchmarks/endpoints.py."""
+
+    def test_generates_consistent_data_and_adds_on_rerun(self):
+        for _ in range(2):
+            call_command('generate_benchmark_data', managers=3, employees=20, admins=2, requests=300, batch_size=64,
+                         stdout=io.StringIO())
+        self.assertEqual((Managers.objects.count(), Employees.objects.count(), Admins.objects.count()), (6, 40, 4))
+        self.assertEqual(TravelRequests.objects.count(), 600)
+        self.assertFalse(TravelRequests.objects.exclude(manager=F('employee__manager')).exists())
+        self.assertFalse(TravelRequests.objects.filter(to_date__lt=F('from_date')).exists())
+        closed = TravelRequests.objects.filter(status='closed')
+        self.assertEqual(closed.count(), closed.filter(is_closed=True, processed_by__isnull=False).count())
+        self.assertGreater(TravelRequests.objects.values('status').distinct().count(), 3)
+        counts = sorted(TravelRequestCounter.objects.exclude(dimension=counters.VERSION)
+                        .values_list('scope', 'dimension', 'key', 'count'))
+        counters.rebuild()
+        self.assertEqual(counts, sorted(TravelRequestCounter.objects.exclude(dimension=counters.VERSION)
+                                        .values_list('scope', 'dimension', 'key', 'count')))
+
+
+@override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal', 'synchronous': 'normal', 'busy_timeout': 5000})
+class SQLiteProfileTests(SimpleTestCase):
+    """Check the PRAGMAs and the writer serialization of the production database profile."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+
+    def connect(self):
+        settings_dict = dict(connection.settings_dict, ENGINE='TravelRequest.sqlite', NAME=self.path)
+        return load_backend('TravelRequest.sqlite').DatabaseWrapper(settings_dict, 'profile-test')
+
+    def test_new_connections_get_the_pragmas(self):
+        db = self.connect()
+        try:
+            with db.cursor() as cursor:
+                values = [cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                          for name in ('journal_mode', 'synchronous', 'busy_timeout')]
+        finally:
+            db.close()
+        self.assertEqual(values, ['wal', 1, 5000])
+
+    def test_transactions_take_the_write_lock_in_turn(self):
+        order = []
+        holding = threading.Event()
+
+        def run(name, setup=None):
+            db = self.connect()
+            db._start_transaction_under_autocommit()
+            order.append(f'{name} begins')
+            if setup:
+                setup(db)
+            order.append(f'{name} commits')
+            db.commit()
+            db.close()
+
+        def first(db):
+            db.cursor().execute('CREATE TABLE t (n integer)')
+            holding.set()
+            time.sleep(0.2)
+
+        threads = [threading.Thread(target=run, args=('first', first)),
+                   threading.Thread(target=lambda: holding.wait() and run('second'))]
+        for thread in threads:
+            thread.start()
+        holding.wait()
+        self.assertTrue(writer_lock(self.path).locked())
+        # BEGIN IMMEDIATE took SQLite's write lock: other processes wait for it too.
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            sqlite3.connect(self.path, timeout=0, isolation_level=None).execute('BEGIN IMMEDIATE')
+        for thread in threads:
+            thread.join()
+        self.assertFalse(writer_lock(self.path).locked())
+        self.assertEqual(order, ['first begins', 'first commits', 'second begins', 'second commits'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TestCase):
+    """Check which database ReplicaRouter picks within requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username='mia@example.com', email='mia@example.com', password='x')
+        self.admin = User.objects.create_user(username='ada@example.com', email='ada@example.com', password='x')
+
+    def route(self, method, user, write=False):
+        """Run a request through ReplicaRoutingMiddleware; return the databases its reads would use."""
+        router = ReplicaRouter()
+
+        def view(request):
+            request.user = user  # as set by DRF authentication
+            request.databases = [router.db_for_read(Token), router.db_for_read(TravelRequests)]
+            if write:
+                router.db_for_write(TravelRequests)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/api/manager/requests/')
+        ReplicaRoutingMiddleware(view)(request)
+        return request.databases
+
+    def test_reads_use_the_replica_until_the_user_writes(self):
+        self.assertEqual(self.route('get', self.manager), [None, 'replica1'])
+        self.assertEqual(self.route('post', self.manager), [None, None])
+        self.assertEqual(self.route('get', self.manager), [None, 'replica1'])
+        self.route('post', self.manager, write=True)
+        # Read-your-writes: the manager reads the primary, other users keep using the replica.
+        self.assertEqual(self.route('get', self.manager), [None, None])
+        self.assertEqual(self.route('get', self.admin), [None, 'replica1'])
+        cache.clear()
+        self.assertEqual(self.route('get', self.manager), [None, 'replica1'])
+
+    def test_replicas_are_never_migrated_or_written(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica1', 'TravelRequest'))
+        self.assertIsNone(router.allow_migrate('default', 'TravelRequest'))
+        self.assertEqual(router.db_for_write(TravelRequests), 'default')
+        self.assertIsNone(router.db_for_read(TravelRequests))
+
+
+class ResponseCacheTests(TestCase):
+    """Check that list responses are shared per scope and invalidated by changes to their requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager, cls.other_manager = make_manager(), make_manager()
+        cls.employee = make_employee(cls.manager)
+        cls.other_employee = make_employee(cls.other_manager)
+        cls.admin = make_admin()
+        for employee in (cls.employee, cls.employee, cls.other_employee):
+            make_travel_request(employee)
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.manager_client = APIClient()
+        self.manager_client.force_authenticate(make_user(self.manager))
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(make_user(self.admin))
+
+    def list(self, client, path):
+        """Return the body of a list call and whether it was served from the cache."""
+        hits = response_cache_stats.hits
+        response = client.get(path, {'status': 'pending', 'sort_by': '-from_date'})
+        self.assertEqual(response.status_code, 200)
+        return response.content, response_cache_stats.hits > hits
+
+    def test_repeated_lists_are_served_from_the_cache(self):
+        for client, path in ((self.manager_client, '/api/manager/requests/'),
+                             (self.admin_client, '/api/myadmin/requests/')):
+            body, cached = self.list(client, path)
+            self.assertFalse(cached)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.list(client, path), (body, True))
+            self.assertFalse(any('TravelRequest_travelrequests' in query['sql'] for query in queries))
+            self.assertEqual(len(json.loads(body)), 2 if path.startswith('/api/manager') else 3)
+
+    def test_changes_invalidate_only_their_scopes(self):
+        manager_body, _ = self.list(self.manager_client, '/api/manager/requests/')
+        admin_body, _ = self.list(self.admin_client, '/api/myadmin/requests/')
+        make_travel_request(self.other_employee)
+        self.assertEqual(self.list(self.manager_client, '/api/manager/requests/'), (manager_body, True))
+        self.assertFalse(self.list(self.admin_client, '/api/myadmin/requests/')[1])
+        make_travel_request(self.employee)
+        body, cached = self.list(self.manager_client, '/api/manager/requests/')
+        self.assertFalse(cached)
+        self.assertEqual(len(json.loads(body)), 3)
+
+    def test_hit_rate_is_reported(self):
+        self.list(self.manager_client, '/api/manager/requests/')
+        self.list(self.manager_client, '/api/manager/requests/')
+        stats = self.admin_client.get('/api/myadmin/cache_stats/').data['list_response']
+        self.assertGreaterEqual(stats['hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+
+
+class ExpansionTests(TestCase):
+    """Check the profile summaries embedded with '?expand='."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_manager(department='Sales')
+        cls.employee = make_employee(cls.manager, department='Field')
+        cls.admin = make_admin()
+        cls.processed = make_travel_request(cls.employee, status='closed', processed_by=cls.admin)
+        cls.pending = make_travel_request(cls.employee)
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(self.admin))
+
+    def test_summaries_are_embedded(self):
+        employee = {'id': self.employee.pk, 'first_name': self.employee.first_name,
+                    'last_name': self.employee.last_name, 'department': 'Field'}
+        manager = {'id': self.manager.pk, 'first_name': self.manager.first_name,
+                   'last_name': self.manager.last_name, 'department': 'Sales'}
+        admin = {'id': self.admin.pk, 'first_name': self.admin.first_name, 'last_name': self.admin.last_name}
+        params = {'expand': 'processed_by,employee,manager', 'sort_by': 'id'}
+        rows = self.client.get('/api/myadmin/requests/', params).json()
+        self.assertEqual([(row['employee'], row['manager'], row['processed_by']) for row in rows],
+                         [(employee, manager, admin), (employee, manager, None)])
+        detail = self.client.get(f'/api/myadmin/requests/{self.processed.pk}/', params).json()
+        self.assertEqual(detail, rows[0])
+        rows = self.client.get('/api/myadmin/requests/', {'expand': 'manager', 'sort_by': 'id'}).json()
+        self.assertEqual((rows[0]['employee'], rows[0]['manager']), (self.employee.pk, manager))
+        self.assertEqual(self.client.get('/api/myadmin/requests/', {'expand': 'employee,status'}).status_code, 400)
+
+    def test_renamed_profiles_invalidate_expanded_responses(self):
+        path = f'/api/myadmin/requests/{self.pending.pk}/'
+        detail = self.client.get(path, {'expand': 'employee'})
+        self.assertNotIn('Last-Modified', detail)
+        expanded = self.client.get('/api/myadmin/requests/', {'expand': 'employee'})
+        plain = self.client.get('/api/myadmin/requests/')
+        self.employee.last_name = 'Renamed'
+        self.employee.save()
+        response = self.client.get('/api/myadmin/requests/', {'expand': 'employee'},
+                                   HTTP_IF_NONE_MATCH=expanded['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['employee']['last_name'] for row in response.json()}, {'Renamed'})
+        # Lists without '?expand=' embed no profile and stay valid.
+        response = self.client.get('/api/myadmin/requests/', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(path, {'expand': 'employee'}, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['employee']['last_name'], 'Renamed')
+        response = self.client.get(path, {'expand': 'employee'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_deleted_admins_invalidate_plain_responses(self):
+        other = make_admin()
+        processed = make_travel_request(self.employee, status='closed', processed_by=other)
+        path = f'/api/myadmin/requests/{processed.pk}/'
+        detail = self.client.get(path)
+        plain = self.client.get('/api/myadmin/requests/', {'sort_by': 'id'})
+        self.assertEqual(plain.json()[-1]['processed_by'], other.pk)
+        other.delete()
+        response = self.client.get('/api/myadmin/requests/', {'sort_by': 'id'}, HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+        self.assertIsNone(response.json()[-1]['processed_by'])
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['processed_by'])
+
+    def test_archived_requests_of_deleted_profiles_are_kept(self):
+        ArchivedTravelRequests.objects.create(
+            id=10 ** 9, employee_id=10 ** 9, manager=self.manager, from_date=datetime.date(2020, 1, 1),
+            to_date=datetime.date(2020, 1, 5), location='Berlin', destination='Paris', travel_mode='Train',
+            purpose_of_travel='Conference', status='closed', is_closed=True, created_at=timezone.now(),
+            updated_at=timezone.now())
+        for params in ({}, {'page_size': 10}):
+            response = self.client.get('/api/myadmin/requests/', {'from_date': '2019-01-01', 'sort_by': 'id',
+                                                                  'expand': 'employee,manager', **params})
+            rows = response.json()['results'] if params else response.json()
+            self.assertEqual([row['id'] for row in rows], [self.processed.pk, self.pending.pk, 10 ** 9])
+            self.assertEqual(rows[0]['employee']['department'], 'Field')
+            self.assertIsNone(rows[2]['employee'])
+            self.assertEqual(rows[2]['manager']['department'], 'Sales')
@@ -0,0 +1,181 @@
+"""
+Status state machine of travel requests.
+
+TRANSITIONS lists every action that changes a request's status, the statuses it
+may be taken from and the status it leads to:
+    - approve / reject / fi_request (manager): pending -> approved / rejected / FI_required
+    - resubmit (employee): FI_required -> pending, incrementing resubmission_count
+    - close (admin): approved -> closed
+
+A transition is one UPDATE of the requests in an allowed source status,
+guarded by that status and by the caller's queryset (e.g. the manager owning
+the requests), returning the counter snapshot of every changed row (UPDATE ...
+RETURNING, on PostgreSQL and SQLite 3.35+). The returned rows give the dashboard
+counter changes, audit events and status change events of the transition
+without reading the requests before or after.
+
+Elsewhere, and for changes to the snapshot fields themselves (a resubmission
+editing the destination), the requests are first selected with SELECT ... FOR
+UPDATE, then exactly those ids are updated with the same guards; the ids the
+UPDATE changed are only read again when it changed fewer rows than were selected.
+"""
+
+import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, sql
+from django.utils import timezone
+
+from . import audit, counters, events
+from .models import ConcurrentUpdateError, TravelRequests
+
+
+class Transition(NamedTuple):
+    sources: tuple
+    target: str
+    changes: dict = {}
+
+
+TRANSITIONS = {
+    'approve': Transition(('pending',), 'approved'),
+    'reject': Transition(('pending',), 'rejected'),
+    'fi_request': Transition(('pending',), 'FI_required'),
+    'resubmit': Transition(('FI_required',), 'pending', {'resubmission_count': F('resubmission_count') + 1}),
+    'close': Transition(('approved',), 'closed', {'is_closed': True}),
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when an action is not allowed from a request's current status."""
+
+    def __init__(self, action, status):
+        super().__init__(f'Cannot {action.replace("_", " ")} a request that is {status}')
+        self.action = action
+        self.status = status
+
+
+def apply_many(qs, action, guard=None, **changes):
+    """
+    Apply a transition to every request of a queryset that is in an allowed source status.
+
+    Args:
+        qs (QuerySet): TravelRequests to transition (e.g. restricted to a manager's requests).
+        action (str): A key of TRANSITIONS.
+        guard (dict): Extra filters of the UPDATE (and of the SELECT, if any), e.g. {'version': n}.
+        **changes: Other fields to set together with the status.
+
+    Returns:
+        list: (pk, before, after) counter snapshots of the changed requests.
+    """
+    transition = TRANSITIONS[action]
+    now = timezone.now()
+    values = dict(changes, **transition.changes, status=transition.target, updated_at=now,
+                  version=F('version') + 1)
+    connection = connections[router.db_for_write(TravelRequests)]
+    returning = _can_return_from_update(connection) and not any(
+        TravelRequests._meta.get_field(name).attname in counters.SNAPSHOT_FIELDS for name in changes)
+    changed = []
+    for source in transition.sources:
+        candidates = qs.filter(status=source, **(guard or {}))
+        if returning:
+            rows = _update_returning(connection, candidates, values)
+            changed.extend((row[0], _snapshot_before(row[1:], source), row[1:]) for row in rows)
+            continue
+        rows = list(candidates.select_for_update().values_list('pk', *counters.SNAPSHOT_FIELDS))
+        if not rows:
+            continue
+        pks = [row[0] for row in rows]
+        if candidates.filter(pk__in=pks).update(**values) != len(rows):
+            # The row lock is not available everywhere: a concurrent change may have moved
+            # some of the selected requests out of source, keep the ones updated.
+            done = set(qs.filter(pk__in=pks, status=transition.target, updated_at=now)
+                       .values_list('pk', flat=True))
+            rows = [row for row in rows if row[0] in done]
+        changed.extend((row[0], row[1:], _snapshot_after(row[1:], transition.target, changes)) for row in rows)
+    if changed:
+        counters.apply_changes((before, after) for _, before, after in changed)
+        note = changes.get('manager_note')
+        edited = {name: getattr(value, 'pk', value) for name, value in changes.items() if name != 'manager_note'}
+        for pk, before, _ in changed:
+            audit.record(pk, action, before[1], transition.target, note, edited)
+        events.publish_on_commit(
+            events.status_event(pk, after[4], after[0], transition.target, note) for pk, _, after in changed)
+    return changed
+
+
+def _can_return_from_update(connection):
+    """Return whether the database supports UPDATE ... RETURNING."""
+    return connection.vendor == 'postgresql' or (
+        connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert)
+
+
+def _update_returning(connection, qs, values):
+    """
+    Run qs.update(**values) as one statement returning the (pk, *SNAPSHOT_FIELDS) of the changed rows.
+
+    The statement is compiled like QuerySet.update() compiles it. Rows read from
+    a raw cursor skip the backends' converters, so the values are converted by
+    their fields (SQLite returns datetimes as naive UTC text).
+    """
+    query = qs.query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+    compiler = query.get_compiler(connection=connection)
+    compiler.pre_sql_setup()
+    statement, params = compiler.as_sql()
+    fields = [TravelRequests._meta.pk] + [TravelRequests._meta.get_field(name) for name in counters.SNAPSHOT_FIELDS]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{statement} RETURNING {columns}', params)
+        return [tuple(_from_db(field, value) for field, value in zip(fields, row)) for row in cursor.fetchall()]
+
+
+def _from_db(field, value):
+    value = field.to_python(value)
+    if isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def _snapshot_before(row, source):
+    """Return the counter snapshot of a request returned by the UPDATE, as it was in source."""
+    values = dict(zip(counters.SNAPSHOT_FIELDS, row), status=source)
+    return tuple(values[field] for field in counters.SNAPSHOT_FIELDS)
+
+
+def _snapshot_after(row, target, changes):
+    """Return the counter snapshot of a request once the transition has set target and changes on it."""
+    values = dict(zip(counters.SNAPSHOT_FIELDS, row), status=target)
+    for name, value in changes.items():
+        attname = TravelRequests._meta.get_field(name).attname
+        if attname in values:
+            values[attname] = getattr(value, 'pk', value)
+    return tuple(values[field] for field in counters.SNAPSHOT_FIELDS)
+
+
+def apply(qs, action, version=None, **changes):
+    """
+    Apply a transition to the single request selected by qs.
+
+    Args:
+        qs (QuerySet): Selects one request (by pk and owner).
+        action (str): A key of TRANSITIONS.
+        version (int): If given, the change only succeeds while the request is at this version.
+        **changes: Other fields to set together with the status.
+
+    Raises:
+        TravelRequests.DoesNotExist: If qs selects no request.
+        InvalidTransition: If the request's status does not allow the action.
+        ConcurrentUpdateError: If the request is no longer at the given version.
+    """
+    guard = None if version is None else {'version': version}
+    if apply_many(qs, action, guard, **changes):
+        return
+    current = qs.values_list('status', flat=True).first()
+    if current is None:
+        raise TravelRequests.DoesNotExist
+    if current not in TRANSITIONS[action].sources:
+        raise InvalidTransition(action, current)
+    raise ConcurrentUpdateError(f'Travel request is no longer at version {version}')
@@ -8,35 +8,57 @@ This file defines the following endpoints:
         - GET  /employee/requests/            : List all travel requests for the logged-in employee.
         - POST /employee/requests/            : Create a new travel request (employee).
         - GET/PUT/DELETE /employee/requests/<pk>/ : Retrieve, update, or delete a specific travel request for the employee.
+        - GET  /employee/events/              : Server-sent events for status changes of the employee's requests (ASGI only).
     
     3. Manager Endpoints:
         - GET  /manager/requests/                     : List all travel requests assigned to the logged-in manager with optional filtering.
+        - GET  /manager/dashboard/                    : Request counts by status, destination and month for the manager.
         - GET  /manager/requests/<pk>/                : Retrieve details for a specific travel request (manager view).
         - POST /manager/requests/<pk>/approve/        : Approve a travel request.
         - POST /manager/requests/<pk>/reject/         : Reject a travel request.
         - POST /manager/requests/<pk>/fi_request/       : Request further information for a travel request.
         - PUT  /manager/requests/<pk>/update/          : Update a travel request.
+        - POST /manager/requests/bulk/                 : Approve, reject or request further information for many requests.
+        - GET  /manager/events/                       : Server-sent events for status changes of the manager's requests (ASGI only).
     
     4. Admin Endpoints for Requests:
         - GET  /myadmin/requests/                     : List all travel requests in the system with filtering.
+        - GET  /myadmin/requests/export/              : Stream all matching travel requests as NDJSON or CSV.
+        - GET  /myadmin/dashboard/                    : Request counts by status, destination and month (global or per manager).
         - GET  /myadmin/requests/<pk>/                : Retrieve details for a specific travel request.
         - POST /myadmin/requests/<pk>/close/           : Close an approved travel request.
         - PUT  /myadmin/requests/<pk>/update/          : Update a travel request (admin view).
+        - GET  /myadmin/events/                       : Server-sent events for status changes of every request (ASGI only).
     
     5. Admin Endpoints for Employee Management:
         - GET  /myadmin/employees/                    : List all employees.
         - POST /myadmin/employees/                    : Create a new employee (also creates a corresponding Django User if needed).
         - GET/PUT/DELETE /myadmin/employees/<pk>/       : Retrieve, update, or delete a specific employee.
+        - POST /myadmin/employees/import/             : Bulk import employees from JSON Lines or CSV.
     
     6. Admin Endpoints for Manager Management:
         - GET  /myadmin/managers/                     : List all managers.
         - POST /myadmin/managers/                     : Create a new manager (also creates a corresponding Django User if needed).
         - GET/PUT/DELETE /myadmin/managers/<pk>/        : Retrieve, update, or delete a specific manager.
+        - POST /myadmin/managers/import/              : Bulk import managers from JSON Lines or CSV.
+
+    7. Admin Endpoints for Monitoring:
+        - GET  /myadmin/cache_stats/                  : Hit/miss counters of the application caches.
+        - GET  /myadmin/metrics/                      : Per-endpoint latency and SQL statistics in the Prometheus text format.
+
+With the ASYNC_READ_VIEWS setting on (the default under MainProject/asgi.py), the
+request list and detail reads are served by the async views in async_views.py.
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     # Authentication Endpoints:
     path('login/', views.login_view, name='login_api'),
@@ -44,27 +66,40 @@ urlpatterns = [
 
     # Employee Endpoints:
     path('employee/requests/', views.employee_requests_list_create, name='employee-requests-list-create'),
-    path('employee/requests/<int:pk>/', views.employee_requests_detail, name='employee-requests-detail'),
+    path('employee/requests/<int:pk>/', read_views.employee_requests_detail, name='employee-requests-detail'),
+    path('employee/events/', views.employee_events, name='employee-events'),
 
     # Manager Endpoints:
-    path('manager/requests/', views.manager_requests_list, name='manager-requests-list'),
-    path('manager/requests/<int:pk>/', views.manager_requests_detail, name='manager-requests-detail'),
+    path('manager/requests/', read_views.manager_requests_list, name='manager-requests-list'),
+    path('manager/dashboard/', views.manager_dashboard, name='manager-dashboard'),
+    path('manager/requests/<int:pk>/', read_views.manager_requests_detail, name='manager-requests-detail'),
     path('manager/requests/<int:pk>/approve/', views.manager_requests_approve, name='manager-requests-approve'),
     path('manager/requests/<int:pk>/reject/', views.manager_requests_reject, name='manager-requests-reject'),
     path('manager/requests/<int:pk>/fi_request/', views.manager_requests_fi_request, name='manager-requests-fi-request'),
     path('manager/requests/<int:pk>/update/', views.manager_requests_update, name='manager-requests-update'),
+    path('manager/requests/bulk/', views.manager_requests_bulk_action, name='manager-requests-bulk-action'),
+    path('manager/events/', views.manager_events, name='manager-events'),
 
     # Admin Endpoints for Requests:
-    path('myadmin/requests/', views.admin_requests_list, name='admin-requests-list'),
-    path('myadmin/requests/<int:pk>/', views.admin_requests_detail, name='admin-requests-detail'),
+    path('myadmin/requests/', read_views.admin_requests_list, name='admin-requests-list'),
+    path('myadmin/requests/export/', views.admin_requests_export, name='admin-requests-export'),
+    path('myadmin/dashboard/', views.admin_dashboard, name='admin-dashboard'),
+    path('myadmin/requests/<int:pk>/', read_views.admin_requests_detail, name='admin-requests-detail'),
     path('myadmin/requests/<int:pk>/close/', views.admin_requests_close, name='admin-requests-close'),
     path('myadmin/requests/<int:pk>/update/', views.admin_requests_update, name='admin-requests-update'),
+    path('myadmin/events/', views.admin_events, name='admin-events'),
 
     # Admin Endpoints for Employee Management:
     path('myadmin/employees/', views.admin_employees_list_create, name='admin-employees-list-create'),
     path('myadmin/employees/<int:pk>/', views.admin_employees_detail, name='admin-employees-detail'),
+    path('myadmin/employees/import/', views.admin_employees_import, name='admin-employees-import'),
 
     # Admin Endpoints for Manager Management:
     path('myadmin/managers/', views.admin_managers_list_create, name='admin-managers-list-create'),
     path('myadmin/managers/<int:pk>/', views.admin_managers_detail, name='admin-managers-detail'),
+    path('myadmin/managers/import/', views.admin_managers_import, name='admin-managers-import'),
+
+    # Admin Endpoints for Monitoring:
+    path('myadmin/cache_stats/', views.admin_cache_stats, name='admin-cache-stats'),
+    path('myadmin/metrics/', views.admin_metrics, name='admin-metrics'),
 ]
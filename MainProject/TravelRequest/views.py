@@ -7,51 +7,261 @@ This file contains endpoints for:
 
 Each view uses Django REST Framework’s token authentication and permission
 classs to ensure only authenticated users can access protected endpoints
+
+The status change event streams at the end of the file are plain async Django
+views: they are served over ASGI and authenticate tokens themselves.
 """
 
-from django.db.models import Q
+import codecs
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework.authtoken.models import Token
-
-from .models import TravelRequests, Employees, Managers, Admins
-from .serializers import TravelRequestSerializer, EmployeeSerializer, ManagerSerializer, AdminSerializer
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.exceptions import APIException
+
+from .models import ArchivedTravelRequests, ConcurrentUpdateError, TravelRequests, Employees, Managers, Admins
+from .serializers import (TravelRequestSerializer, TravelRequestValuesSerializer, EmployeeSerializer,
+                          ManagerSerializer, AdminSerializer, TravelRequestEventValuesSerializer)
+from .pagination import CursorError, is_paginated, paginate_many, sorted_rows
+from .profiles import aresolve_profile, resolve_profile
+from .caching import all_stats
+from .instrumentation import render_prometheus
+from .list_query import ListQueryError, compile_list_query
+from .expansion import ExpandError, embed, expanded_reader, expanded_variant, parse_expand
+from .importing import import_profiles
+from .export import EXPORT_FORMATS, EXPORT_STREAMS
+from . import counters
+from .conditional import list_etag, not_modified, row_etag, set_validators
+from .authentication import authenticate_request_async
+from .response_cache import cached_response, store_response
+from . import archive, audit, events, transitions
 
 User = get_user_model()
 
-def get_employee_from_user(user):
+# values_list()-based serializer used by the read-only list endpoints.
+travel_request_reader = TravelRequestValuesSerializer()
+# Serializer of the audit events embedded by the detail endpoints.
+event_reader = TravelRequestEventValuesSerializer()
+
+# Transitions (see transitions.py) available on the manager bulk endpoint.
+MANAGER_BULK_ACTIONS = ('approve', 'reject', 'fi_request')
+MAX_BULK_IDS = 500
+
+def detail_response(request, qs):
     """
-    Retrieve an Employee profile matching the provided Django User's email.
+    Serialize a single travel request, answering conditional GETs with 304.
+
+    The row's updated_at is looked up first; the request is only fetched and
+    serialized when the client's ETag / Last-Modified is out of date. With
+    '?timeline=true' the request's audit events are embedded as "timeline",
+    read with one more query.
+
+    With '?expand=' (see expansion.py) the related profiles are fetched with the
+    request through select_related(). The representation then also depends on
+    them, so the ETag is computed from the fetched summaries and no
+    Last-Modified is sent.
 
     Args:
-        user (User): The Django User object.
+        qs (QuerySet): TravelRequests queryset selecting the request (by pk and owner).
 
     Returns:
-        Employees or None: The corresponding Employee record, or None if not found.
+        Response: JSON data of the travel request, 304 Not Modified, 404, or 400 for
+        an invalid 'expand'.
     """
+    variant = 'timeline' if audit.timeline_requested(request.GET) else None
     try:
-        return Employees.objects.get(email=user.email)
-    except Employees.DoesNotExist:
-        return None
+        expand = parse_expand(request.GET)
+    except ExpandError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if not expand:
+        row = qs.values_list('pk', 'updated_at').first()
+        if row is None:
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        response = not_modified(request, row_etag(*row, variant), row[1])
+        if response is not None:
+            return response
+    try:
+        travel_request = (qs.select_related(*expand) if expand else qs).get()
+    except TravelRequests.DoesNotExist:
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    data = TravelRequestSerializer(travel_request).data
+    last_modified = travel_request.updated_at
+    if expand:
+        variant = expanded_variant(variant, embed(data, travel_request, expand), expand)
+        last_modified = None
+        response = not_modified(request, row_etag(travel_request.pk, travel_request.updated_at, variant))
+        if response is not None:
+            return response
+    if audit.timeline_requested(request.GET):
+        data['timeline'] = event_reader.serialize(audit.timeline(travel_request.pk))
+    response = Response(data, status=status.HTTP_200_OK)
+    return set_validators(response, row_etag(travel_request.pk, travel_request.updated_at, variant),
+                          last_modified)
+
+def list_response(request, qs, scope, archived=None):
+    """
+    Serialize a filtered list of travel requests, answering conditional GETs with 304.
+
+    The ETag combines the version of the caller's scope with the query parameters,
+    so it is checked before any travel request is read. Rendered JSON lists are
+    shared between callers of the same scope through the response cache. Filters
+    and sorts are validated by list_query.compile_list_query() first; related
+    profiles are embedded with '?expand=' (see expansion.py).
+
+    Args:
+        qs (QuerySet): TravelRequests visible to the caller.
+        scope (str): The list version scope of the caller (see counters.py).
+        archived (QuerySet): ArchivedTravelRequests visible to the caller, if any; they
+            are included when the date filters reach back into the archive.
+
+    Returns:
+        Response: JSON list (or page) of travel requests, 304 Not Modified, or an error.
+    """
+    try:
+        query = compile_list_query(request.GET)
+        expand = parse_expand(request.GET)
+    except (ListQueryError, ExpandError) as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    reader = expanded_reader(travel_request_reader, expand)
+    etag = list_etag(scope, counters.list_version(scope, bool(expand)), request.GET)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    cacheable = request.accepted_renderer.format == 'json'
+    if cacheable:
+        response = cached_response(etag)
+        if response is not None:
+            return set_validators(response, etag)
+    querysets = [reader.prepare(query.filter(qs))]
+    if archived is not None and archive.reaches_archive(query):
+        querysets.append(reader.prepare(query.filter(archived)))
+    if is_paginated(request.GET):
+        response = paginated_response(querysets, reader, query.sort_by, request.GET)
+    elif len(querysets) > 1:
+        rows = sorted_rows(querysets, reader.columns, query.sort_by)
+        to_representation = reader.bind()
+        response = Response([to_representation(row) for row in rows], status=status.HTTP_200_OK)
+    else:
+        response = Response(reader.serialize(query.order(querysets[0])), status=status.HTTP_200_OK)
+    if cacheable and response.status_code == status.HTTP_200_OK:
+        response = store_response(etag, response.data)
+    return set_validators(response, etag)
+
+def import_response(request, serializer_class):
+    """
+    Stream the request body into the bulk profile importer.
+
+    The body is read as CSV when sent with a text/csv content type and as
+    JSON Lines otherwise. Passwords are hashed with IMPORT_HTTP_HASH_WORKERS
+    processes (default 0: in the request's process, rather than starting a
+    process pool per request).
+
+    Returns:
+        Response: The import report ('created', 'users_created', per-row 'errors').
+    """
+    if request.stream is None:
+        return Response({'error': 'Empty request body'}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = 'csv' if request.content_type.startswith('text/csv') else 'jsonl'
+    lines = codecs.iterdecode(request.stream, 'utf-8')
+    try:
+        report = import_profiles(lines, fmt, serializer_class,
+                                 workers=getattr(settings, 'IMPORT_HTTP_HASH_WORKERS', 0))
+    except UnicodeDecodeError:
+        return Response({'error': 'Request body must be UTF-8'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
 
-def get_manager_from_user(user):
+def use_client_version(travel_request, data):
     """
-    Retrieve a Manager profile matching the provided Django User's email.
+    Make the next save of a travel request conditional on the version the client last read.
 
     Args:
-        user (User): The Django User object.
+        travel_request (TravelRequests): The request about to be saved.
+        data (dict): The request body; its optional "version" is the row version the
+            client based its change on. Without it, the version loaded by the view is used.
 
     Returns:
-        Managers or None: The corresponding Manager record, or None if not found.
+        Response or None: A 400 response if "version" is not an integer, else None.
     """
     try:
-        return Managers.objects.get(email=user.email)
-    except Managers.DoesNotExist:
+        version = client_version(data)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if version is not None:
+        travel_request.version = version
+    return None
+
+def client_version(data):
+    """
+    Return the "version" sent in a request body, or None.
+
+    Raises:
+        ValueError: If the version is not an integer.
+    """
+    version = data.get('version')
+    if version is None:
         return None
+    if isinstance(version, bool):
+        raise ValueError('version must be an integer')
+    try:
+        return int(version)
+    except (TypeError, ValueError):
+        raise ValueError('version must be an integer')
+
+def conflict_response():
+    """Return the response sent when a save lost the race against another change."""
+    return Response({'error': 'Request was changed by someone else; reload it and try again'},
+                    status=status.HTTP_409_CONFLICT)
+
+def transition_response(request, qs, action, message, **changes):
+    """
+    Apply a status transition (see transitions.py) to the request selected by qs.
+
+    Args:
+        qs (QuerySet): Selects the request by pk and owner.
+        action (str): The transition to apply.
+        message (str): Confirmation message returned on success.
+        **changes: Other fields to set together with the status.
+
+    Returns:
+        Response: The confirmation message, 404, 400 if the action is not allowed from the
+        request's status, or 409 if the request is no longer at the version the client sent.
+    """
+    try:
+        transitions.apply(qs, action, version=client_version(request.data), **changes)
+    except TravelRequests.DoesNotExist:
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    except ConcurrentUpdateError:
+        return conflict_response()
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'message': message}, status=status.HTTP_200_OK)
+
+def paginated_response(querysets, reader, sort_by, params):
+    """
+    Serialize one keyset-paginated page of travel requests.
+
+    Args:
+        querysets (list of QuerySet): The filtered travel requests (live, then archived).
+        reader (ValuesSerializer): Serializer of the rows (see expansion.expanded_reader).
+        sort_by (str): The validated sort (see list_query.py), or None for the default.
+        params (QueryDict): The request query parameters ('cursor', 'page_size').
+
+    Returns:
+        Response: JSON with 'results' and 'next_cursor', or an error message.
+    """
+    try:
+        rows, next_cursor = paginate_many(querysets, reader, sort_by,
+                                          params.get('cursor'), params.get('page_size'))
+    except CursorError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': rows, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
 
 @csrf_exempt
 @api_view(['POST'])
@@ -93,25 +303,37 @@ def logout_view(request):
 @csrf_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('employee')
 def employee_requests_list_create(request):
     """
     List or create travel requests for the logged-in employee.
 
     GET:
-        Returns all travel requests associated with the employee.
+        Returns all travel requests associated with the employee (304 Not Modified
+        when the client's ETag is current), with related profiles embedded on
+        '?expand=' (see expansion.py).
     POST:
         Creates a new travel request with provided data.
 
     Returns:
         Response: JSON data of travel requests or error messages.
     """
-    employee = get_employee_from_user(request.user)
-    if not employee:
+    employee_id = resolve_profile(request.user, 'employee')
+    if not employee_id:
         return Response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
     if request.method == 'GET':
-        qs = TravelRequests.objects.filter(employee=employee)
-        serializer = TravelRequestSerializer(qs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            expand = parse_expand(request.GET)
+        except ExpandError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        reader = expanded_reader(travel_request_reader, expand)
+        scope = counters.employee_scope(employee_id)
+        etag = list_etag(scope, counters.list_version(scope, bool(expand)), request.GET)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        qs = TravelRequests.objects.filter(employee_id=employee_id)
+        return set_validators(Response(reader.serialize(qs), status=status.HTTP_200_OK), etag)
     serializer = TravelRequestSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
@@ -121,6 +343,7 @@ def employee_requests_list_create(request):
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('employee')
 def employee_requests_detail(request, pk):
     """
     Retrieve, update, or delete a specific travel request for the logged-in employee.
@@ -128,27 +351,44 @@ def employee_requests_detail(request, pk):
     Args:
         pk (int): Primary key of the travel request.
 
+    GET supports conditional requests (ETag / Last-Modified from the row's updated_at).
+
     Returns:
         Response: JSON data of the travel request, updated data, or deletion confirmation.
     """
-    employee = get_employee_from_user(request.user)
-    if not employee:
+    employee_id = resolve_profile(request.user, 'employee')
+    if not employee_id:
         return Response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == 'GET':
+        return detail_response(request, TravelRequests.objects.filter(pk=pk, employee_id=employee_id))
     try:
-        travel_request = TravelRequests.objects.get(pk=pk, employee=employee)
+        travel_request = TravelRequests.objects.get(pk=pk, employee_id=employee_id)
     except TravelRequests.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    if request.method == 'GET':
-        serializer = TravelRequestSerializer(travel_request)
-        return Response(serializer.data, status=status.HTTP_200_OK)
     if request.method == 'PUT':
         if travel_request.status not in ['pending', 'FI_required']:
             return Response({'error': 'Cannot update request'}, status=status.HTTP_400_BAD_REQUEST)
+        error = use_client_version(travel_request, request.data)
+        if error:
+            return error
         serializer = TravelRequestSerializer(travel_request, data=request.data, partial=True)
-        if serializer.is_valid():
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # The status only changes through transitions: editing a request that needs
+        # further information resubmits it.
+        serializer.validated_data.pop('status', None)
+        try:
+            if travel_request.status == 'FI_required':
+                transitions.apply(TravelRequests.objects.filter(pk=pk), 'resubmit', version=travel_request.version,
+                                  **serializer.validated_data)
+                travel_request.refresh_from_db()
+                return Response(TravelRequestSerializer(travel_request).data, status=status.HTTP_200_OK)
             serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except (ConcurrentUpdateError, TravelRequests.DoesNotExist):
+            return conflict_response()
+        except transitions.InvalidTransition:
+            return Response({'error': 'Cannot update request'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_200_OK)
     if request.method == 'DELETE':
         if travel_request.status not in ['pending', 'FI_required']:
             return Response({'error': 'Cannot delete request'}, status=status.HTTP_400_BAD_REQUEST)
@@ -167,30 +407,40 @@ def manager_requests_list(request):
         - from_date: Filter for travel requests with a from_date greater than or equal to this date.
         - to_date: Filter for travel requests with a to_date less than or equal to this date.
         - status: Filter by travel request status.
-        - sort_by: Sort the results by a specific field (use a minus sign for descending order).
+        - sort_by: Sort the results by created_at, from_date, to_date or id (use a minus
+          sign for descending order).
+        - page_size / cursor: Opt in to keyset pagination; the response then contains
+          'results' and 'next_cursor' (pass it back as 'cursor' to fetch the next page).
+        - expand: Comma separated employee, manager and/or processed_by, to embed
+          name / department summaries instead of their ids.
+
+    Returns:
+        Response: JSON list of filtered travel requests, or one page of them
+        (304 Not Modified when the client's ETag is current), or 400 for an
+        invalid filter or sort.
+    """
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
+        return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    return list_response(request, TravelRequests.objects.filter(manager_id=manager_id),
+                         counters.manager_scope(manager_id))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def manager_dashboard(request):
+    """
+    Summarise the travel requests assigned to the logged-in manager.
+
+    Counts are read from incrementally maintained counters, so the cost does not
+    depend on the number of requests.
 
     Returns:
-        Response: JSON list of filtered travel requests.
+        Response: JSON with 'total' and counts 'by_status', 'by_destination' and 'by_month'.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
-    qs = TravelRequests.objects.filter(manager=manager)
-    if request.GET.get('id'):
-        qs = qs.filter(id=request.GET.get('id'))
-    if request.GET.get('name'):
-        name = request.GET.get('name')
-        qs = qs.filter(Q(employee__first_name__icontains=name) | Q(employee__last_name__icontains=name))
-    if request.GET.get('from_date'):
-        qs = qs.filter(from_date__gte=request.GET.get('from_date'))
-    if request.GET.get('to_date'):
-        qs = qs.filter(to_date__lte=request.GET.get('to_date'))
-    if request.GET.get('status'):
-        qs = qs.filter(status=request.GET.get('status'))
-    if request.GET.get('sort_by'):
-        qs = qs.order_by(request.GET.get('sort_by'))
-    serializer = TravelRequestSerializer(qs, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(counters.summary(counters.manager_scope(manager_id)), status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -201,22 +451,20 @@ def manager_requests_detail(request, pk):
     Args:
         pk (int): The primary key of the travel request.
 
+    Supports conditional GET: ETag / Last-Modified are derived from the row's updated_at.
+
     Returns:
-        Response: JSON data of the travel request.
+        Response: JSON data of the travel request, or 304 Not Modified.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk, manager=manager)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    serializer = TravelRequestSerializer(travel_request)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return detail_response(request, TravelRequests.objects.filter(pk=pk, manager_id=manager_id))
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('manager')
 def manager_requests_approve(request, pk):
     """
     Approve a travel request assigned to the logged-in manager.
@@ -225,26 +473,23 @@ def manager_requests_approve(request, pk):
         pk (int): The primary key of the travel request.
 
     Expects:
-        A JSON body with an optional "manager_note".
+        A JSON body with an optional "manager_note" and the optional "version" of the
+        request the manager acted on.
 
     Returns:
-        Response: Confirmation message if approved.
+        Response: Confirmation message if approved; 400 unless the request is pending, or 409
+        if it was changed meanwhile.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk, manager=manager)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    travel_request.status = 'approved'
-    travel_request.manager_note = request.data.get('manager_note', '')
-    travel_request.save()
-    return Response({'message': 'Request approved'}, status=status.HTTP_200_OK)
+    return transition_response(request, TravelRequests.objects.filter(pk=pk, manager_id=manager_id), 'approve',
+                               'Request approved', manager_note=request.data.get('manager_note', ''))
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('manager')
 def manager_requests_reject(request, pk):
     """
     Reject a travel request assigned to the logged-in manager.
@@ -253,26 +498,23 @@ def manager_requests_reject(request, pk):
         pk (int): The primary key of the travel request.
 
     Expects:
-        A JSON body with an optional "manager_note".
+        A JSON body with an optional "manager_note" and the optional "version" of the
+        request the manager acted on.
 
     Returns:
-        Response: Confirmation message if rejected.
+        Response: Confirmation message if rejected; 400 unless the request is pending, or 409
+        if it was changed meanwhile.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk, manager=manager)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    travel_request.status = 'rejected'
-    travel_request.manager_note = request.data.get('manager_note', '')
-    travel_request.save()
-    return Response({'message': 'Request rejected'}, status=status.HTTP_200_OK)
+    return transition_response(request, TravelRequests.objects.filter(pk=pk, manager_id=manager_id), 'reject',
+                               'Request rejected', manager_note=request.data.get('manager_note', ''))
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('manager')
 def manager_requests_fi_request(request, pk):
     """
     Request further information for a travel request assigned to the logged-in manager.
@@ -281,26 +523,76 @@ def manager_requests_fi_request(request, pk):
         pk (int): The primary key of the travel request.
 
     Expects:
-        A JSON body with an optional "manager_note".
+        A JSON body with an optional "manager_note" and the optional "version" of the
+        request the manager acted on.
 
     Returns:
-        Response: Confirmation message if updated.
+        Response: Confirmation message if updated; 400 unless the request is pending, or 409
+        if it was changed meanwhile.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk, manager=manager)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    travel_request.status = 'FI_required'
-    travel_request.manager_note = request.data.get('manager_note', '')
-    travel_request.save()
-    return Response({'message': 'Further information requested'}, status=status.HTTP_200_OK)
+    return transition_response(request, TravelRequests.objects.filter(pk=pk, manager_id=manager_id), 'fi_request',
+                               'Further information requested', manager_note=request.data.get('manager_note', ''))
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def manager_requests_bulk_action(request):
+    """
+    Approve, reject or request further information for many travel requests at once.
+
+    Expects:
+        A JSON body with "ids" (list of integer request ids), "action" (one of 'approve',
+        'reject', 'fi_request') and an optional "manager_note" applied to every request.
+
+    The transition is applied with a single UPDATE restricted to the pending
+    requests among the ids owned by the logged-in manager, inside a transaction
+    that also updates the dashboard counters and records the audit events.
+
+    Returns:
+        Response: The number of updated requests and a per-id outcome ('updated',
+        'not_found' or 'invalid_status' with the request's current status), or an
+        error message.
+    """
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
+        return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    action = request.data.get('action')
+    if action not in MANAGER_BULK_ACTIONS:
+        return Response({'error': f"action must be one of {', '.join(MANAGER_BULK_ACTIONS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_BULK_IDS:
+        return Response({'error': f'At most {MAX_BULK_IDS} ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+    # JSON booleans are ints in Python and floats would be truncated: both could name requests by accident.
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = list(dict.fromkeys(ids))
+    with audit.recording(request.user, 'manager'):
+        owned = TravelRequests.objects.filter(id__in=ids, manager_id=manager_id)
+        changed = transitions.apply_many(owned, action, manager_note=request.data.get('manager_note', ''))
+        updated = {pk for pk, _, _ in changed}
+        current = {}
+        if len(updated) < len(ids):
+            current = dict(owned.exclude(id__in=updated).values_list('id', 'status'))
+    results = []
+    for pk in ids:
+        if pk in updated:
+            results.append({'id': pk, 'outcome': 'updated'})
+        elif pk in current:
+            results.append({'id': pk, 'outcome': 'invalid_status', 'status': current[pk]})
+        else:
+            results.append({'id': pk, 'outcome': 'not_found'})
+    return Response({'action': action, 'updated': len(updated), 'results': results}, status=status.HTTP_200_OK)
 
 @csrf_exempt
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('manager')
 def manager_requests_update(request, pk):
     """
     Update details of a travel request assigned to the logged-in manager.
@@ -309,21 +601,28 @@ def manager_requests_update(request, pk):
         pk (int): The primary key of the travel request.
 
     Expects:
-        JSON data with the fields to update.
+        JSON data with the fields to update and, optionally, the "version" they were based on.
 
     Returns:
-        Response: Updated travel request data or error messages.
+        Response: Updated travel request data, error messages, or 409 if the request
+        was changed meanwhile.
     """
-    manager = get_manager_from_user(request.user)
-    if not manager:
+    manager_id = resolve_profile(request.user, 'manager')
+    if not manager_id:
         return Response({'error': 'Manager profile not found'}, status=status.HTTP_404_NOT_FOUND)
     try:
-        travel_request = TravelRequests.objects.get(pk=pk, manager=manager)
+        travel_request = TravelRequests.objects.get(pk=pk, manager_id=manager_id)
     except TravelRequests.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    error = use_client_version(travel_request, request.data)
+    if error:
+        return error
     serializer = TravelRequestSerializer(travel_request, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
+        try:
+            serializer.save()
+        except ConcurrentUpdateError:
+            return conflict_response()
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -339,27 +638,74 @@ def admin_requests_list(request):
         - from_date: Filter requests with a from_date on or after this date.
         - to_date: Filter requests with a to_date on or before this date.
         - status: Filter by request status.
-        - sort_by: Field to sort the results.
-
-    Returns:
-        Response: JSON list of travel requests.
-    """
-    qs = TravelRequests.objects.all()
-    if request.GET.get('id'):
-        qs = qs.filter(id=request.GET.get('id'))
-    if request.GET.get('name'):
-        name = request.GET.get('name')
-        qs = qs.filter(Q(employee__first_name__icontains=name) | Q(employee__last_name__icontains=name))
-    if request.GET.get('from_date'):
-        qs = qs.filter(from_date__gte=request.GET.get('from_date'))
-    if request.GET.get('to_date'):
-        qs = qs.filter(to_date__lte=request.GET.get('to_date'))
-    if request.GET.get('status'):
-        qs = qs.filter(status=request.GET.get('status'))
-    if request.GET.get('sort_by'):
-        qs = qs.order_by(request.GET.get('sort_by'))
-    serializer = TravelRequestSerializer(qs, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+        - sort_by: Field to sort the results (created_at, from_date, to_date or id,
+          prefixed with a minus sign for descending order).
+        - page_size / cursor: Opt in to keyset pagination; the response then contains
+          'results' and 'next_cursor' (pass it back as 'cursor' to fetch the next page).
+        - expand: Comma separated employee, manager and/or processed_by, to embed
+          name / department summaries instead of their ids.
+
+    Archived requests are included when from_date / to_date reach back into the archive.
+
+    Returns:
+        Response: JSON list of travel requests, or one page of them
+        (304 Not Modified when the client's ETag is current), or 400 for an
+        invalid filter or sort.
+    """
+    return list_response(request, TravelRequests.objects.all(), counters.GLOBAL_SCOPE,
+                         ArchivedTravelRequests.objects.all())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_requests_export(request):
+    """
+    Stream every matching travel request as NDJSON or CSV (admin view).
+
+    Accepts the same filters and 'sort_by' as the admin request list, plus:
+        - export_format: 'ndjson' (default) or 'csv'.
+
+    Rows are streamed as they are read from the database, so memory use does not
+    grow with the number of matching requests. Archived requests are merged in
+    when from_date / to_date reach back into the archive.
+
+    Returns:
+        StreamingHttpResponse: The exported rows, or an error message.
+    """
+    export_format = request.GET.get('export_format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response({'error': f"export_format must be one of {', '.join(EXPORT_FORMATS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        query = compile_list_query(request.GET)
+    except ListQueryError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    querysets = [query.filter(TravelRequests.objects.all())]
+    if archive.reaches_archive(query):
+        querysets.append(query.filter(ArchivedTravelRequests.objects.all()))
+    stream = EXPORT_STREAMS[export_format](querysets, query.sort_by or 'id')
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="travel_requests.{export_format}"'
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_dashboard(request):
+    """
+    Summarise all travel requests in the system (admin view).
+
+    Optional query parameters:
+        - manager: Restrict the summary to one manager's requests.
+
+    Returns:
+        Response: JSON with 'total' and counts 'by_status', 'by_destination' and 'by_month'.
+    """
+    scope = counters.GLOBAL_SCOPE
+    if request.GET.get('manager'):
+        try:
+            scope = counters.manager_scope(int(request.GET.get('manager')))
+        except ValueError:
+            return Response({'error': 'manager must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(counters.summary(scope), status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -370,19 +716,17 @@ def admin_requests_detail(request, pk):
     Args:
         pk (int): The primary key of the travel request.
 
+    Supports conditional GET: ETag / Last-Modified are derived from the row's updated_at.
+
     Returns:
-        Response: JSON data of the travel request.
+        Response: JSON data of the travel request, or 304 Not Modified.
     """
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    serializer = TravelRequestSerializer(travel_request)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return detail_response(request, TravelRequests.objects.filter(pk=pk))
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('admin')
 def admin_requests_close(request, pk):
     """
     Close an approved travel request (admin view).
@@ -391,22 +735,15 @@ def admin_requests_close(request, pk):
         pk (int): The primary key of the travel request.
 
     Returns:
-        Response: Confirmation message if closed, or error message if not approved.
+        Response: Confirmation message if closed; 400 unless the request is approved, or
+        409 if it is no longer at the "version" sent in the body.
     """
-    try:
-        travel_request = TravelRequests.objects.get(pk=pk)
-    except TravelRequests.DoesNotExist:
-        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    if travel_request.status == 'approved':
-        travel_request.status = 'closed'
-        travel_request.is_closed = True
-        travel_request.save()
-        return Response({'message': 'Request closed'}, status=status.HTTP_200_OK)
-    return Response({'error': 'Request is not approved'}, status=status.HTTP_400_BAD_REQUEST)
+    return transition_response(request, TravelRequests.objects.filter(pk=pk), 'close', 'Request closed')
 
 @csrf_exempt
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('admin')
 def admin_requests_update(request, pk):
     """
     Update a travel request in the admin view.
@@ -415,18 +752,25 @@ def admin_requests_update(request, pk):
         pk (int): The primary key of the travel request.
 
     Expects:
-        JSON data with the updated fields.
+        JSON data with the updated fields and, optionally, the "version" they were based on.
 
     Returns:
-        Response: Updated travel request data or error messages.
+        Response: Updated travel request data, error messages, or 409 if the request
+        was changed meanwhile.
     """
     try:
         travel_request = TravelRequests.objects.get(pk=pk)
     except TravelRequests.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    error = use_client_version(travel_request, request.data)
+    if error:
+        return error
     serializer = TravelRequestSerializer(travel_request, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
+        try:
+            serializer.save()
+        except ConcurrentUpdateError:
+            return conflict_response()
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -458,9 +802,26 @@ def admin_employees_list_create(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_employees_import(request):
+    """
+    Bulk import employees (admin view).
+
+    Expects:
+        A JSON Lines body (one employee object per line), or CSV with a header row
+        when sent as text/csv. A Django User is created for every new email.
+
+    Returns:
+        Response: Number of employees and users created, and per-row validation errors.
+    """
+    return import_response(request, EmployeeSerializer)
+
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('admin')
 def admin_employees_detail(request, pk):
     """
     Retrieve, update, or delete a specific employee (admin view).
@@ -515,9 +876,26 @@ def admin_managers_list_create(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_managers_import(request):
+    """
+    Bulk import managers (admin view).
+
+    Expects:
+        A JSON Lines body (one manager object per line), or CSV with a header row
+        when sent as text/csv. A Django User is created for every new email.
+
+    Returns:
+        Response: Number of managers and users created, and per-row validation errors.
+    """
+    return import_response(request, ManagerSerializer)
+
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@audit.recorded('admin')
 def admin_managers_detail(request, pk):
     """
     Retrieve, update, or delete a specific manager (admin view).
@@ -543,3 +921,82 @@ def admin_managers_detail(request, pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     manager.delete()
     return Response({'message': 'Manager deleted'}, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_cache_stats(request):
+    """
+    Report hit/miss counters for the application caches (admin view).
+
+    Returns:
+        Response: JSON object mapping each cache name to its hits, misses and hit_rate.
+    """
+    return Response(all_stats(), status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_metrics(request):
+    """
+    Expose per-endpoint latency, SQL query and cache statistics for Prometheus (admin view).
+
+    Returns:
+        HttpResponse: The statistics of this process in the Prometheus text format.
+    """
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ------------------------------------------------------------------------------
+# Status change event streams (server-sent events, ASGI only)
+# ------------------------------------------------------------------------------
+
+# Channel each role subscribes to, given the user's profile id.
+EVENT_STREAM_CHANNELS = {
+    'employee': counters.employee_scope,
+    'manager': counters.manager_scope,
+    'admin': lambda profile_id: counters.GLOBAL_SCOPE,
+}
+
+async def event_stream_response(request, role):
+    """
+    Authenticate the request and stream the status changes visible to the given role.
+
+    The token is read from the Authorization header or, for browser EventSource
+    clients that cannot set headers, from the "token" query parameter.
+
+    Args:
+        role (str): 'employee', 'manager' or 'admin'.
+
+    Returns:
+        StreamingHttpResponse: A text/event-stream of 'status_changed' events, or a
+        JSON error response.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'},
+                            status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Event streams require the ASGI server'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    try:
+        user, _ = await authenticate_request_async(request, query_param='token')
+    except APIException as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    profile_id = await aresolve_profile(user, role)
+    if not profile_id:
+        return JsonResponse({'error': f'{role.capitalize()} profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    channel = EVENT_STREAM_CHANNELS[role](profile_id)
+    connection = request.scope.get(events.CONNECTION_SCOPE_KEY)
+    response = StreamingHttpResponse(events.stream([channel], connection=connection), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+async def employee_events(request):
+    """Stream status changes of the logged-in employee's travel requests."""
+    return await event_stream_response(request, 'employee')
+
+async def manager_events(request):
+    """Stream status changes of the travel requests assigned to the logged-in manager."""
+    return await event_stream_response(request, 'manager')
+
+async def admin_events(request):
+    """Stream status changes of every travel request (admin view)."""
+    return await event_stream_response(request, 'admin')
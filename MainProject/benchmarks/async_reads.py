@@ -0,0 +1,209 @@
+"""
+Load test the read endpoints under uvicorn (async views) and gunicorn (WSGI, DRF views).
+
+A throwaway SQLite database file is seeded, then each server is started in turn
+with a single worker process and every endpoint is hammered by --concurrency
+keep-alive connections for --duration seconds. Reports requests/s and p50/p99
+latency per endpoint.
+
+Requires uvicorn and gunicorn, which are not application dependencies:
+
+    pip install uvicorn gunicorn
+
+Usage (from the MainProject directory):
+
+    python -m benchmarks.async_reads --requests 10000 --concurrency 50 --duration 10
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .common import PROJECT_DIR, setup_django
+from .read_serializer import seed
+
+HOST = '127.0.0.1'
+
+SERVERS = {
+    'wsgi': lambda port, threads: [sys.executable, '-m', 'gunicorn', 'MainProject.wsgi:application',
+                                   '--bind', f'{HOST}:{port}', '--workers', '1', '--worker-class', 'gthread',
+                                   '--threads', str(threads), '--log-level', 'warning'],
+    'asgi': lambda port, threads: [sys.executable, '-m', 'uvicorn', 'MainProject.asgi:application',
+                                   '--host', HOST, '--port', str(port), '--workers', '1',
+                                   '--no-access-log', '--log-level', 'warning'],
+}
+
+
+def prepare_database(path, requests):
+    """Migrate and seed the benchmark database; return the tokens and request ids to use."""
+    os.environ['BENCHMARK_DATABASE'] = path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+    from TravelRequest.models import TravelRequests
+
+    call_command('migrate', verbosity=0)
+    seed(requests, random.Random(0))
+    call_command('rebuild_dashboard_counters', stdout=io.StringIO())
+    User = get_user_model()
+    tokens = {}
+    for role, email in (('manager', 'bench@example.com'), ('admin', 'admin@example.com')):
+        user = User.objects.create_user(username=email, email=email, password='x')
+        tokens[role] = Token.objects.create(user=user).key
+    ids = list(TravelRequests.objects.order_by('?').values_list('id', flat=True)[:1000])
+    return tokens, ids
+
+
+def endpoints(ids):
+    """Return (name, role, list of paths) for every endpoint under test."""
+    return [
+        ('manager list (page of 50)', 'manager', ['/api/manager/requests/?page_size=50']),
+        ('manager list (status filter)', 'manager', ['/api/manager/requests/?page_size=50&status=approved']),
+        ('manager detail', 'manager', [f'/api/manager/requests/{pk}/' for pk in ids]),
+        ('admin list (page of 50)', 'admin', ['/api/myadmin/requests/?page_size=50&sort_by=-created_at']),
+        ('admin detail', 'admin', [f'/api/myadmin/requests/{pk}/' for pk in ids]),
+    ]
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; return (status code, connection should be closed)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') == 'close'
+
+
+async def client(port, paths, token, deadline, latencies, errors, offset):
+    connection = None
+    i = offset
+    while time.perf_counter() < deadline:
+        if connection is None:
+            connection = await asyncio.open_connection(HOST, port)
+        reader, writer = connection
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nAuthorization: Token {token}\r\n\r\n'.encode())
+        try:
+            status, close = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            errors.append(None)
+            writer.close()
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+        if close:
+            writer.close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(port, paths, token, concurrency, duration):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(port, paths, token, deadline, latencies, errors, n * 7)
+                           for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'req_per_s': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None,
+    }
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            socket.create_connection((HOST, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def run_server(kind, args, tokens, ids):
+    port = free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings')
+    process = subprocess.Popen(SERVERS[kind](port, args.threads), cwd=PROJECT_DIR, env=env)
+    results = {}
+    try:
+        wait_for_port(port, process)
+        for name, role, paths in endpoints(ids):
+            asyncio.run(load(port, paths, tokens[role], args.concurrency, 1))  # warm up
+            results[name] = asyncio.run(load(port, paths, tokens[role], args.concurrency, args.duration))
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=10000, help='travel requests to seed')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per endpoint')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn worker threads')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tokens, ids = prepare_database(os.path.join(directory, 'benchmark.sqlite3'), args.requests)
+        results = {kind: run_server(kind, args, tokens, ids) for kind in SERVERS}
+
+    print(f'{args.requests} requests, {args.concurrency} connections, {args.duration:g}s per endpoint')
+    print(f"{'endpoint':<30} {'server':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, _, _ in endpoints(ids):
+        for kind in SERVERS:
+            row = results[kind][name]
+            print(f"{name:<30} {kind:<6} {row['req_per_s']:>9.0f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+                  f"{row['errors']:>7}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway database created the same way Django's test
+runner creates one (an in-memory SQLite database with the default settings), so
+they never touch db.sqlite3. Run them from the MainProject directory, e.g.:
+
+    python -m benchmarks.name_search
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configure Django for a standalone benchmark script."""
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MainProject.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create a migrated throwaway database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """
+    Call func repeat times and summarise the wall-clock timings.
+
+    Returns:
+        dict: 'best', 'median' and 'mean' in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+    }
@@ -0,0 +1,219 @@
+"""
+Benchmark the list, detail, filter, sort and write endpoints at several data scales.
+
+A throwaway SQLite database file is grown through each scale with the
+generate_benchmark_data management command (keeping 10 travel requests per
+employee and 20 employees per manager). At each scale every endpoint is called
+--repeat times through the Django test client, i.e. through the full
+middleware, authentication and rendering stack but without a network or
+server. The caller is the manager with the largest team, one of their
+employees and an admin. Timings and SQL queries per call are printed and, with
+--output, written as JSON together with the environment, so runs can be
+compared over time.
+
+Usage (from the MainProject directory):
+
+    python -m benchmarks.endpoints --output results.json
+    python -m benchmarks.endpoints --scales 10000 100000 --repeat 20
+"""
+
+import argparse
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+
+from .common import PROJECT_DIR, measure, setup_django
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+REQUESTS_PER_EMPLOYEE = 10
+EMPLOYEES_PER_MANAGER = 20
+
+
+def prepare_database(path):
+    """Point Django at a new database file and migrate it."""
+    os.environ['BENCHMARK_DATABASE'] = path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    setup_django()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def grow(scale, seed):
+    """Add managers, employees and travel requests until there are scale requests; return the seconds taken."""
+    from django.core.management import call_command
+    from TravelRequest.models import Admins, Employees, Managers, TravelRequests
+
+    employees = max(scale // REQUESTS_PER_EMPLOYEE, 1)
+    managers = max(employees // EMPLOYEES_PER_MANAGER, 1)
+    start = time.perf_counter()
+    call_command('generate_benchmark_data', managers=max(managers - Managers.objects.count(), 0),
+                 employees=max(employees - Employees.objects.count(), 0), admins=0 if Admins.objects.exists() else 5,
+                 requests=max(scale - TravelRequests.objects.count(), 0), seed=seed + scale, stdout=io.StringIO())
+    return time.perf_counter() - start
+
+
+def login(profile):
+    """Return a test client authenticated with a token as the user of a profile."""
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    user, _ = get_user_model().objects.get_or_create(username=profile.email, defaults={'email': profile.email})
+    token, _ = Token.objects.get_or_create(user=user)
+    return Client(HTTP_AUTHORIZATION=f'Token {token.key}', HTTP_HOST='localhost')
+
+
+def endpoints(rng):
+    """
+    Return (group, name, call) for every endpoint under test.
+
+    Each call makes one request and returns the response; write calls take a new
+    request from a pool on every call, so they keep doing the same work.
+    """
+    from django.db.models import Count
+    from django.utils import timezone
+    from TravelRequest.models import Admins, Employees, TravelRequests
+
+    manager_id = (Employees.objects.values('manager').annotate(n=Count('id')).order_by('-n', 'manager')
+                  .values_list('manager', flat=True).first())
+    employee = (Employees.objects.filter(manager_id=manager_id).annotate(n=Count('travelrequests'))
+                .order_by('-n', 'id').first())
+    manager, admin = employee.manager, Admins.objects.order_by('id').first()
+    employee_client, manager_client, admin_client = login(employee), login(manager), login(admin)
+
+    own = TravelRequests.objects.filter(manager_id=manager_id)
+    detail_ids = itertools.cycle(rng.sample(list(own.values_list('id', flat=True)), min(own.count(), 1000)))
+    all_ids = list(TravelRequests.objects.values_list('id', flat=True))
+    admin_ids = itertools.cycle(rng.sample(all_ids, min(len(all_ids), 1000)))
+    pending = iter(own.filter(status='pending').order_by('-id').values_list('id', flat=True))
+    approved = iter(TravelRequests.objects.filter(status='approved').order_by('-id').values_list('id', flat=True))
+    editable = itertools.cycle(TravelRequests.objects.filter(employee=employee, status='pending')
+                               .values_list('id', flat=True)[:100])
+    updatable = itertools.cycle(own.values_list('id', flat=True)[:100])
+    new_request = {'employee': employee.pk, 'manager': manager_id, 'from_date': '2030-03-02', 'to_date': '2030-03-05',
+                   'location': 'Berlin', 'destination': 'Paris', 'travel_mode': 'Train',
+                   'purpose_of_travel': 'Benchmark'}
+
+    today = timezone.localdate()
+    last_month = today - datetime.timedelta(days=30)
+    second_page = admin_client.get('/api/myadmin/requests/', {'page_size': 50}).json()['next_cursor']
+
+    def get(client, path, data=None):
+        return lambda: client.get(path, data)
+
+    return [
+        ('list', 'employee list', get(employee_client, '/api/employee/requests/')),
+        ('list', 'manager list (page of 50)', get(manager_client, '/api/manager/requests/', {'page_size': 50})),
+        ('list', 'admin list (page of 50)', get(admin_client, '/api/myadmin/requests/', {'page_size': 50})),
+        ('list', 'admin list (page 2)', get(admin_client, '/api/myadmin/requests/',
+                                            {'page_size': 50, 'cursor': second_page})),
+        ('detail', 'employee detail', lambda: employee_client.get(f'/api/employee/requests/{next(editable)}/')),
+        ('detail', 'manager detail', lambda: manager_client.get(f'/api/manager/requests/{next(detail_ids)}/')),
+        ('detail', 'manager detail (timeline)', lambda: manager_client.get(
+            f'/api/manager/requests/{next(detail_ids)}/', {'timeline': 'true'})),
+        ('detail', 'admin detail', lambda: admin_client.get(f'/api/myadmin/requests/{next(admin_ids)}/')),
+        ('filter', 'manager list (status)', get(manager_client, '/api/manager/requests/',
+                                                {'status': 'pending', 'page_size': 50})),
+        ('filter', 'admin list (date range)', get(admin_client, '/api/myadmin/requests/',
+                                                  {'from_date': last_month, 'to_date': today,
+                                                   'page_size': 50})),
+        ('filter', 'admin list (name)', get(admin_client, '/api/myadmin/requests/',
+                                            {'name': 'kowal', 'page_size': 50})),
+        ('filter', 'admin list (status, unpaginated)', get(admin_client, '/api/myadmin/requests/',
+                                                           {'status': 'FI_required'})),
+        ('sort', 'manager list (-created_at)', get(manager_client, '/api/manager/requests/',
+                                                   {'sort_by': '-created_at', 'page_size': 50})),
+        ('sort', 'admin list (from_date)', get(admin_client, '/api/myadmin/requests/',
+                                               {'sort_by': 'from_date', 'page_size': 50})),
+        ('sort', 'admin list (-to_date)', get(admin_client, '/api/myadmin/requests/',
+                                              {'sort_by': '-to_date', 'page_size': 50})),
+        ('write', 'employee create', lambda: employee_client.post(
+            '/api/employee/requests/', new_request, content_type='application/json')),
+        ('write', 'employee update', lambda: employee_client.put(
+            f'/api/employee/requests/{next(editable)}/', {'purpose_of_travel': 'Benchmark'},
+            content_type='application/json')),
+        ('write', 'manager approve', lambda: manager_client.post(
+            f'/api/manager/requests/{next(pending)}/approve/', {'manager_note': 'OK'},
+            content_type='application/json')),
+        ('write', 'manager update', lambda: manager_client.put(
+            f'/api/manager/requests/{next(updatable)}/update/', {'manager_note': 'Noted'},
+            content_type='application/json')),
+        ('write', 'admin close', lambda: admin_client.post(f'/api/myadmin/requests/{next(approved)}/close/')),
+    ]
+
+
+def run(call, repeat):
+    """
+    Warm up, then time repeat calls; return the timings and the SQL queries per call.
+
+    Queries are read from the per-route statistics of RequestStatsMiddleware.
+    """
+    from TravelRequest.instrumentation import request_stats
+
+    def checked():
+        response = call()
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.status_code}: {response.content[:200]!r}')
+
+    checked()
+    request_stats.reset()
+    result = measure(checked, repeat)
+    stats = list(request_stats.snapshot().values())
+    calls = sum(route['count'] for route in stats) or 1
+    result['queries'] = sum(route['queries_sum'] for route in stats) / calls
+    return result
+
+
+def environment():
+    """Describe what the results were measured on."""
+    import django
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version, 'machine': platform.machine(), 'system': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='numbers of travel requests to benchmark at')
+    parser.add_argument('--repeat', type=int, default=10, help='calls per endpoint and scale')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_database(os.path.join(directory, 'benchmark.sqlite3'))
+        for scale in sorted(args.scales):
+            seconds = grow(scale, args.seed)
+            rng = random.Random(args.seed)
+            print(f'{scale} travel requests (generated in {seconds:.1f}s), {args.repeat} calls per endpoint')
+            print(f"{'group':<7} {'endpoint':<34} {'best ms':>9} {'median ms':>10} {'queries':>8}")
+            results[scale] = {'generate_seconds': seconds, 'endpoints': {}}
+            for group, name, call in endpoints(rng):
+                row = run(call, args.repeat)
+                results[scale]['endpoints'][name] = dict(row, group=group)
+                print(f"{group:<7} {name:<34} {row['best']:>9.1f} {row['median']:>10.1f} {row['queries']:>8.1f}")
+            print()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the employee name filter served by the FTS5 trigram index with the
+original icontains filter.
+
+Usage (from the MainProject directory):
+
+    python -m benchmarks.name_search --employees 100000
+"""
+
+import argparse
+import datetime
+import random
+
+from .common import benchmark_database, measure, setup_django
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Priya', 'Wei', 'Fatima', 'Mohammed', 'Olga', 'Kenji', 'Aisha', 'Carlos', 'Ingrid', 'Tariq']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+              'Nakamura', 'Okafor', 'Kowalski', 'Lindqvist', 'Haddad', 'Chen', 'Patel', 'Novak', 'Silva']
+SEARCH_TERMS = ['smith', 'ander', 'kowal', 'priya', 'son', 'zzz']
+
+
+def seed(employees, requests, rng):
+    from TravelRequest.models import Employees, Managers, TravelRequests
+
+    manager = Managers.objects.create(first_name='Bench', last_name='Manager', email='bench@example.com',
+                                      password='x')
+    Employees.objects.bulk_create(
+        (Employees(first_name=rng.choice(FIRST_NAMES) + rng.choice(['', 'a', 'e', 'o']),
+                   last_name=rng.choice(LAST_NAMES) + rng.choice(['', '-' + rng.choice(LAST_NAMES)]),
+                   email=f'employee{i}@example.com', password='x', manager=manager)
+         for i in range(employees)),
+        batch_size=5000,
+    )
+    employee_ids = list(Employees.objects.values_list('id', flat=True))
+    start = datetime.date(2024, 1, 1)
+    TravelRequests.objects.bulk_create(
+        (TravelRequests(employee_id=rng.choice(employee_ids), manager=manager,
+                        from_date=start + datetime.timedelta(days=i % 365),
+                        to_date=start + datetime.timedelta(days=i % 365 + 3),
+                        location='Berlin', destination='Paris', travel_mode='Train', purpose_of_travel='Bench')
+         for i in range(requests)),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Q
+    from TravelRequest.models import TravelRequests
+    from TravelRequest.search import filter_by_employee_name
+
+    with benchmark_database():
+        seed(args.employees, args.requests, random.Random(42))
+        base = TravelRequests.objects.all()
+        print(f'{args.employees} employees, {args.requests} travel requests, best/median of {args.repeat} (ms)')
+        print(f'{"term":<8} {"rows":>7} {"icontains":>18} {"trigram index":>18} {"speedup":>8}')
+        for term in SEARCH_TERMS:
+            icontains = base.filter(Q(employee__first_name__icontains=term) | Q(employee__last_name__icontains=term))
+            indexed = filter_by_employee_name(base, term)
+            rows = len(list(indexed.values_list('id', flat=True)))
+            assert rows == len(list(icontains.values_list('id', flat=True)))
+            slow = measure(lambda: list(icontains.values_list('id', flat=True)), args.repeat)
+            fast = measure(lambda: list(indexed.values_list('id', flat=True)), args.repeat)
+            print(f'{term:<8} {rows:>7} {slow["best"]:>8.1f}/{slow["median"]:>8.1f} '
+                  f'{fast["best"]:>8.1f}/{fast["median"]:>8.1f} {slow["median"] / fast["median"]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare TravelRequestSerializer with the values_list()-based
+TravelRequestValuesSerializer used by the list endpoints.
+
+Both paths include the database read and JSON rendering; the script also checks
+that the rendered JSON is byte-identical.
+
+Usage (from the MainProject directory):
+
+    python -m benchmarks.read_serializer --requests 50000
+"""
+
+import argparse
+import datetime
+import random
+
+from .common import benchmark_database, measure, setup_django
+
+STATUSES = ['pending', 'FI_required', 'approved', 'rejected', 'closed']
+
+
+def seed(requests, rng):
+    from TravelRequest.models import Admins, Employees, Managers, TravelRequests
+
+    manager = Managers.objects.create(first_name='Bench', last_name='Manager', email='bench@example.com',
+                                      password='x')
+    admin = Admins.objects.create(first_name='Bench', last_name='Admin', email='admin@example.com', password='x')
+    employees = Employees.objects.bulk_create(
+        Employees(first_name='Employee', last_name=str(i), email=f'employee{i}@example.com', password='x',
+                  manager=manager)
+        for i in range(100)
+    )
+    start = datetime.date(2024, 1, 1)
+    TravelRequests.objects.bulk_create(
+        (TravelRequests(employee=rng.choice(employees), manager=manager,
+                        from_date=start + datetime.timedelta(days=i % 365),
+                        to_date=start + datetime.timedelta(days=i % 365 + 3),
+                        location='Berlin', destination=rng.choice(['Paris', 'Tokyo', 'Lagos', 'Lima']),
+                        travel_mode='Flight', purpose_of_travel='Customer visit', status=rng.choice(STATUSES),
+                        manager_note=rng.choice([None, 'Looks fine']), processed_by=rng.choice([None, admin]))
+         for i in range(requests)),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from TravelRequest.models import TravelRequests
+    from TravelRequest.serializers import TravelRequestSerializer, TravelRequestValuesSerializer
+
+    renderer = JSONRenderer()
+    reader = TravelRequestValuesSerializer()
+
+    def model_serializer():
+        return renderer.render(TravelRequestSerializer(TravelRequests.objects.all(), many=True).data)
+
+    def values_serializer():
+        return renderer.render(reader.serialize(TravelRequests.objects.all()))
+
+    with benchmark_database():
+        seed(args.requests, random.Random(42))
+        assert model_serializer() == values_serializer(), 'rendered JSON differs'
+        print(f'{args.requests} travel requests, median of {args.repeat} runs (query + serialize + render)')
+        baseline = None
+        for label, func in (('TravelRequestSerializer', model_serializer),
+                            ('TravelRequestValuesSerializer', values_serializer)):
+            median = measure(func, args.repeat)['median']
+            baseline = baseline or median
+            print(f'{label:<30} {median:>9.1f} ms {args.requests / median * 1000:>12,.0f} rows/s '
+                  f'{baseline / median:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Settings used by the servers started by the benchmark scripts.
+
+The project settings with DEBUG off (so queries are not recorded) and the
+database file named by the BENCHMARK_DATABASE environment variable; the rest of
+the database settings follow the profile selected by
+TRAVELREQUEST_DATABASE_PROFILE.
+"""
+
+import os
+
+from MainProject.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DATABASE']  # noqa: F405
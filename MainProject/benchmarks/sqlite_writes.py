@@ -0,0 +1,202 @@
+"""
+Stress concurrent writes to SQLite under the development and production database profiles.
+
+For each profile (see TravelRequest/sqlite) a throwaway database file is
+seeded, then --processes worker processes with --threads threads each act as
+one manager and one of their employees. For --duration seconds every thread
+approves the manager's pending requests, edits manager notes, files new
+requests and reads the manager's list, through the Django test client. Like
+the WSGI handler, old connections are closed before and after each request, so
+the development profile reconnects on every request and the production one
+keeps its connection.
+
+Reports, per profile, successful requests per second, the share of requests
+that failed with a server error (almost always 'database is locked'), 409
+conflicts and write latencies.
+
+Usage (from the MainProject directory):
+
+    python -m benchmarks.sqlite_writes --processes 4 --threads 8 --duration 10
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from .common import PROJECT_DIR, setup_django
+
+PROFILES = ['development', 'production']
+# Operation -> relative frequency.
+OPERATIONS = {'approve': 3, 'update': 3, 'create': 2, 'list': 2}
+
+
+def seed(path, actors):
+    """Migrate and fill the database; write the manager / employee pair of every thread to path as JSON."""
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db.models import Count
+    from rest_framework.authtoken.models import Token
+    from TravelRequest.models import Employees, TravelRequests
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_benchmark_data', managers=actors, employees=actors * 20, requests=actors * 400,
+                 stdout=io.StringIO())
+
+    def token(profile):
+        user = get_user_model().objects.create_user(username=profile.email, email=profile.email, password='x')
+        return Token.objects.create(user=user).key
+
+    pairs = []
+    managers = (Employees.objects.values('manager').annotate(n=Count('id')).order_by('-n')
+                .values_list('manager', flat=True)[:actors])
+    for manager_id in managers:
+        employee = Employees.objects.filter(manager_id=manager_id).select_related('manager').first()
+        own = TravelRequests.objects.filter(manager_id=manager_id)
+        pairs.append({
+            'manager_token': token(employee.manager), 'employee_token': token(employee),
+            'manager': manager_id, 'employee': employee.pk,
+            'pending': list(own.filter(status='pending').values_list('id', flat=True)),
+            'requests': list(own.values_list('id', flat=True)),
+        })
+    with open(path, 'w') as f:
+        json.dump(pairs, f)
+
+
+def client_thread(actor, start_at, deadline, seed, results):
+    """Send requests as one manager / employee pair until the deadline; append (operation, outcome, seconds)."""
+    from django.db import close_old_connections, connections
+    from django.test import Client
+
+    def client(key):
+        return Client(HTTP_AUTHORIZATION=f'Token {key}', HTTP_HOST='localhost', raise_request_exception=False)
+
+    manager, employee = client(actor['manager_token']), client(actor['employee_token'])
+    rng = random.Random(seed)
+    pending = list(actor['pending'])
+    new_request = {'employee': actor['employee'], 'manager': actor['manager'], 'from_date': '2030-03-02',
+                   'to_date': '2030-03-05', 'location': 'Berlin', 'destination': 'Paris', 'travel_mode': 'Train',
+                   'purpose_of_travel': 'Stress test'}
+    calls = {
+        'approve': lambda: manager.post(f'/api/manager/requests/{pending.pop()}/approve/', {'manager_note': 'OK'},
+                                        content_type='application/json'),
+        'update': lambda: manager.put(f'/api/manager/requests/{rng.choice(actor["requests"])}/update/',
+                                      {'manager_note': f'Note {rng.random()}'}, content_type='application/json'),
+        'create': lambda: employee.post('/api/employee/requests/', new_request, content_type='application/json'),
+        'list': lambda: manager.get('/api/manager/requests/', {'page_size': 50}),
+    }
+    time.sleep(max(start_at - time.time(), 0))
+    while time.time() < deadline:
+        operation = rng.choices(list(OPERATIONS), list(OPERATIONS.values()))[0]
+        if operation == 'approve' and not pending:
+            operation = 'update'
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            response = calls[operation]()
+            outcome = 'error' if response.status_code >= 500 else str(response.status_code)
+        except Exception:  # e.g. 'database is locked' while authenticating
+            outcome = 'error'
+        results.append((operation, outcome, time.perf_counter() - started))
+        close_old_connections()
+    connections.close_all()
+
+
+def worker(path, number, threads, start_at, duration):
+    """Run the client threads of one process and print their results as JSON."""
+    setup_django()
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    logging.getLogger('TravelRequest').setLevel(logging.CRITICAL)
+    with open(path) as f:
+        actors = json.load(f)[number * threads:(number + 1) * threads]
+    results = []
+    pool = [threading.Thread(target=client_thread, args=(actor, start_at, start_at + duration, number * 1000 + n,
+                                                         results))
+            for n, actor in enumerate(actors)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    json.dump(results, sys.stdout)
+
+
+def run_profile(profile, args):
+    """Seed a database and run the worker processes against it with the given profile; return the summary."""
+    with tempfile.TemporaryDirectory() as directory:
+        actors_path = os.path.join(directory, 'actors.json')
+        env = dict(os.environ, BENCHMARK_DATABASE=os.path.join(directory, 'benchmark.sqlite3'),
+                   DJANGO_SETTINGS_MODULE='benchmarks.settings', TRAVELREQUEST_DATABASE_PROFILE=profile)
+        command = [sys.executable, '-m', 'benchmarks.sqlite_writes', '--actors', actors_path]
+        subprocess.run(command + ['--seed', str(args.processes * args.threads)], cwd=PROJECT_DIR, env=env,
+                       check=True)
+        start_at = time.time() + 3  # leave the workers time to start
+        workers = [subprocess.Popen(command + ['--worker', str(n), '--threads', str(args.threads),
+                                               '--start-at', str(start_at), '--duration', str(args.duration)],
+                                    cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE)
+                   for n in range(args.processes)]
+        results = []
+        for process in workers:
+            output, _ = process.communicate()
+            if process.returncode:
+                raise RuntimeError(f'worker exited with code {process.returncode}')
+            results.extend(json.loads(output))
+    return summarize(results, args.duration)
+
+
+def summarize(results, duration):
+    outcomes = Counter(outcome for _, outcome, _ in results)
+    writes = sorted(seconds for operation, outcome, seconds in results
+                    if operation != 'list' and outcome != 'error')
+    ok = sum(count for outcome, count in outcomes.items() if outcome.startswith('2'))
+    return {
+        'requests': len(results),
+        'ok_per_s': ok / duration,
+        'error_rate': outcomes['error'] / len(results) if results else 0,
+        'conflicts': outcomes['409'],
+        'outcomes': dict(outcomes),
+        'by_operation': dict(Counter(operation for operation, _, _ in results)),
+        'write_p50_ms': statistics.median(writes) * 1000 if writes else None,
+        'write_p99_ms': writes[int(len(writes) * 0.99) - 1] * 1000 if writes else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='client threads per process')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per profile')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    # Internal: the seeding and worker steps run in their own processes.
+    for name in ('--actors', '--seed', '--worker', '--start-at'):
+        parser.add_argument(name, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        return seed(args.actors, int(args.seed))
+    if args.worker:
+        return worker(args.actors, int(args.worker), args.threads, float(args.start_at), args.duration)
+
+    results = {profile: run_profile(profile, args) for profile in PROFILES}
+    print(f'{args.processes} processes x {args.threads} threads, {args.duration:g}s per profile')
+    print(f"{'profile':<12} {'requests':>9} {'ok/s':>8} {'errors':>8} {'409':>6} {'write p50 ms':>13} "
+          f"{'write p99 ms':>13}")
+    for profile, row in results.items():
+        print(f"{profile:<12} {row['requests']:>9} {row['ok_per_s']:>8.0f} {row['error_rate']:>8.1%} "
+              f"{row['conflicts']:>6} {row['write_p50_ms'] or 0:>13.1f} {row['write_p99_ms'] or 0:>13.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()